@@ -0,0 +1,21 @@
+# accounts/tasks.py
+""" Jobs do app (jobs/queue.py) """
+from django_tenants.models import TenantMixin
+from django_tenants.signals import post_schema_sync
+
+from jobs.queue import job
+
+from .models import Agency, Domain
+
+
+@job('accounts.create_agency_schema', max_attempts=3)
+def create_agency_schema(agency_id, domain_url):
+    """
+    Cria o schema da agência (migrations de todos os apps do tenant) fora da
+    requisição. O domínio só é ligado no fim: antes disso a agência não abre.
+    """
+    agency = Agency.objects.get(pk=agency_id)
+    agency.create_schema(check_if_exists=True, verbosity=0)
+    post_schema_sync.send(sender=TenantMixin, tenant=agency.serializable_fields())
+    Domain.objects.get_or_create(domain=domain_url, defaults={'tenant': agency, 'is_primary': True})
+    return {'schema_name': agency.schema_name, 'domain': domain_url}
@@ -17,6 +17,7 @@ from google.auth.transport.requests import Request
 # Imports Locais (Do próprio app accounts)
 from .models import GoogleApiCredentials, Agency, Domain
 from .forms import AgencyForm  # Certifique-se que o forms.py está em accounts/
+from .tasks import create_agency_schema
 
 User = get_user_model()
 
@@ -255,7 +256,10 @@ def create_agency(request):
                 # Forçamos o Django a operar no schema 'public' para criar o Tenant.
                 # Isso engana o django-tenants permitindo criar agências estando logado na 'brainz'.
                 with schema_context('public'): 
-                    
+                    domain_url = form.cleaned_data['domain_url']
+                    if Domain.objects.filter(domain=domain_url).exists():
+                        raise IntegrityError(domain_url)
+
                     with transaction.atomic():
                         # 1. Salva o Tenant
                         tenant = form.save(commit=False)
@@ -264,16 +268,19 @@ def create_agency(request):
                         tenant.menu_config = {
                             'allowed_modules': form.cleaned_data['visible_menus']
                         }
-                        tenant.save() # Dispara criação do Schema no Postgres (agora permitido)
-
-                        # 2. Cria o Domínio
-                        domain = Domain()
-                        domain.domain = form.cleaned_data['domain_url']
-                        domain.tenant = tenant
-                        domain.is_primary = True
-                        domain.save()
-
-                messages.success(request, f"Agência '{tenant.name}' criada com sucesso!")
+                        # O schema (migrations de todos os apps) leva minutos: sai da
+                        # requisição e vai para a fila, que liga o domínio no fim
+                        tenant.auto_create_schema = False
+                        tenant.save()
+
+                        # 2. Schema + Domínio no worker (accounts/tasks.py)
+                        create_agency_schema.enqueue(agency_id=tenant.pk, domain_url=domain_url)
+
+                messages.success(
+                    request,
+                    f"Agência '{tenant.name}' cadastrada! O ambiente fica pronto em alguns minutos "
+                    "(o domínio é ativado quando a criação terminar).",
+                )
                 return redirect('agency_list')
 
             except IntegrityError:
@@ -5,6 +5,12 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+É o ponto de entrada do deploy (Dockerfile e Procfile):
+gunicorn -k uvicorn.workers.UvicornWorker config.asgi:application
+O stream de eventos do Kanban (SSE, projects/events.py) só fica ativo por aqui.
+Com vários workers, KANBAN_EVENT_BROKER precisa ser
+projects.events.PostgresNotifyBroker (o Dockerfile já define).
 """
 
 import os
@@ -9,6 +9,19 @@ SECRET_KEY = config('SECRET_KEY')
 # 2. Lendo DEBUG do ambiente (convertendo para Boolean)
 DEBUG = config('DEBUG', default=False, cast=bool)
 
+# Cache compartilhado por todos os processos (gunicorn, workers, publicador...):
+# tabela no Postgres, sem Redis. Um LocMemCache por processo faria cada worker
+# invalidar só o próprio cache. A tabela é criada no deploy (`createcachetable`
+# no CMD do Dockerfile e no release do Procfile). Cada leitura do cache
+# (snapshot do Kanban, painel, feed ICS) é uma consulta ao banco.
+# Definido antes de get_allowed_hosts, que já usa o cache.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'django_cache',
+    },
+}
+
 # 3. Lógica Híbrida de ALLOWED_HOSTS (Ambiente + Banco de Dados)
 def get_allowed_hosts():
     # Primeiro, pega a lista definida no EasyPanel (ex: "meusite.com,localhost")
@@ -20,8 +33,12 @@ def get_allowed_hosts():
 
     # Se DEBUG for False, tentamos buscar os domínios extras no banco (Lógica SaaS)
     # Usamos cache para não matar o banco de dados
-    cached_domains = cache.get('DYNAMIC_ALLOWED_HOSTS')
-    
+    try:
+        # Na carga das settings o banco pode não estar acessível (cache em tabela)
+        cached_domains = cache.get('DYNAMIC_ALLOWED_HOSTS')
+    except Exception:
+        cached_domains = None
+
     if cached_domains:
         hosts.extend(cached_domains)
     else:
@@ -88,6 +105,7 @@ SHARED_APPS = [
     'django.contrib.staticfiles',
     'storages', 
     'accounts',
+    'jobs',
 ]
 
 TENANT_APPS = [
@@ -271,6 +289,27 @@ TIKTOK_CLIENT_SECRET = config('TIKTOK_CLIENT_SECRET')
 TIKTOK_REDIRECT_URI = config('TIKTOK_REDIRECT_URI')
 
 
+# KANBAN EM TEMPO REAL (projects/events.py)
+# Com mais de um processo/worker ASGI use 'projects.events.PostgresNotifyBroker'
+# (obrigatório no deploy com --workers > 1; o Dockerfile já define)
+KANBAN_EVENT_BROKER = config('KANBAN_EVENT_BROKER', default='projects.events.InProcessBroker')
+
+# FILA DE JOBS (jobs/queue.py) — workers: python manage.py run_workers
+JOBS_BACKOFF_BASE = config('JOBS_BACKOFF_BASE', default=10, cast=int)
+JOBS_BACKOFF_MAX = config('JOBS_BACKOFF_MAX', default=3600, cast=int)
+JOBS_STALE_AFTER = config('JOBS_STALE_AFTER', default=1800, cast=int)
+# Uploads da galeria esperam aqui até o worker enviar ao R2 (projects/media_files.py):
+# o web e os workers precisam enxergar o mesmo diretório (volume compartilhado)
+MEDIA_STAGING_DIR = config('MEDIA_STAGING_DIR', default=str(BASE_DIR / 'media' / 'staging'))
+
+# CLIENTE HTTP DAS REDES SOCIAIS (projects/http.py)
+HTTP_CONNECT_TIMEOUT = config('HTTP_CONNECT_TIMEOUT', default=5, cast=float)
+HTTP_READ_TIMEOUT = config('HTTP_READ_TIMEOUT', default=20, cast=float)
+HTTP_RETRIES = config('HTTP_RETRIES', default=3, cast=int)
+# Limite de chamadas por plataforma, compartilhado entre processos (jobs/ratelimit.py)
+HTTP_RATE_LIMIT_MAX_WAIT = config('HTTP_RATE_LIMIT_MAX_WAIT', default=10, cast=float)
+
+
 # --- CONFIGURAÇÕES DE PROXY (Obrigatório para EasyPanel) ---
 # Diz ao Django para confiar no cabeçalho Host que o EasyPanel envia
 USE_X_FORWARDED_HOST = True
@@ -13,6 +13,7 @@ urlpatterns = [
     # --- ADICIONE ESTA LINHA AQUI ---
     # Isso faz o Django ler o arquivo accounts/urls.py que você criou
     path('accounts/', include('accounts.urls')), 
+    path('api/jobs/', include('jobs.urls')),
     # --------------------------------
 
     # Google Auth
@@ -0,0 +1,17 @@
+from django.contrib import admin
+
+from .models import Job, RateLimitBucket
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('name', 'schema_name', 'status', 'attempts', 'run_at', 'finished_at')
+    list_filter = ('status', 'name', 'schema_name')
+    search_fields = ('name', 'last_error')
+    readonly_fields = ('locked_at', 'locked_by', 'last_error', 'result', 'created_at', 'finished_at')
+
+
+@admin.register(RateLimitBucket)
+class RateLimitBucketAdmin(admin.ModelAdmin):
+    list_display = ('key', 'tokens', 'updated_at', 'blocked_until')
+    search_fields = ('key',)
@@ -0,0 +1,82 @@
+import logging
+import multiprocessing
+import signal
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from jobs.queue import requeue_stale_jobs, work, worker_name
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Roda os workers da fila de jobs (threads ou processos)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=4, help='Quantidade de workers')
+        parser.add_argument('--mode', choices=['thread', 'process'], default='thread',
+                            help='thread para jobs de I/O (HTTP, R2); process para CPU (ZIP, imagens)')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Segundos de espera com a fila vazia')
+        parser.add_argument('--batch-size', type=int, default=1, help='Jobs reservados por vez em cada worker')
+        parser.add_argument('--once', action='store_true', help='Esvazia a fila e sai (cron/testes)')
+        parser.add_argument('--requeue-interval', type=float, default=60,
+                            help='Segundos entre as buscas por jobs presos em running (worker que morreu)')
+
+    def requeue_stale(self):
+        try:
+            requeued = requeue_stale_jobs()
+        except Exception:
+            # Banco fora do ar: os workers seguem, tenta de novo no próximo intervalo
+            logger.exception("Falha ao devolver jobs presos para a fila")
+            return
+        if requeued:
+            self.stdout.write(f"{requeued} jobs presos devolvidos para a fila")
+
+    def handle(self, *args, **options):
+        self.requeue_stale()
+
+        if options['mode'] == 'process':
+            # Processos filhos não podem herdar a conexão do pai
+            connections.close_all()
+            stop_event = multiprocessing.Event()
+            runner = multiprocessing.Process
+        else:
+            stop_event = threading.Event()
+            runner = threading.Thread
+
+        def stop(signum, frame):
+            self.stdout.write("Encerrando: os workers terminam o job atual e saem")
+            stop_event.set()
+
+        signal.signal(signal.SIGINT, stop)
+        signal.signal(signal.SIGTERM, stop)
+
+        workers = [
+            runner(
+                target=work,
+                args=(worker_name(index), stop_event),
+                kwargs={
+                    'poll_interval': options['poll_interval'],
+                    'batch_size': options['batch_size'],
+                    'once': options['once'],
+                },
+                name=f"jobs-worker-{index}",
+                daemon=True,
+            )
+            for index in range(options['concurrency'])
+        ]
+        for worker in workers:
+            worker.start()
+        self.stdout.write(f"{len(workers)} workers ({options['mode']}) rodando")
+
+        # Um job de uma thread/processo que morreu não espera o próximo deploy
+        next_requeue = time.monotonic() + options['requeue_interval']
+        while any(worker.is_alive() for worker in workers):
+            time.sleep(1)
+            if options['once'] or stop_event.is_set() or time.monotonic() < next_requeue:
+                continue
+            self.requeue_stale()
+            next_requeue = time.monotonic() + options['requeue_interval']
@@ -0,0 +1,71 @@
+# jobs/models.py
+from django.conf import settings
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """
+    Fila de trabalhos em segundo plano (schema public, compartilhada por todos
+    os tenants). `schema_name` diz em qual tenant o job roda. Os workers
+    (manage.py run_workers) pegam os jobs com SELECT ... FOR UPDATE SKIP LOCKED.
+    """
+    STATUS_CHOICES = [
+        ('queued', 'Na fila'),
+        ('running', 'Executando'),
+        ('succeeded', 'Concluído'),
+        ('failed', 'Falhou'),
+    ]
+
+    name = models.CharField(max_length=100)
+    schema_name = models.CharField(max_length=63)
+    payload = models.JSONField(default=dict, blank=True)
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    priority = models.SmallIntegerField(default=0)
+    run_at = models.DateTimeField(default=timezone.now)
+
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    locked_by = models.CharField(max_length=100, blank=True)
+
+    result = models.JSONField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Só os jobs prontos entram no índice que os workers varrem
+            models.Index(
+                fields=['-priority', 'run_at', 'id'],
+                condition=Q(status='queued'),
+                name='job_ready_idx',
+            ),
+            # Jobs presos em 'running' (worker morreu)
+            models.Index(fields=['locked_at'], condition=Q(status='running'), name='job_running_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.get_status_display()})"
+
+
+class RateLimitBucket(models.Model):
+    """
+    Balde de fichas (token bucket) compartilhado por todos os processos, para
+    chamadas a APIs externas (jobs/ratelimit.py). Uma linha por chave, ex.:
+    'meta' (limite do app) ou 'meta:<conta>'. Atualizado só por SQL atômico.
+    """
+    key = models.CharField(max_length=100, primary_key=True)
+    # Pode ficar negativo: cada chamada reserva a sua ficha e espera a vez
+    tokens = models.FloatField()
+    updated_at = models.DateTimeField()
+    # Pausa pedida pela API (Retry-After / uso alto)
+    blocked_until = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return self.key
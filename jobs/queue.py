@@ -0,0 +1,150 @@
+# jobs/queue.py
+"""
+Fila de jobs no Postgres, sem Redis/Celery.
+
+Registro (em <app>/tasks.py, descoberto no ready() do app):
+
+    @job('projects.gerar_zip', max_attempts=3)
+    def gerar_zip(file_ids):
+        ...
+
+Enfileirar (dentro da requisição; vai junto com a transação dela):
+
+    gerar_zip.enqueue(file_ids=[1, 2, 3])
+
+O job roda no schema do tenant que enfileirou. Falhas voltam para a fila com
+backoff exponencial (com jitter) até `max_attempts`; depois ficam em 'failed'.
+"""
+import logging
+import os
+import random
+import socket
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+from django_tenants.utils import get_public_schema_name, schema_context
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+JOBS_BACKOFF_BASE = getattr(settings, 'JOBS_BACKOFF_BASE', 10)
+JOBS_BACKOFF_MAX = getattr(settings, 'JOBS_BACKOFF_MAX', 60 * 60)
+# Job em 'running' há mais que isso é de um worker que morreu: volta para a fila
+JOBS_STALE_AFTER = getattr(settings, 'JOBS_STALE_AFTER', 60 * 30)
+
+_registry = {}
+
+
+def job(name, max_attempts=5, priority=0):
+    """ Registra a função como job. Ganha `.enqueue(**payload)`; o retorno (JSON) vira `Job.result` """
+    def decorator(func):
+        _registry[name] = func
+
+        def enqueue(run_at=None, **payload):
+            return enqueue_job(name, payload, run_at=run_at, priority=priority, max_attempts=max_attempts)
+
+        func.job_name = name
+        func.enqueue = enqueue
+        return func
+    return decorator
+
+
+def enqueue_job(name, payload=None, schema_name=None, run_at=None, priority=0, max_attempts=5, user=None):
+    if name not in _registry:
+        raise KeyError(f"Job não registrado: {name}")
+    return Job.objects.create(
+        name=name,
+        payload=payload or {},
+        schema_name=schema_name or connection.schema_name,
+        run_at=run_at or timezone.now(),
+        priority=priority,
+        max_attempts=max_attempts,
+        created_by=user if user and user.is_authenticated else None,
+    )
+
+
+def backoff_delay(attempts):
+    """ Segundos até a próxima tentativa: exponencial com teto e jitter de ±50% """
+    delay = min(JOBS_BACKOFF_BASE * 2 ** (attempts - 1), JOBS_BACKOFF_MAX)
+    return delay * random.uniform(0.5, 1.5)
+
+
+def worker_name(index=0):
+    return f"{socket.gethostname()}:{os.getpid()}:{index}"
+
+
+def claim_jobs(worker, limit=1):
+    """
+    Reserva até `limit` jobs prontos. SKIP LOCKED: workers concorrentes nunca
+    esperam uns pelos outros nem pegam o mesmo job.
+    """
+    now = timezone.now()
+    with schema_context(get_public_schema_name()), transaction.atomic():
+        jobs = list(
+            Job.objects
+            .select_for_update(skip_locked=True)
+            .filter(status='queued', run_at__lte=now)
+            .order_by('-priority', 'run_at', 'id')[:limit]
+        )
+        for item in jobs:
+            item.status = 'running'
+            item.attempts += 1
+            item.locked_at = now
+            item.locked_by = worker
+        Job.objects.bulk_update(jobs, ['status', 'attempts', 'locked_at', 'locked_by'])
+    return jobs
+
+
+def run_job(item):
+    """ Executa um job já reservado e grava o resultado (ou agenda a nova tentativa) """
+    func = _registry.get(item.name)
+    try:
+        if func is None:
+            raise KeyError(f"Job não registrado: {item.name}")
+        with schema_context(item.schema_name):
+            result = func(**item.payload)
+    except Exception:
+        error = traceback.format_exc()
+        logger.warning("Job %s #%s falhou (tentativa %s/%s)", item.name, item.pk, item.attempts, item.max_attempts)
+        if item.attempts < item.max_attempts:
+            fields = {'status': 'queued', 'run_at': timezone.now() + timedelta(seconds=backoff_delay(item.attempts))}
+        else:
+            fields = {'status': 'failed', 'finished_at': timezone.now()}
+        fields.update(last_error=error, locked_at=None, locked_by='')
+    else:
+        fields = {'status': 'succeeded', 'result': result, 'finished_at': timezone.now(), 'locked_at': None, 'locked_by': ''}
+
+    with schema_context(get_public_schema_name()):
+        Job.objects.filter(pk=item.pk).update(**fields)
+    for field, value in fields.items():
+        setattr(item, field, value)
+    return item
+
+
+def requeue_stale_jobs(stale_after=JOBS_STALE_AFTER):
+    """ Devolve para a fila os jobs de workers que morreram no meio da execução """
+    limit = timezone.now() - timedelta(seconds=stale_after)
+    with schema_context(get_public_schema_name()):
+        return Job.objects.filter(status='running', locked_at__lt=limit).update(
+            status='queued', locked_at=None, locked_by='', run_at=timezone.now(),
+        )
+
+
+def work(worker, stop_event, poll_interval=1.0, batch_size=1, once=False):
+    """ Loop de um worker: reserva, executa, repete. Sem jobs, espera `poll_interval` """
+    try:
+        while not stop_event.is_set():
+            close_old_connections()
+            jobs = claim_jobs(worker, batch_size)
+            for item in jobs:
+                run_job(item)
+            if not jobs:
+                if once:
+                    break
+                stop_event.wait(poll_interval)
+    finally:
+        connection.close()
@@ -0,0 +1,104 @@
+# jobs/ratelimit.py
+"""
+Limite de chamadas a APIs externas compartilhado entre processos (gunicorn,
+workers, publicador...), num token bucket por chave em RateLimitBucket.
+
+Cada `acquire` é um único INSERT ... ON CONFLICT DO UPDATE: repõe as fichas
+pelo tempo passado, reserva uma e devolve quanto esperar. Não há leitura
+seguida de escrita, então processos concorrentes nunca gastam a mesma ficha;
+com o balde vazio as chamadas ficam enfileiradas no ritmo `rate`.
+
+    wait = acquire('meta', rate=20, burst=40, max_wait=10)   # já dormiu `wait`
+    block('meta', 30)      # API pediu pausa (Retry-After): vale para todos
+    drain('meta')          # uso alto: sem rajadas, só o ritmo constante
+
+A tabela fica no schema public; o SQL usa o nome qualificado, então funciona
+de dentro de qualquer tenant. Chame fora de transações longas: a linha fica
+travada até o commit.
+"""
+import time
+
+from django.db import connection
+from django_tenants.utils import get_public_schema_name
+
+from .models import RateLimitBucket
+
+
+class RateLimitExceeded(Exception):
+    def __init__(self, key, wait):
+        super().__init__(f"Limite de chamadas em '{key}': próxima vaga em {wait:.1f}s")
+        self.key = key
+        self.wait = wait
+
+
+def _table():
+    quote = connection.ops.quote_name
+    return f"{quote(get_public_schema_name())}.{quote(RateLimitBucket._meta.db_table)}"
+
+
+def reserve(key, rate, burst, cost=1):
+    """ Reserva `cost` fichas e devolve os segundos até poder usar (0 = já) """
+    table = _table()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {table} AS bucket (key, tokens, updated_at, blocked_until)
+            VALUES (%(key)s, %(burst)s - %(cost)s, clock_timestamp(), NULL)
+            ON CONFLICT (key) DO UPDATE SET
+                tokens = LEAST(
+                    %(burst)s,
+                    bucket.tokens + EXTRACT(EPOCH FROM clock_timestamp() - bucket.updated_at)::float * %(rate)s
+                ) - %(cost)s,
+                updated_at = clock_timestamp()
+            RETURNING bucket.tokens, EXTRACT(EPOCH FROM bucket.blocked_until - clock_timestamp())::float
+            """,
+            {'key': key, 'rate': rate, 'burst': burst, 'cost': cost},
+        )
+        tokens, blocked = cursor.fetchone()
+    return max(-tokens / rate if tokens < 0 else 0, blocked or 0)
+
+
+def refund(key, burst, cost=1):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {_table()} SET tokens = LEAST(%s, tokens + %s) WHERE key = %s",
+            [burst, cost, key],
+        )
+
+
+def acquire(key, rate, burst, max_wait=None, cost=1):
+    """
+    Espera a vez da chamada (dorme o necessário) e devolve quanto esperou.
+    Se a espera passar de `max_wait`, devolve a ficha e levanta RateLimitExceeded.
+    """
+    wait = reserve(key, rate, burst, cost)
+    if max_wait is not None and wait > max_wait:
+        refund(key, burst, cost)
+        raise RateLimitExceeded(key, wait)
+    if wait > 0:
+        time.sleep(wait)
+    return wait
+
+
+def block(key, seconds):
+    """ Ninguém chama `key` pelos próximos `seconds` (Retry-After, limite atingido) """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {_table()} AS bucket (key, tokens, updated_at, blocked_until)
+            VALUES (%(key)s, 0, clock_timestamp(), clock_timestamp() + make_interval(secs => %(seconds)s))
+            ON CONFLICT (key) DO UPDATE SET blocked_until = GREATEST(
+                bucket.blocked_until, clock_timestamp() + make_interval(secs => %(seconds)s)
+            )
+            """,
+            {'key': key, 'seconds': seconds},
+        )
+
+
+def drain(key):
+    """ Zera as fichas acumuladas: as próximas chamadas seguem só no ritmo `rate` """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {_table()} SET tokens = LEAST(tokens, 0), updated_at = clock_timestamp() WHERE key = %s",
+            [key],
+        )
@@ -0,0 +1,73 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+from django_tenants.test.cases import TenantTestCase
+
+from . import ratelimit
+from .models import Job, RateLimitBucket
+from .queue import backoff_delay, claim_jobs, job, run_job
+
+@job('tests.soma', max_attempts=2)
+def soma(a, b):
+    if a < 0:
+        raise ValueError("negativo")
+    return a + b
+
+
+class BackoffTests(SimpleTestCase):
+
+    def test_grows_exponentially_up_to_the_cap(self):
+        with mock.patch('jobs.queue.random.uniform', return_value=1):
+            self.assertEqual([backoff_delay(n) for n in (1, 2, 3)], [10, 20, 40])
+            self.assertEqual(backoff_delay(20), 3600)
+
+
+class JobQueueTests(TenantTestCase):
+
+    def test_runs_in_the_tenant_schema(self):
+        item = soma.enqueue(a=1, b=2)
+        self.assertEqual(item.schema_name, self.tenant.schema_name)
+
+        claimed = claim_jobs('test-worker', limit=5)
+        self.assertEqual([job.pk for job in claimed], [item.pk])
+        # Já reservado: outro worker não pega de novo
+        self.assertEqual(claim_jobs('outro-worker'), [])
+
+        run_job(claimed[0])
+        item.refresh_from_db()
+        self.assertEqual((item.status, item.result, item.attempts), ('succeeded', 3, 1))
+
+    def test_failures_are_retried_then_marked_failed(self):
+        item = soma.enqueue(a=-1, b=0)
+
+        run_job(claim_jobs('test-worker')[0])
+        item.refresh_from_db()
+        self.assertEqual(item.status, 'queued')
+        self.assertGreater(item.run_at, item.created_at)
+
+        Job.objects.filter(pk=item.pk).update(run_at=item.created_at)
+        run_job(claim_jobs('test-worker')[0])
+        item.refresh_from_db()
+        self.assertEqual(item.status, 'failed')
+        self.assertIn('ValueError: negativo', item.last_error)
+
+
+class RateLimitTests(TenantTestCase):
+
+    def test_bucket_allows_a_burst_then_paces_calls(self):
+        waits = [ratelimit.reserve('tests:api', rate=1, burst=2) for _ in range(4)]
+
+        self.assertEqual(waits[:2], [0, 0])
+        # Reservas seguintes esperam a vez, uma ficha por segundo
+        self.assertAlmostEqual(waits[2], 1, delta=0.2)
+        self.assertAlmostEqual(waits[3], 2, delta=0.2)
+
+    def test_block_and_refund_when_the_wait_is_too_long(self):
+        self.assertEqual(ratelimit.reserve('tests:api', rate=10, burst=5), 0)
+        ratelimit.block('tests:api', 30)
+
+        with self.assertRaises(ratelimit.RateLimitExceeded) as raised:
+            ratelimit.acquire('tests:api', rate=10, burst=5, max_wait=1)
+        self.assertGreater(raised.exception.wait, 25)
+        # A ficha reservada foi devolvida
+        self.assertAlmostEqual(RateLimitBucket.objects.get(key='tests:api').tokens, 4, delta=0.5)
@@ -0,0 +1,30 @@
+# jobs/views.py
+from django.contrib.auth.decorators import login_required
+from django.db import connection
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+
+from .models import Job
+
+
+def job_to_dict(item):
+    return {
+        'id': item.pk,
+        'name': item.name,
+        'status': item.status,
+        'attempts': item.attempts,
+        'max_attempts': item.max_attempts,
+        'run_at': item.run_at,
+        'created_at': item.created_at,
+        'finished_at': item.finished_at,
+        'result': item.result,
+        # Só a última linha do traceback (a mensagem do erro)
+        'error': item.last_error.strip().splitlines()[-1] if item.last_error else None,
+    }
+
+
+@login_required
+def job_status_api(request, pk):
+    """ Status de um job do tenant atual (para o front acompanhar por polling) """
+    item = get_object_or_404(Job, pk=pk, schema_name=connection.schema_name)
+    return JsonResponse({'status': 'success', 'job': job_to_dict(item)})
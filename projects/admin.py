@@ -1,7 +1,7 @@
 # projects/admin.py
 
 from django.contrib import admin
-from .models import Project, Task, Client, CalendarEvent, SocialAccount, SocialPost, SocialPostDestination
+from .models import Project, Task, Client, CalendarEvent, CalendarFeedToken, SocialAccount, SocialPost, SocialPostDestination
 
 # --- ADMIN INLINE ---
 class SocialPostDestinationInline(admin.TabularInline):
@@ -54,4 +54,10 @@ class SocialPostAdmin(admin.ModelAdmin):
 class SocialPostDestinationAdmin(admin.ModelAdmin):
     # CORREÇÃO: Usamos 'format_type' em vez de 'platform_type'
     list_display = ('post', 'account', 'format_type')
-    list_filter = ('format_type', 'account')
\ No newline at end of file
+    list_filter = ('format_type', 'account')
+
+@admin.register(CalendarFeedToken)
+class CalendarFeedTokenAdmin(admin.ModelAdmin):
+    list_display = ('label', 'client', 'is_active', 'created_by', 'created_at')
+    list_filter = ('is_active', 'client')
+    readonly_fields = ('token',)
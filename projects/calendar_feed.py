@@ -0,0 +1,227 @@
+# projects/calendar_feed.py
+"""
+Feed de eventos do calendário por intervalo de datas (semana, mês, trimestre).
+
+Lê a linha do tempo de conteúdo (projects/timeline.py): eventos do calendário
+e posts agendados, pelo índice de `scheduled_at`, com cliente e origem no
+mesmo SELECT. O ETag/Last-Modified sai de uma agregação barata (quantidade +
+maior updated_at do intervalo): se nada mudou, a view responde 304 sem montar
+o JSON e o navegador reaproveita o cache dele.
+
+O feed ICS (assinatura em apps de calendário, via CalendarFeedToken) usa as
+mesmas linhas e validadores, sai em streaming e cada VEVENT renderizado fica
+em cache pela chave (origem, updated_at): assinantes consultando a cada 15
+minutos custam um 304 ou, no máximo, leituras do cache. O UID vem só da origem
+(evento, ou post + destino), nunca do id da linha da linha do tempo.
+"""
+import datetime
+import hashlib
+from urllib.parse import quote
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from .models import ContentTimelineEntry
+
+# Maior intervalo aceito por requisição (um trimestre com folga)
+CALENDAR_FEED_MAX_DAYS = 100
+
+
+def parse_range(params):
+    """
+    (início, fim) a partir de ?start=AAAA-MM-DD&end=AAAA-MM-DD (fim exclusivo).
+    Aceita também o formato antigo ?year=&month=. ValueError se inválido.
+    """
+    if params.get('start') or params.get('end'):
+        start = datetime.date.fromisoformat(params.get('start', ''))
+        end = datetime.date.fromisoformat(params.get('end', ''))
+    else:
+        start = datetime.date(int(params.get('year', '')), int(params.get('month', '')), 1)
+        end = (start + datetime.timedelta(days=32)).replace(day=1)
+
+    if end <= start or (end - start).days > CALENDAR_FEED_MAX_DAYS:
+        raise ValueError("Intervalo inválido.")
+    return start, end
+
+
+def _start_of_day(day):
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+
+
+def calendar_entries(start, end):
+    return (
+        ContentTimelineEntry.objects
+        .filter(scheduled_at__gte=_start_of_day(start), scheduled_at__lt=_start_of_day(end))
+        .select_related('client', 'calendar_event', 'social_post')
+        .order_by('scheduled_at', 'id')
+    )
+
+
+def feed_validators(queryset):
+    """ (etag, last_modified) do intervalo numa query só. Exclusões mudam a contagem """
+    stats = queryset.order_by().aggregate(total=Count('id'), last_modified=Max('updated_at'))
+    last_modified = stats['last_modified']
+    stamp = f"{stats['total']}:{last_modified.isoformat() if last_modified else ''}"
+    return hashlib.md5(stamp.encode()).hexdigest(), last_modified
+
+
+def serialize_entry(entry):
+    client = entry.client
+    client_name = client.name if client else ''
+    if client and client.logo:
+        logo = client.logo.url
+    else:
+        logo = f"https://ui-avatars.com/api/?name={quote(client_name)}&background=random"
+
+    if entry.source == 'calendar':
+        media = entry.calendar_event.media
+        description = entry.calendar_event.caption or ''
+        item_id = entry.calendar_event_id
+    else:
+        media = entry.social_post.media_file
+        description = entry.social_post.caption
+        item_id = entry.social_post_id
+
+    moment = timezone.localtime(entry.scheduled_at)
+    return {
+        'id': item_id,
+        'source': entry.source,
+        'title': entry.title or client_name,  # Usa nome do cliente se título vazio
+        'date': moment.date().isoformat(),
+        'time': moment.strftime('%H:%M'),
+        'brandName': client_name,
+        'brandLogo': logo,
+        'platform': entry.platform,
+        'type': entry.format_type,
+        'status': entry.status,
+        'image': media.url if media else None,
+        'description': description,
+    }
+
+
+# --- FEED ICS ---
+ICS_PAST_DAYS = 30
+ICS_FUTURE_DAYS = 365
+ICS_CHUNK_SIZE = 200
+ICS_EVENT_TIMEOUT = 60 * 60 * 24
+ICS_EVENT_DURATION = 'PT30M'
+
+
+def ics_entries(feed_token):
+    """ Linhas do feed: janela de -30 a +365 dias, só do cliente do token (se houver) """
+    today = timezone.localdate()
+    start = today - datetime.timedelta(days=ICS_PAST_DAYS)
+    end = today + datetime.timedelta(days=ICS_FUTURE_DAYS)
+    entries = (
+        ContentTimelineEntry.objects
+        .filter(scheduled_at__gte=_start_of_day(start), scheduled_at__lt=_start_of_day(end))
+        .select_related('client', 'calendar_event', 'social_post')
+        .order_by('scheduled_at', 'id')
+    )
+    if feed_token.client_id:
+        entries = entries.filter(client_id=feed_token.client_id)
+    return entries
+
+
+def _ics_text(value):
+    """ Escape de TEXT (RFC 5545 3.3.11) """
+    return (
+        (value or '')
+        .replace('\\', '\\\\')
+        .replace(';', '\\;')
+        .replace(',', '\\,')
+        .replace('\r\n', '\\n')
+        .replace('\n', '\\n')
+    )
+
+
+def _ics_line(line):
+    """ Dobra em linhas de até 75 octetos (continuação começa com espaço) """
+    encoded = line.encode()
+    if len(encoded) <= 75:
+        return line + '\r\n'
+    parts, limit = [], 75
+    while encoded:
+        cut = min(limit, len(encoded))
+        # Não corta no meio de um caractere UTF-8
+        while cut < len(encoded) and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(encoded[:cut].decode())
+        encoded = encoded[cut:]
+        limit = 74
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def _ics_datetime(value):
+    return value.astimezone(datetime.timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def _source_key(entry):
+    """ Identidade estável do conteúdo: calendar-<evento> ou post-<post>-<destino> """
+    if entry.source == 'calendar':
+        return f"calendar-{entry.calendar_event_id}"
+    return f"post-{entry.social_post_id}-{entry.destination_id}"
+
+
+def render_vevent(entry):
+    data = serialize_entry(entry)
+    summary = f"[{entry.platform.title()}] {data['title']}" if entry.platform else data['title']
+    if data['brandName'] and data['brandName'] != data['title']:
+        summary = f"{summary} - {data['brandName']}"
+
+    lines = [
+        'BEGIN:VEVENT',
+        f"UID:{_source_key(entry)}@{connection.schema_name}",
+        f"DTSTAMP:{_ics_datetime(entry.updated_at)}",
+        f"DTSTART:{_ics_datetime(entry.scheduled_at)}",
+        f"DURATION:{ICS_EVENT_DURATION}",
+        f"SUMMARY:{_ics_text(summary)}",
+        f"DESCRIPTION:{_ics_text(data['description'])}",
+    ]
+    if entry.platform:
+        lines.append(f"CATEGORIES:{_ics_text(entry.platform)}")
+    lines.append('END:VEVENT')
+    return ''.join(_ics_line(line) for line in lines)
+
+
+def vevent_key(entry):
+    return f"ics-vevent:{connection.schema_name}:{_source_key(entry)}:{entry.updated_at.timestamp()}"
+
+
+def stream_ics(entries, calendar_name):
+    """
+    Gerador do VCALENDAR: cabeçalho, VEVENTs em blocos (lidos do cache em lote,
+    renderizados só os que faltam) e rodapé. Nada do feed fica inteiro em memória.
+    """
+    yield ''.join(_ics_line(line) for line in (
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        'PRODID:-//Workflow//Calendario de Conteudo//PT-BR',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        f"X-WR-CALNAME:{_ics_text(calendar_name)}",
+        'REFRESH-INTERVAL;VALUE=DURATION:PT15M',
+    ))
+
+    chunk = []
+    for entry in entries.iterator(chunk_size=ICS_CHUNK_SIZE):
+        chunk.append(entry)
+        if len(chunk) == ICS_CHUNK_SIZE:
+            yield _render_chunk(chunk)
+            chunk = []
+    if chunk:
+        yield _render_chunk(chunk)
+
+    yield _ics_line('END:VCALENDAR')
+
+
+def _render_chunk(entries):
+    keys = {vevent_key(entry): entry for entry in entries}
+    cached = cache.get_many(list(keys))
+    missing = {key: render_vevent(entry) for key, entry in keys.items() if key not in cached}
+    if missing:
+        cache.set_many(missing, ICS_EVENT_TIMEOUT)
+        cached.update(missing)
+    return ''.join(cached[key] for key in keys)
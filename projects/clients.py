@@ -0,0 +1,109 @@
+# projects/clients.py
+"""
+Listagens de clientes (lista de clientes e central de mídia) e o mapa
+cliente -> contas sociais usado no Estúdio de posts.
+
+Tudo o que o card/linha do cliente exibe vem anotado na mesma query, via
+subqueries correlacionadas (sem JOIN que multiplique linhas): plataformas
+conectadas, quantidade de pastas e projetos e espaço usado no storage.
+A página custa o mesmo número de queries com 10 ou 1000 clientes.
+"""
+import json
+
+from django.contrib.postgres.expressions import ArraySubquery
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import BigIntegerField, Count, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from .models import Client, MediaFile, MediaFolder, Project, SocialAccount
+
+CLIENT_LIST_ORDERING = ('name', 'id')
+CLIENT_LIST_PAGE_SIZE = 30
+
+
+def _per_client(queryset, client_field, aggregate):
+    """ Subquery com o agregado de `queryset` para o cliente da linha externa (0 se não houver) """
+    return Coalesce(
+        Subquery(
+            queryset
+            .filter(**{client_field: OuterRef('pk')})
+            .order_by()
+            .values(client_field)
+            .annotate(value=aggregate)
+            .values('value'),
+            output_field=BigIntegerField(),
+        ),
+        0,
+    )
+
+
+def client_listing_queryset(search=''):
+    """ Clientes com os dados da listagem anotados. `search` busca em nome, CNPJ e representante """
+    queryset = Client.objects.annotate(
+        account_platforms=ArraySubquery(
+            SocialAccount.objects
+            .filter(client=OuterRef('pk'))
+            .order_by('platform')
+            .values('platform')
+            .distinct()
+        ),
+        folder_count=_per_client(MediaFolder.objects.all(), 'client', Count('id')),
+        project_count=_per_client(Project.objects.all(), 'client', Count('id')),
+        storage_used=_per_client(MediaFile.objects.all(), 'folder__client', Sum('file_size')),
+    )
+
+    search = (search or '').strip()
+    if search:
+        queryset = queryset.filter(
+            Q(name__icontains=search)
+            | Q(cnpj__icontains=search)
+            | Q(nome_representante__icontains=search)
+        )
+    return queryset
+
+
+
+# --- MAPA CLIENTE -> CONTAS (Estúdio de posts) ---
+CLIENT_ACCOUNTS_TIMEOUT = 60 * 60
+
+
+def client_accounts_key(schema_name):
+    return f"client-accounts:{schema_name}"
+
+
+def invalidate_client_accounts(schema_name=None):
+    key = client_accounts_key(schema_name or connection.schema_name)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def build_client_accounts_map():
+    """
+    {client_id: {platform: {id, name, platform}}} de todos os clientes numa
+    query só (LEFT JOIN com as contas). Clientes sem conta ficam com {}.
+    """
+    clients_map = {}
+    rows = (
+        Client.objects
+        .order_by('id', 'social_accounts__id')
+        .values_list('id', 'social_accounts__id', 'social_accounts__account_name', 'social_accounts__platform')
+    )
+    for client_id, account_id, account_name, platform in rows:
+        accounts = clients_map.setdefault(client_id, {})
+        if account_id is not None:
+            accounts[platform] = {'id': account_id, 'name': account_name, 'platform': platform}
+    return clients_map
+
+
+def client_accounts_map_json(schema_name=None):
+    """
+    O mapa já serializado, pronto para embutir no template, com cache por
+    tenant. Os receivers em projects/models.py descartam o cache quando um
+    Client ou SocialAccount muda.
+    """
+    key = client_accounts_key(schema_name or connection.schema_name)
+    data = cache.get(key)
+    if data is None:
+        data = json.dumps(build_client_accounts_map())
+        cache.set(key, data, CLIENT_ACCOUNTS_TIMEOUT)
+    return data
@@ -0,0 +1,249 @@
+# projects/engagement.py
+"""
+Coleta de engajamento dos posts publicados (comando sync_engagement_metrics).
+
+1. `due_destinations`: destinos publicados nos últimos ENGAGEMENT_WINDOW cujos
+   números têm mais de ENGAGEMENT_REFRESH_AFTER (índice destination_metrics_idx).
+2. Agrupados por conta: cada conta vira uma tarefa no ThreadPoolExecutor, que
+   busca até 50 posts por chamada (Graph API ?ids=, LinkedIn BATCH_GET). As
+   threads só fazem HTTP e as consultas ao limitador de chamadas; a conexão
+   que isso abre na thread é fechada ao fim de cada tarefa.
+3. Limite por conta: no máximo ENGAGEMENT_MAX_CALLS_PER_ACCOUNT chamadas por
+   rodada, e a conta para quando a Meta avisa uso acima de
+   ENGAGEMENT_USAGE_CEILING% (X-App-Usage / X-Business-Use-Case-Usage), responde
+   limite atingido ou o limitador compartilhado (projects/http.py) não tem vaga.
+   O resto fica para a próxima rodada.
+4. `record_metrics`: bulk_update nos destinos e, com a soma por post, nos
+   SocialPost (likes_count, comments_count, ...), que o painel do cliente lê.
+   Cada coleta também vira um ponto no histórico (projects/metric_series.py).
+
+10.000 posts viram ~200 chamadas, não 10.000.
+"""
+import logging
+from datetime import timedelta
+
+import requests
+from django.db import transaction
+from django.db.models import F, Q, Sum
+from django.utils import timezone
+
+from . import http
+from .metric_series import downsample_snapshots_if_due, record_snapshots
+from .models import SocialPost, SocialPostDestination
+from .services import LinkedInService, MetaService
+from .stats import invalidate_client_metrics
+
+logger = logging.getLogger(__name__)
+
+ENGAGEMENT_BATCH_SIZE = 50  # máximo de ids por chamada na Graph API
+ENGAGEMENT_WINDOW = timedelta(days=30)
+ENGAGEMENT_REFRESH_AFTER = timedelta(hours=1)
+ENGAGEMENT_MAX_CALLS_PER_ACCOUNT = 20
+ENGAGEMENT_USAGE_CEILING = 80
+# Códigos de erro da Graph API para limite de chamadas
+META_RATE_LIMIT_CODES = {4, 17, 32, 613, 80001, 80002}
+
+METRIC_FIELDS = ('likes_count', 'comments_count', 'shares_count', 'views_count')
+
+
+def meta_usage(response):
+    """ Maior % de uso informado pela Meta nos cabeçalhos (0 se não vier) """
+    app, account, regain = http.platform_usage(response)
+    return max(app, account)
+
+
+def _meta_objects(job, ids, fields):
+    response = MetaService().get_objects(ids, job['access_token'], fields)
+    data = response.json() if response.content else {}
+    error = data.get('error') if isinstance(data, dict) else None
+    if response.status_code == 429 or (error and error.get('code') in META_RATE_LIMIT_CODES):
+        raise http.RateLimited(error.get('message', '') if error else 'HTTP 429')
+    if response.status_code >= 400:
+        # Um id inválido derruba a chamada inteira; o lote fica sem números desta vez
+        logger.warning("Engajamento Meta HTTP %s: %s", response.status_code, response.text[:500])
+        return {}, meta_usage(response)
+    return data, meta_usage(response)
+
+
+def _insights(item):
+    return {row['name']: (row.get('values') or [{}])[0].get('value', 0) for row in item.get('insights', {}).get('data', [])}
+
+
+def fetch_facebook(job, ids):
+    data, usage = _meta_objects(
+        job, ids,
+        'likes.summary(true).limit(0),comments.summary(true).limit(0),shares,insights.metric(post_impressions)',
+    )
+    metrics = {}
+    for external_id, item in data.items():
+        metrics[external_id] = {
+            'likes_count': item.get('likes', {}).get('summary', {}).get('total_count', 0),
+            'comments_count': item.get('comments', {}).get('summary', {}).get('total_count', 0),
+            'shares_count': item.get('shares', {}).get('count', 0),
+            'views_count': _insights(item).get('post_impressions', 0),
+        }
+    return metrics, usage
+
+
+def fetch_instagram(job, ids):
+    data, usage = _meta_objects(job, ids, 'like_count,comments_count,insights.metric(views,shares)')
+    metrics = {}
+    for external_id, item in data.items():
+        insights = _insights(item)
+        metrics[external_id] = {
+            'likes_count': item.get('like_count', 0),
+            'comments_count': item.get('comments_count', 0),
+            'shares_count': insights.get('shares', 0),
+            'views_count': insights.get('views', 0),
+        }
+    return metrics, usage
+
+
+def fetch_linkedin(job, ids):
+    response = LinkedInService().get_social_actions(job['access_token'], ids)
+    if response.status_code == 429:
+        raise http.RateLimited('HTTP 429')
+    if response.status_code >= 400:
+        logger.warning("Engajamento LinkedIn HTTP %s: %s", response.status_code, response.text[:500])
+        return {}, 0
+    metrics = {}
+    for urn, item in response.json().get('results', {}).items():
+        metrics[urn] = {
+            'likes_count': item.get('likesSummary', {}).get('totalLikes', 0),
+            'comments_count': item.get('commentsSummary', {}).get('aggregatedTotalComments', 0),
+            'shares_count': 0,
+            'views_count': 0,
+        }
+    return metrics, 0
+
+
+FETCHERS = {
+    'facebook': fetch_facebook,
+    'instagram': fetch_instagram,
+    'linkedin': fetch_linkedin,
+}
+
+
+def fetch_account(job):
+    """
+    Roda na thread do pool: HTTP e o limitador de chamadas. Busca os posts da
+    conta em lotes até acabar, atingir o teto de chamadas ou a rede pedir para parar.
+    Retorna (job, {external_id: números}, ids buscados, chamadas, limitada?)
+    """
+    try:
+        return _fetch_account(job)
+    finally:
+        http.close_thread_connection()
+
+
+def _fetch_account(job):
+    fetcher = FETCHERS[job['platform']]
+    metrics, fetched, calls = {}, [], 0
+    ids = job['external_ids']
+    for start in range(0, len(ids), ENGAGEMENT_BATCH_SIZE):
+        if calls >= ENGAGEMENT_MAX_CALLS_PER_ACCOUNT:
+            return job, metrics, fetched, calls, True
+        chunk = ids[start:start + ENGAGEMENT_BATCH_SIZE]
+        calls += 1
+        try:
+            chunk_metrics, usage = fetcher(job, chunk)
+        except http.RateLimited as e:
+            logger.info("Conta %s no limite da API: %s", job['account_id'], e)
+            return job, metrics, fetched, calls, True
+        except requests.RequestException as e:
+            logger.warning("Engajamento da conta %s: %s", job['account_id'], e)
+            return job, metrics, fetched, calls, False
+        except Exception:
+            logger.exception("Erro inesperado no engajamento da conta %s", job['account_id'])
+            return job, metrics, fetched, calls, False
+        metrics.update(chunk_metrics)
+        fetched.extend(chunk)
+        if usage >= ENGAGEMENT_USAGE_CEILING:
+            return job, metrics, fetched, calls, True
+    return job, metrics, fetched, calls, False
+
+
+def due_destinations(now=None):
+    now = now or timezone.now()
+    return (
+        SocialPostDestination.objects
+        .filter(status='published', published_at__gte=now - ENGAGEMENT_WINDOW, account__platform__in=FETCHERS)
+        .filter(Q(metrics_updated_at__isnull=True) | Q(metrics_updated_at__lt=now - ENGAGEMENT_REFRESH_AFTER))
+        .exclude(external_id='')
+        .select_related('account')
+        # Nunca coletados primeiro
+        .order_by(F('metrics_updated_at').asc(nulls_first=True), 'id')
+    )
+
+
+def build_jobs(destinations):
+    """ Um job por conta, com os external_id dos destinos dela """
+    jobs = {}
+    for destination in destinations:
+        account = destination.account
+        job = jobs.setdefault(account.pk, {
+            'account_id': account.pk,
+            'platform': account.platform,
+            'access_token': account.access_token,
+            'external_ids': [],
+        })
+        job['external_ids'].append(destination.external_id)
+    return list(jobs.values())
+
+
+def record_metrics(destinations, results):
+    """ Grava os números dos destinos buscados e refaz a soma dos posts deles """
+    now = timezone.now()
+    by_key = {(d.account_id, d.external_id): d for d in destinations}
+    changed = []
+    for job, metrics, fetched, calls, limited in results:
+        for external_id in fetched:
+            destination = by_key[(job['account_id'], external_id)]
+            # Post apagado na rede não volta na resposta: fica com os últimos números
+            for field, value in metrics.get(external_id, {}).items():
+                setattr(destination, field, value or 0)
+            destination.metrics_updated_at = now
+            changed.append(destination)
+    if not changed:
+        return 0
+
+    post_ids = {d.post_id for d in changed}
+    with transaction.atomic():
+        SocialPostDestination.objects.bulk_update(changed, [*METRIC_FIELDS, 'metrics_updated_at'], batch_size=500)
+        record_snapshots(changed, now)
+        totals = {
+            row.pop('post_id'): row
+            for row in (
+                SocialPostDestination.objects
+                .filter(post_id__in=post_ids, status='published')
+                .order_by()
+                .values('post_id')
+                .annotate(**{field: Sum(field) for field in METRIC_FIELDS})
+            )
+        }
+        posts = list(SocialPost.objects.filter(id__in=post_ids).only('id', 'client_id'))
+        for post in posts:
+            for field in METRIC_FIELDS:
+                setattr(post, field, totals.get(post.pk, {}).get(field) or 0)
+        # bulk_update não dispara os sinais: invalida o painel dos clientes aqui
+        SocialPost.objects.bulk_update(posts, METRIC_FIELDS, batch_size=500)
+        invalidate_client_metrics([post.client_id for post in posts])
+    return len(changed)
+
+
+def sync_engagement(executor, limit=None):
+    """
+    Uma rodada no tenant atual. Retorna {'destinations', 'calls', 'limited_accounts'}.
+    """
+    destinations = due_destinations()
+    if limit:
+        destinations = destinations[:limit]
+    destinations = list(destinations)
+    results = list(executor.map(fetch_account, build_jobs(destinations)))
+    recorded = record_metrics(destinations, results)
+    downsample_snapshots_if_due()
+    return {
+        'destinations': recorded,
+        'calls': sum(result[3] for result in results),
+        'limited_accounts': sum(1 for result in results if result[4]),
+    }
@@ -0,0 +1,202 @@
+# projects/events.py
+"""
+Eventos do Kanban em tempo real (task.created / task.moved / task.deleted / resync).
+
+Mudanças só de conteúdo do card (nomes copiados por Task.update_cards) e as
+operações em massa chegam como 'resync': o quadro busca o delta pela versão.
+
+As views publicam depois do commit (`publish_task_event`) e o stream SSE
+(`kanban_events_stream`, só sob ASGI) repassa para os quadros abertos.
+O canal é por tenant (schema) e por quadro (kanban_type).
+
+O broker é escolhido em settings.KANBAN_EVENT_BROKER:
+- InProcessBroker (padrão): filas em memória, serve para um único processo.
+- PostgresNotifyBroker: LISTEN/NOTIFY do Postgres, para vários workers/processos.
+"""
+import asyncio
+import json
+import logging
+import select
+import threading
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BROKER = 'projects.events.InProcessBroker'
+
+# Eventos acumulados por conexão antes de pedir ao cliente para ressincronizar
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+def channel_name(schema_name, kanban_type):
+    return f"kanban.{schema_name}.{kanban_type}"
+
+
+class InProcessBroker:
+    """
+    Entrega em memória para as conexões SSE deste processo.
+    `publish` pode ser chamado de qualquer thread (views síncronas rodam em
+    threads sob ASGI): a entrega vai para o event loop de cada assinante.
+    """
+
+    def __init__(self):
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def publish(self, channel, message):
+        self.deliver(channel, message)
+
+    def deliver(self, channel, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(_put_or_resync, queue, message)
+            except RuntimeError:
+                # Loop já encerrado: a conexão caiu sem chamar `unsubscribe`
+                pass
+
+    def subscribe(self, channel):
+        """ Registra uma conexão no canal (chamar dentro do event loop). Retorna a fila dela """
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, channel, queue):
+        with self._lock:
+            subscribers = self._subscribers.get(channel, set())
+            subscribers.difference_update({sub for sub in subscribers if sub[1] is queue})
+            if not subscribers:
+                self._subscribers.pop(channel, None)
+
+
+def _put_or_resync(queue, message):
+    try:
+        queue.put_nowait(message)
+    except asyncio.QueueFull:
+        # Cliente lento: descarta o acumulado e manda ele buscar o delta na API de mudanças
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait({'type': 'resync'})
+
+
+class PostgresNotifyBroker(InProcessBroker):
+    """
+    Publica com NOTIFY na conexão do Django e escuta com uma única conexão
+    LISTEN por processo (thread dedicada), repassando para os assinantes locais.
+    Payload do NOTIFY é limitado a ~8 KB: cards grandes viram 'resync'.
+    """
+    pg_channel = 'kanban_events'
+    max_payload = 7900
+
+    def __init__(self):
+        super().__init__()
+        self._listener = None
+
+    def publish(self, channel, message):
+        payload = json.dumps({'channel': channel, 'message': message}, cls=DjangoJSONEncoder)
+        if len(payload.encode()) > self.max_payload:
+            payload = json.dumps({'channel': channel, 'message': {'type': 'resync'}})
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", [self.pg_channel, payload])
+
+    def subscribe(self, channel):
+        self._start_listener()
+        return super().subscribe(channel)
+
+    def _start_listener(self):
+        with self._lock:
+            if self._listener and self._listener.is_alive():
+                return
+            self._listener = threading.Thread(target=self._listen, name='kanban-events-listener', daemon=True)
+            self._listener.start()
+
+    def _listen(self):
+        import psycopg2
+        import psycopg2.extensions
+
+        db = settings.DATABASES['default']
+        while True:
+            try:
+                conn = psycopg2.connect(
+                    dbname=db['NAME'], user=db['USER'], password=db['PASSWORD'],
+                    host=db['HOST'], port=db['PORT'],
+                )
+                conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                with conn.cursor() as cursor:
+                    cursor.execute(f'LISTEN "{self.pg_channel}"')
+
+                while True:
+                    if select.select([conn], [], [], 30) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        data = json.loads(notify.payload)
+                        self.deliver(data['channel'], data['message'])
+            except Exception as e:
+                logger.warning("Listener de eventos do Kanban caiu, reconectando: %s", e)
+                threading.Event().wait(5)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            _broker = import_string(getattr(settings, 'KANBAN_EVENT_BROKER', DEFAULT_BROKER))()
+        return _broker
+
+
+def publish_task_event(event_type, task, task_id=None):
+    """
+    Publica o evento do card depois do commit (rollback = nada publicado).
+    `task.board_version` vai junto: o cliente usa como ponto do sync incremental.
+    Em 'task.deleted' passe `task_id`, já que o delete() zera o pk da instância.
+    """
+    if event_type == 'task.deleted':
+        card = {'id': task_id or task.pk, 'status': task.status}
+    else:
+        card = task.to_dict()
+    message = {'type': event_type, 'version': task.board_version, 'task': card}
+    channel = channel_name(connection.schema_name, task.kanban_type)
+
+    def send():
+        try:
+            get_broker().publish(channel, message)
+        except Exception as e:
+            # Falha no push não pode derrubar a requisição: o polling cobre
+            logger.warning("Falha ao publicar evento do Kanban: %s", e)
+
+    transaction.on_commit(send)
+
+
+def publish_board_resync(kanban_type):
+    """ Depois de uma mudança em massa: os quadros abertos buscam o delta de uma vez """
+    channel = channel_name(connection.schema_name, kanban_type)
+
+    def send():
+        try:
+            get_broker().publish(channel, {'type': 'resync'})
+        except Exception as e:
+            logger.warning("Falha ao publicar evento do Kanban: %s", e)
+
+    transaction.on_commit(send)
+
+
+def format_sse(message):
+    """ Mensagem do broker -> bloco de texto do protocolo Server-Sent Events """
+    lines = []
+    if message.get('version'):
+        lines.append(f"id: {message['version']}")
+    lines.append(f"event: {message['type']}")
+    lines.append(f"data: {json.dumps(message, cls=DjangoJSONEncoder)}")
+    return '\n'.join(lines) + '\n\n'
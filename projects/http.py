@@ -0,0 +1,296 @@
+# projects/http.py
+"""
+Cliente HTTP único do processo para as APIs das redes (Meta, LinkedIn, TikTok).
+
+- Uma `requests.Session` por processo (recriada após fork): pool de conexões
+  por host com keep-alive, sem handshake TCP/TLS a cada chamada.
+- Timeout sempre definido (conexão, leitura): uma Graph API lenta não prende
+  mais o worker do gunicorn por minutos.
+- Novas tentativas com backoff exponencial e jitter em 429/5xx e erros de
+  conexão, respeitando o Retry-After. Só métodos idempotentes repetem em 5xx;
+  POST repete apenas quando a requisição certamente não foi processada
+  (429 ou timeout ao conectar), para não duplicar posts.
+- Latência por endpoint: log 'projects.http' e contadores no processo
+  (`endpoint_stats`).
+- Limite de chamadas entre processos (`rate_limit=(plataforma, token)`): um
+  balde do app e um por conta/token em jobs/ratelimit.py. Retry-After e os
+  cabeçalhos de uso da Meta (X-App-Usage, X-Business-Use-Case-Usage) freiam
+  todos os processos antes de a API começar a recusar. Comandos esperam até
+  HTTP_RATE_LIMIT_MAX_WAIT por uma vaga; as views usam `rate_limit_wait(0)`.
+
+Uso:
+
+    from . import http
+    response = http.get(url, params=..., endpoint='meta.accounts', rate_limit=('meta', token))
+"""
+import contextvars
+import hashlib
+import json
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from django.db import connection
+from requests import RequestException  # reexportado para quem usa este módulo
+from requests.adapters import HTTPAdapter
+
+from jobs import ratelimit
+
+logger = logging.getLogger(__name__)
+
+HTTP_CONNECT_TIMEOUT = getattr(settings, 'HTTP_CONNECT_TIMEOUT', 5)
+HTTP_READ_TIMEOUT = getattr(settings, 'HTTP_READ_TIMEOUT', 20)
+HTTP_RETRIES = getattr(settings, 'HTTP_RETRIES', 3)
+HTTP_RETRY_BASE = getattr(settings, 'HTTP_RETRY_BASE', 0.5)
+# Esperas maiores que isso (inclusive Retry-After) não valem segurar a requisição
+HTTP_RETRY_MAX_DELAY = getattr(settings, 'HTTP_RETRY_MAX_DELAY', 8)
+HTTP_POOL_MAXSIZE = getattr(settings, 'HTTP_POOL_MAXSIZE', 32)
+HTTP_SLOW_REQUEST = getattr(settings, 'HTTP_SLOW_REQUEST', 5)
+
+# Fichas por segundo e rajada: do app inteiro e de cada conta (token)
+HTTP_RATE_LIMITS = getattr(settings, 'HTTP_RATE_LIMITS', {
+    'meta': {'app': (20, 40), 'account': (2, 20)},
+    'linkedin': {'app': (5, 20), 'account': (1, 10)},
+    'tiktok': {'app': (5, 20), 'account': (0.5, 6)},
+    'youtube': {'app': (5, 20), 'account': (1, 10)},
+})
+# Espera máxima por uma vaga antes de desistir (RateLimited); nas views, rate_limit_wait(0)
+HTTP_RATE_LIMIT_MAX_WAIT = getattr(settings, 'HTTP_RATE_LIMIT_MAX_WAIT', 10)
+# % de uso informado pela API: acima de DRAIN, sem rajadas; acima de BLOCK, pausa
+HTTP_USAGE_DRAIN = 75
+HTTP_USAGE_BLOCK = 95
+HTTP_USAGE_BLOCK_SECONDS = 60
+# 429 sem Retry-After
+HTTP_DEFAULT_BLOCK_SECONDS = 30
+
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'})
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+_rate_limit_wait = contextvars.ContextVar('http_rate_limit_wait', default=None)
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def get_session():
+    """ Session compartilhada do processo (pool por host, keep-alive) """
+    global _session, _session_pid
+    if _session is None or _session_pid != os.getpid():
+        with _session_lock:
+            if _session is None or _session_pid != os.getpid():
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=16, pool_maxsize=HTTP_POOL_MAXSIZE, max_retries=0)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _session, _session_pid = session, os.getpid()
+    return _session
+
+
+def retry_delay(attempt, response=None):
+    """ Segundos antes da tentativa `attempt + 1`: Retry-After (se vier) ou exponencial com jitter """
+    delay = HTTP_RETRY_BASE * 2 ** (attempt - 1) * random.uniform(0.5, 1.5)
+    if response is not None:
+        try:
+            delay = max(delay, float(response.headers.get('Retry-After', 0)))
+        except ValueError:
+            pass  # Retry-After em formato de data: fica o backoff
+    return delay
+
+
+def _endpoint_name(method, url):
+    return f"{method} {urlsplit(url).netloc}"
+
+
+def _record(endpoint, elapsed, status, retries):
+    with _stats_lock:
+        stats = _stats.setdefault(endpoint, {'count': 0, 'errors': 0, 'retries': 0, 'total_seconds': 0.0, 'max_seconds': 0.0})
+        stats['count'] += 1
+        stats['retries'] += retries
+        stats['total_seconds'] += elapsed
+        stats['max_seconds'] = max(stats['max_seconds'], elapsed)
+        if status is None or status >= 400:
+            stats['errors'] += 1
+
+    level = logging.WARNING if elapsed >= HTTP_SLOW_REQUEST else logging.DEBUG
+    logger.log(level, "http endpoint=%s status=%s elapsed_ms=%.0f retries=%s", endpoint, status, elapsed * 1000, retries)
+
+
+def endpoint_stats():
+    """ Cópia dos contadores deste processo, com a latência média por endpoint """
+    with _stats_lock:
+        return {
+            endpoint: dict(stats, avg_seconds=stats['total_seconds'] / stats['count'])
+            for endpoint, stats in _stats.items()
+        }
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+class RateLimited(RequestException):
+    """ Sem vaga no limite da plataforma dentro de HTTP_RATE_LIMIT_MAX_WAIT (tentar mais tarde) """
+
+
+def rate_limit_keys(platform, access_token=None):
+    """ [(chave, taxa, rajada)] do app e, com token, da conta (o token não vai para o banco) """
+    limits = HTTP_RATE_LIMITS[platform]
+    keys = [(platform, *limits['app'])]
+    if access_token:
+        digest = hashlib.sha1(access_token.encode()).hexdigest()[:16]
+        keys.append((f"{platform}:{digest}", *limits['account']))
+    return keys
+
+
+def platform_usage(response):
+    """
+    (% de uso do app, % de uso da conta, segundos até liberar) dos cabeçalhos da
+    Meta. Zeros se não vierem (LinkedIn/TikTok só mandam Retry-After).
+    """
+    app, account, regain = 0, 0, 0
+    try:
+        app_usage = response.headers.get('X-App-Usage')
+        if app_usage:
+            app = max(json.loads(app_usage).values(), default=0)
+        business_usage = response.headers.get('X-Business-Use-Case-Usage')
+        if business_usage:
+            for entries in json.loads(business_usage).values():
+                for entry in entries:
+                    account = max(account, *(entry.get(k, 0) for k in ('call_count', 'total_time', 'total_cputime')))
+                    regain = max(regain, entry.get('estimated_time_to_regain_access', 0) * 60)
+    except (ValueError, AttributeError, TypeError):
+        pass  # cabeçalho fora do formato: ignora
+    return app, account, regain
+
+
+@contextmanager
+def rate_limit_wait(seconds):
+    """
+    Espera máxima por vaga no limite dentro do bloco (também serve de decorator).
+    Views usam 0: sem vaga, RateLimited na hora em vez de segurar o worker do gunicorn.
+    """
+    token = _rate_limit_wait.set(seconds)
+    try:
+        yield
+    finally:
+        _rate_limit_wait.reset(token)
+
+
+def close_thread_connection():
+    """
+    Fim de tarefa numa thread de pool: fecha a conexão que o limitador abriu
+    nela, senão cada thread segura uma conexão do Postgres até o processo sair.
+    Dentro de transação (chamada direta na thread principal) não mexe.
+    """
+    if not connection.in_atomic_block:
+        connection.close()
+
+
+def _acquire(keys):
+    max_wait = _rate_limit_wait.get()
+    if max_wait is None:
+        max_wait = HTTP_RATE_LIMIT_MAX_WAIT
+    acquired = []
+    for key, rate, burst in keys:
+        try:
+            ratelimit.acquire(key, rate, burst, max_wait=max_wait)
+        except ratelimit.RateLimitExceeded as e:
+            # Chamada recusada: devolve as fichas já reservadas (ex.: a do app),
+            # senão cada recusa de uma conta gasta o limite de todas
+            for acquired_key, acquired_burst in acquired:
+                ratelimit.refund(acquired_key, acquired_burst)
+            raise RateLimited(str(e)) from e
+        acquired.append((key, burst))
+
+
+def _observe(keys, response):
+    """ Repassa o que a API disse sobre o limite para os baldes (vale para todos os processos) """
+    app_key = keys[0][0]
+    account_key = keys[-1][0]
+    app, account, regain = platform_usage(response)
+
+    if response.status_code == 429 or response.headers.get('Retry-After'):
+        try:
+            seconds = float(response.headers.get('Retry-After', HTTP_DEFAULT_BLOCK_SECONDS))
+        except ValueError:
+            seconds = HTTP_DEFAULT_BLOCK_SECONDS
+        ratelimit.block(account_key, seconds)
+    if regain:
+        ratelimit.block(account_key, regain)
+
+    for key, usage in ((app_key, app), (account_key, account)):
+        if usage >= HTTP_USAGE_BLOCK:
+            logger.warning("Uso de %s em %s%%: pausando %ss", key, usage, HTTP_USAGE_BLOCK_SECONDS)
+            ratelimit.block(key, HTTP_USAGE_BLOCK_SECONDS)
+        elif usage >= HTTP_USAGE_DRAIN:
+            ratelimit.drain(key)
+
+
+def request(method, url, endpoint=None, timeout=None, retries=None, rate_limit=None, **kwargs):
+    """
+    Requisição pela Session compartilhada. Devolve a última resposta (mesmo 4xx/5xx,
+    como o `requests`) ou levanta `requests.RequestException` se nenhuma chegou.
+    `timeout`: segundos de leitura ou (conexão, leitura).
+    `rate_limit`: (plataforma, token da conta ou None); RateLimited se não houver vaga
+    em HTTP_RATE_LIMIT_MAX_WAIT (ou no tempo de `rate_limit_wait`).
+    """
+    method = method.upper()
+    endpoint = endpoint or _endpoint_name(method, url)
+    if timeout is None:
+        timeout = HTTP_READ_TIMEOUT
+    if not isinstance(timeout, tuple):
+        timeout = (HTTP_CONNECT_TIMEOUT, timeout)
+    if retries is None:
+        retries = HTTP_RETRIES
+    idempotent = method in IDEMPOTENT_METHODS
+    keys = rate_limit_keys(*rate_limit) if rate_limit else None
+
+    session = get_session()
+    attempt = 0
+    started = time.monotonic()
+    while True:
+        attempt += 1
+        if keys:
+            _acquire(keys)
+        try:
+            response = session.request(method, url, timeout=timeout, **kwargs)
+        except requests.RequestException as e:
+            # Timeout ao conectar: a requisição não saiu, seguro repetir até POST
+            can_retry = idempotent or isinstance(e, requests.ConnectTimeout)
+            if attempt > retries or not can_retry:
+                _record(endpoint, time.monotonic() - started, None, attempt - 1)
+                raise
+            delay = retry_delay(attempt)
+        else:
+            if keys:
+                _observe(keys, response)
+            can_retry = response.status_code in RETRY_STATUSES and (idempotent or response.status_code == 429)
+            if attempt > retries or not can_retry:
+                _record(endpoint, time.monotonic() - started, response.status_code, attempt - 1)
+                return response
+            delay = retry_delay(attempt, response)
+            if delay > HTTP_RETRY_MAX_DELAY:
+                _record(endpoint, time.monotonic() - started, response.status_code, attempt - 1)
+                return response
+            response.close()
+
+        time.sleep(min(delay, HTTP_RETRY_MAX_DELAY))
+
+
+def get(url, **kwargs):
+    return request('GET', url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request('POST', url, **kwargs)
@@ -0,0 +1,351 @@
+# projects/kanban.py
+import json
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Case, CharField, Count, F, Value, When, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from .events import publish_board_resync
+from .stats import invalidate_client_metrics, invalidate_dashboard_stats, task_client_ids
+from .models import KanbanBoardVersion, KanbanTombstone, Task, bulk_card_writes, user_initials
+from .pagination import KeysetPaginator, encode_cursor
+from .ranking import rank_between, spread_ranks
+
+# Acima desse tamanho de chave a coluna entra no rebalanceamento periódico
+RANK_REBALANCE_LENGTH = 12
+
+# Cards por coluna na carga inicial e em cada página da API de coluna
+KANBAN_PAGE_SIZE = 50
+KANBAN_MAX_PAGE_SIZE = 200
+CARD_ORDERING = ('rank', 'id')
+
+# Acima disso o cliente recarrega o quadro em vez de aplicar o delta
+KANBAN_MAX_CHANGES = 500
+
+# Operações em massa (kanban_bulk_api) e máximo de cards por chamada
+BULK_OPERATIONS = ('move', 'reassign', 'priority', 'delete', 'archive')
+KANBAN_BULK_LIMIT = 500
+
+# Snapshot do quadro pronto (dict + JSON) compartilhado entre os usuários do tenant
+KANBAN_SNAPSHOT_TIMEOUT = 60 * 10
+
+# --- COLUNAS DE CADA QUADRO ---
+KANBAN_STAGES = {
+    'general': [
+        ('todo', 'A Fazer'),
+        ('doing', 'Em Andamento'),
+        ('done', 'Concluído'),
+    ],
+    'operational': [
+        ('briefing', 'Briefing'),
+        ('copy', 'Copy'),
+        ('design', 'Design'),
+        ('internal_approval', 'Aprovação Interna'),
+        ('client_approval', 'Aprovação Cliente'),
+        ('scheduling', 'Agendamento'),
+        ('published', 'Publicado'),
+    ],
+}
+
+
+class KanbanBoardService:
+    """
+    Monta o quadro Kanban inteiro em uma única passada.
+
+    Uma query só, sem JOINs (os nomes exibidos no card ficam copiados no
+    próprio Task, ver Task.refresh_card_fields), agrupamento por status
+    em Python e serialização de cada card uma única vez. O número de queries
+    não depende da quantidade de cards no quadro.
+
+    Com `page_size`, cada coluna traz só os primeiros cards (ainda na mesma
+    query, via ROW_NUMBER() por status) e o resto é carregado pela API de
+    coluna a partir de `cursors`.
+
+    `version` guarda a versão do quadro lida antes dos cards: o cliente
+    usa esse número como ponto de partida do sync incremental (`changes`).
+    """
+
+    def __init__(self, kanban_type='general', page_size=None):
+        self.kanban_type = kanban_type
+        self.stages = KANBAN_STAGES.get(kanban_type, KANBAN_STAGES['general'])
+        self.page_size = page_size
+        self.cursors = {}
+        self.totals = {}
+        self.version = 0
+
+    def get_queryset(self):
+        return (
+            Task.objects
+            .filter(kanban_type=self.kanban_type, status__in=[key for key, _ in self.stages], archived_at__isnull=True)
+            .order_by(*CARD_ORDERING)
+        )
+
+    def build(self):
+        """ Retorna {status: [card, ...]} com as colunas na ordem do quadro """
+        board = {key: [] for key, _ in self.stages}
+        self.cursors = {key: None for key, _ in self.stages}
+        self.totals = {key: 0 for key, _ in self.stages}
+        # Lida antes dos cards: uma mudança concorrente aparece de novo no próximo sync
+        self.version, _ = KanbanBoardVersion.current(self.kanban_type)
+
+        queryset = self.get_queryset()
+        if self.page_size:
+            queryset = queryset.annotate(
+                column_position=Window(
+                    RowNumber(),
+                    partition_by=[F('status')],
+                    order_by=[F(field).asc() for field in CARD_ORDERING],
+                ),
+                column_total=Window(Count('id'), partition_by=[F('status')]),
+            ).filter(column_position__lte=self.page_size)
+
+        last_task = {}
+        for task in queryset:
+            board[task.status].append(task.to_dict())
+            self.totals[task.status] = getattr(task, 'column_total', len(board[task.status]))
+            last_task[task.status] = task
+
+        # Coluna com mais cards do que os carregados: o cursor aponta para o último
+        for status, task in last_task.items():
+            if self.totals[status] > len(board[status]):
+                self.cursors[status] = encode_cursor(getattr(task, field) for field in CARD_ORDERING)
+        return board
+
+    def snapshot(self):
+        """
+        Quadro já serializado, do cache quando a versão não mudou.
+        Quem abre o mesmo quadro depois paga só a leitura da versão: com 20
+        pessoas no quadro, o build (e o json.dumps) roda uma vez por mudança.
+        """
+        key = board_snapshot_key(connection.schema_name, self.kanban_type)
+        version, _ = KanbanBoardVersion.current(self.kanban_type)
+
+        snapshot = cache.get(key)
+        if snapshot and snapshot['version'] == version and snapshot['page_size'] == self.page_size:
+            self.version = snapshot['version']
+            self.cursors = snapshot['cursors']
+            self.totals = snapshot['totals']
+            return snapshot
+
+        board = self.build()
+        snapshot = {
+            'version': self.version,
+            'page_size': self.page_size,
+            'board': board,
+            'board_json': json.dumps(board),
+            'cursors': self.cursors,
+            'cursors_json': json.dumps(self.cursors),
+            'totals': self.totals,
+        }
+        cache.set(key, snapshot, KANBAN_SNAPSHOT_TIMEOUT)
+        return snapshot
+
+    def column_page(self, status, cursor=None, page_size=KANBAN_PAGE_SIZE):
+        """ Próxima página de uma coluna: (cards, próximo_cursor) """
+        queryset = self.get_queryset().filter(status=status)
+        paginator = KeysetPaginator(queryset, CARD_ORDERING, page_size)
+        tasks, next_cursor = paginator.get_page(cursor)
+        return [task.to_dict() for task in tasks], next_cursor
+
+    def changes(self, since):
+        """
+        Delta do quadro desde a versão `since`.
+        Retorna None quando nada mudou, ou um dict com a versão atual, os cards
+        alterados e os ids excluídos. `reset` = o cliente deve recarregar o quadro.
+        """
+        version, pruned_through = KanbanBoardVersion.current(self.kanban_type)
+        if since >= version:
+            return None
+        if since < pruned_through:
+            return {'version': version, 'reset': True}
+
+        changed = list(
+            self.get_queryset()
+            .filter(board_version__gt=since)
+            .order_by('board_version')[:KANBAN_MAX_CHANGES + 1]
+        )
+        if len(changed) > KANBAN_MAX_CHANGES:
+            return {'version': version, 'reset': True}
+
+        deleted = KanbanTombstone.objects.filter(
+            kanban_type=self.kanban_type, board_version__gt=since
+        ).values_list('task_id', flat=True)
+
+        return {
+            'version': version,
+            'reset': False,
+            'changed': [task.to_dict() for task in changed],
+            'deleted': list(deleted),
+        }
+
+
+def board_snapshot_key(schema_name, kanban_type):
+    return f"kanban-board:{schema_name}:{kanban_type}"
+
+
+def invalidate_board_snapshot(kanban_type, schema_name=None):
+    """ Descarta o snapshot depois do commit (antes disso os outros ainda leem o estado antigo) """
+    key = board_snapshot_key(schema_name or connection.schema_name, kanban_type)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def move_task(task, status, prev_id=None, next_id=None):
+    """
+    Move o card para `status`, entre os cards `prev_id` e `next_id` da coluna
+    de destino (None = ponta da coluna). Só a linha do card movido é gravada.
+    """
+    neighbour_ids = [int(pk) for pk in (prev_id, next_id) if pk and int(pk) != task.pk]
+    max_length = Task._meta.get_field('rank').max_length
+
+    def neighbour_rank():
+        ranks = dict(Task.objects.filter(id__in=neighbour_ids).values_list('id', 'rank'))
+        rank = rank_between(
+            ranks.get(int(prev_id)) if prev_id else None,
+            ranks.get(int(next_id)) if next_id else None,
+        )
+        # Inserções repetidas no mesmo vão alongam a chave até estourar a coluna
+        if len(rank) > max_length:
+            raise ValueError("Chave longa demais.")
+        return rank
+
+    try:
+        new_rank = neighbour_rank()
+    except ValueError:
+        # Vizinhos com a mesma chave (dados antigos), fora de ordem ou chave
+        # longa demais: rebalanceia a coluna e tenta de novo, senão vai para o fim.
+        rebalance_column(task.kanban_type, status)
+        try:
+            new_rank = neighbour_rank()
+        except ValueError:
+            new_rank = Task.rank_for_column_end(task.kanban_type, status)
+
+    task.status = status
+    task.rank = new_rank
+    task.save(update_fields=['status', 'rank', 'updated_at'])
+    return task
+
+
+def neighbours_from_order_list(order_list, task_id):
+    """ Converte a lista completa da coluna (formato antigo do JS) em vizinhos """
+    order_list = [str(pk) for pk in order_list]
+    try:
+        index = order_list.index(str(task_id))
+    except ValueError:
+        return None, None
+    prev_id = order_list[index - 1] if index > 0 else None
+    next_id = order_list[index + 1] if index + 1 < len(order_list) else None
+    return prev_id, next_id
+
+
+def rebalance_column(kanban_type, status):
+    """ Reescreve as chaves da coluna com valores curtos e igualmente espaçados """
+    with transaction.atomic():
+        tasks = list(
+            Task.objects
+            .select_for_update()
+            .filter(kanban_type=kanban_type, status=status)
+            .order_by('rank', 'id')
+            .only('id', 'rank')
+        )
+        if not tasks:
+            return 0
+        # Todas as chaves mudam: os clientes recebem a coluna inteira no próximo sync
+        version = KanbanBoardVersion.bump(kanban_type)
+        for task, rank in zip(tasks, spread_ranks(len(tasks))):
+            task.rank = rank
+            task.board_version = version
+        Task.objects.bulk_update(tasks, ['rank', 'board_version'], batch_size=500)
+        # bulk_update não dispara post_save
+        invalidate_board_snapshot(kanban_type)
+    return len(tasks)
+
+
+def apply_bulk_operation(task_ids, operation, value=None):
+    """
+    Aplica uma operação a vários cards numa transação só, com um UPDATE/DELETE
+    por quadro (não por card). Para 'reassign', `value` é o usuário (ou None).
+    Retorna {task_id: 'ok' | 'not_found' | 'invalid_status'}.
+    """
+    if operation not in BULK_OPERATIONS:
+        raise ValueError("Operação inválida.")
+    if operation == 'priority' and value not in dict(Task.PRIORITY_CHOICES):
+        raise ValueError("Prioridade inválida.")
+
+    task_ids = list(dict.fromkeys(int(pk) for pk in task_ids))
+    if len(task_ids) > KANBAN_BULK_LIMIT:
+        raise ValueError(f"Máximo de {KANBAN_BULK_LIMIT} cards por operação.")
+
+    results = {pk: 'not_found' for pk in task_ids}
+    now = timezone.now()
+
+    with transaction.atomic(), bulk_card_writes():
+        rows = (
+            Task.objects
+            .select_for_update()
+            .filter(id__in=task_ids, archived_at__isnull=True)
+            .order_by('kanban_type', 'status', 'rank', 'id')
+            .values_list('id', 'kanban_type')
+        )
+        boards = defaultdict(list)
+        for pk, kanban_type in rows:
+            boards[kanban_type].append(pk)
+
+        # Mudam as contagens por status dos clientes (lido antes do DELETE)
+        found_ids = [pk for ids in boards.values() for pk in ids]
+        client_ids = task_client_ids(found_ids) if operation in ('move', 'delete') and found_ids else ()
+
+        for kanban_type, ids in boards.items():
+            queryset = Task.objects.filter(id__in=ids)
+
+            if operation == 'move':
+                if value not in dict(KANBAN_STAGES.get(kanban_type, ())):
+                    results.update(dict.fromkeys(ids, 'invalid_status'))
+                    continue
+                # Entram no fim da coluna, mantendo a ordem atual entre eles
+                rank = Task.rank_for_column_end(kanban_type, value)
+                ranks = []
+                for pk in ids:
+                    ranks.append(When(id=pk, then=Value(rank)))
+                    rank = rank_between(rank, None)
+                Task.update_cards(queryset, status=value, rank=Case(*ranks, output_field=CharField()), updated_at=now)
+
+            elif operation == 'reassign':
+                Task.update_cards(
+                    queryset,
+                    assigned_to=value,
+                    assigned_to_username=value.username if value else '',
+                    assigned_to_initials=user_initials(value) if value else '',
+                    updated_at=now,
+                )
+
+            elif operation == 'priority':
+                Task.update_cards(queryset, priority=value, updated_at=now)
+
+            elif operation == 'archive':
+                Task.update_cards(queryset, archived_at=now, updated_at=now)
+                record_tombstones(kanban_type, ids)
+
+            elif operation == 'delete':
+                queryset.delete()
+                record_tombstones(kanban_type, ids)
+
+            results.update(dict.fromkeys(ids, 'ok'))
+            invalidate_board_snapshot(kanban_type)
+            publish_board_resync(kanban_type)
+
+        if boards:
+            invalidate_dashboard_stats()
+            invalidate_client_metrics(client_ids)
+
+    return results
+
+
+def record_tombstones(kanban_type, task_ids):
+    """ Cards que saíram do quadro (excluídos/arquivados), com uma única versão nova """
+    version = KanbanBoardVersion.bump(kanban_type)
+    KanbanTombstone.objects.bulk_create([
+        KanbanTombstone(task_id=pk, kanban_type=kanban_type, board_version=version) for pk in task_ids
+    ])
@@ -0,0 +1,73 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Max
+from django.db.models.functions import Length
+from django.utils import timezone
+from django_tenants.utils import get_public_schema_name, get_tenant_model, schema_context
+
+from projects.kanban import RANK_REBALANCE_LENGTH, rebalance_column
+from projects.models import KanbanBoardVersion, KanbanTombstone, Task
+
+
+class Command(BaseCommand):
+    help = 'Rebalanceia as chaves de ordenação do Kanban (rodar periodicamente via cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-length', type=int, default=RANK_REBALANCE_LENGTH,
+                            help='Rebalanceia colunas com chaves maiores que isso')
+        parser.add_argument('--force', action='store_true', help='Rebalanceia todas as colunas')
+        parser.add_argument('--tombstone-days', type=int, default=7,
+                            help='Apaga registros de cards excluídos mais antigos que isso')
+
+    def handle(self, *args, **options):
+        tenants = get_tenant_model().objects.exclude(schema_name=get_public_schema_name())
+
+        for tenant in tenants:
+            with schema_context(tenant.schema_name):
+                columns = (
+                    Task.objects
+                    .order_by()
+                    .values('kanban_type', 'status')
+                    .annotate(
+                        longest=Max(Length('rank')),
+                        total=Count('id'),
+                        distinct_ranks=Count('rank', distinct=True),
+                    )
+                )
+
+                for column in columns:
+                    # Chaves longas demais ou repetidas (cards criados fora do fluxo normal)
+                    needs_rebalance = (
+                        options['force']
+                        or column['longest'] > options['max_length']
+                        or column['distinct_ranks'] < column['total']
+                    )
+                    if not needs_rebalance:
+                        continue
+
+                    count = rebalance_column(column['kanban_type'], column['status'])
+                    self.stdout.write(
+                        f"{tenant.schema_name}: {column['kanban_type']}/{column['status']} -> {count} cards"
+                    )
+
+                self.prune_tombstones(options['tombstone_days'])
+
+        self.stdout.write(self.style.SUCCESS('Rebalanceamento concluído.'))
+
+    def prune_tombstones(self, days):
+        """
+        Apaga tombstones antigos. Clientes com versão anterior ao que foi apagado
+        recebem 'reset' na API de mudanças e recarregam o quadro.
+        """
+        cutoff = timezone.now() - timedelta(days=days)
+        with transaction.atomic():
+            for board in KanbanBoardVersion.objects.select_for_update():
+                old = KanbanTombstone.objects.filter(kanban_type=board.kanban_type, deleted_at__lt=cutoff)
+                newest = old.aggregate(newest=Max('board_version'))['newest']
+                if newest is None:
+                    continue
+                old.delete()
+                board.pruned_through = max(board.pruned_through, newest)
+                board.save(update_fields=['pruned_through'])
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from django_tenants.utils import get_public_schema_name, get_tenant_model, schema_context
+
+from projects.timeline import rebuild_timeline
+
+
+class Command(BaseCommand):
+    help = 'Recria a linha do tempo de conteúdo (eventos do calendário + posts agendados) de cada tenant'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--schema', help='Só este tenant')
+
+    def handle(self, *args, **options):
+        tenants = get_tenant_model().objects.exclude(schema_name=get_public_schema_name())
+        if options['schema']:
+            tenants = tenants.filter(schema_name=options['schema'])
+
+        for tenant in tenants:
+            with schema_context(tenant.schema_name):
+                total = rebuild_timeline()
+            self.stdout.write(f"{tenant.schema_name}: {total} itens na linha do tempo")
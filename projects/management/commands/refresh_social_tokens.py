@@ -0,0 +1,46 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django_tenants.utils import get_public_schema_name, get_tenant_model, schema_context
+
+from projects.token_refresh import TOKEN_REFRESH_WORKERS, make_executors, refresh_tokens
+
+
+class Command(BaseCommand):
+    help = 'Renova os tokens das redes sociais antes de expirarem (processo contínuo)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=60 * 30, help='Segundos entre rodadas')
+        parser.add_argument('--workers', type=int, default=TOKEN_REFRESH_WORKERS, help='Renovações simultâneas por plataforma')
+        parser.add_argument('--limit', type=int, default=None, help='Máximo de contas por tenant a cada rodada')
+        parser.add_argument('--once', action='store_true', help='Uma rodada e sai (cron/testes)')
+
+    def handle(self, *args, **options):
+        stop_event = threading.Event()
+        signal.signal(signal.SIGINT, lambda *a: stop_event.set())
+        signal.signal(signal.SIGTERM, lambda *a: stop_event.set())
+
+        executors = make_executors(options['workers'])
+        try:
+            while not stop_event.is_set():
+                close_old_connections()
+                tenants = get_tenant_model().objects.exclude(schema_name=get_public_schema_name())
+                for tenant in tenants:
+                    with schema_context(tenant.schema_name):
+                        summary = refresh_tokens(executors, options['limit'])
+                    if any(summary.values()):
+                        self.stdout.write(
+                            f"{tenant.schema_name}: {summary['refreshed']} renovados, "
+                            f"{summary['deactivated']} desativados, {summary['failed']} para tentar de novo"
+                        )
+                    if stop_event.is_set():
+                        break
+
+                if options['once']:
+                    break
+                stop_event.wait(options['interval'])
+        finally:
+            for executor in executors.values():
+                executor.shutdown()
@@ -0,0 +1,39 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django_tenants.utils import get_public_schema_name, get_tenant_model, schema_context
+
+from projects.publisher import PUBLISH_BATCH_SIZE, PUBLISH_MAX_WORKERS, make_executor, publish_due
+
+
+class Command(BaseCommand):
+    help = 'Publica os posts agendados quando chega o horário (processo contínuo)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=15, help='Segundos entre varreduras')
+        parser.add_argument('--workers', type=int, default=PUBLISH_MAX_WORKERS, help='Publicações simultâneas')
+        parser.add_argument('--batch-size', type=int, default=PUBLISH_BATCH_SIZE, help='Posts reservados por vez')
+        parser.add_argument('--once', action='store_true', help='Uma varredura e sai (cron/testes)')
+
+    def handle(self, *args, **options):
+        stop_event = threading.Event()
+        signal.signal(signal.SIGINT, lambda *a: stop_event.set())
+        signal.signal(signal.SIGTERM, lambda *a: stop_event.set())
+
+        with make_executor(options['workers']) as executor:
+            while not stop_event.is_set():
+                close_old_connections()
+                tenants = get_tenant_model().objects.exclude(schema_name=get_public_schema_name())
+                for tenant in tenants:
+                    with schema_context(tenant.schema_name):
+                        processed = publish_due(executor, options['batch_size'], options['workers'])
+                    if processed:
+                        self.stdout.write(f"{tenant.schema_name}: {processed} destinos processados")
+                    if stop_event.is_set():
+                        break
+
+                if options['once']:
+                    break
+                stop_event.wait(options['interval'])
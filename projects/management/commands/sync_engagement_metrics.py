@@ -0,0 +1,43 @@
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django_tenants.utils import get_public_schema_name, get_tenant_model, schema_context
+
+from projects.engagement import sync_engagement
+
+
+class Command(BaseCommand):
+    help = 'Atualiza curtidas, comentários, compartilhamentos e visualizações dos posts publicados'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=60 * 15, help='Segundos entre rodadas')
+        parser.add_argument('--workers', type=int, default=8, help='Contas consultadas em paralelo')
+        parser.add_argument('--limit', type=int, default=None, help='Máximo de destinos por tenant a cada rodada')
+        parser.add_argument('--once', action='store_true', help='Uma rodada e sai (cron/testes)')
+
+    def handle(self, *args, **options):
+        stop_event = threading.Event()
+        signal.signal(signal.SIGINT, lambda *a: stop_event.set())
+        signal.signal(signal.SIGTERM, lambda *a: stop_event.set())
+
+        with ThreadPoolExecutor(max_workers=options['workers'], thread_name_prefix='engagement') as executor:
+            while not stop_event.is_set():
+                close_old_connections()
+                tenants = get_tenant_model().objects.exclude(schema_name=get_public_schema_name())
+                for tenant in tenants:
+                    with schema_context(tenant.schema_name):
+                        summary = sync_engagement(executor, options['limit'])
+                    if summary['calls']:
+                        self.stdout.write(
+                            f"{tenant.schema_name}: {summary['destinations']} destinos em {summary['calls']} chamadas"
+                            f" ({summary['limited_accounts']} contas no limite)"
+                        )
+                    if stop_event.is_set():
+                        break
+
+                if options['once']:
+                    break
+                stop_event.wait(options['interval'])
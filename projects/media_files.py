@@ -0,0 +1,91 @@
+# projects/media_files.py
+"""
+Trabalho pesado da galeria de mídia, fora da requisição (jobs em projects/tasks.py).
+
+- Upload: a view só grava o arquivo recebido em MEDIA_STAGING_DIR e enfileira
+  `projects.store_media_file`; o worker envia ao R2 e cria o MediaFile.
+  MEDIA_STAGING_DIR precisa ser o mesmo (volume compartilhado) para o web e
+  os workers.
+- ZIP em lote: `projects.build_media_zip` monta o ZIP num arquivo temporário
+  (um arquivo por vez, em blocos), grava em downloads/ no R2 e devolve a URL.
+  Os ZIPs antigos saem por uma regra de expiração do bucket (prefixo downloads/).
+
+O front acompanha os dois por api/jobs/<id>/.
+"""
+import logging
+import os
+import shutil
+import tempfile
+import uuid
+import zipfile
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.db import connection
+from django.utils.text import slugify
+from django_tenants.utils import get_tenant_model, tenant_context
+
+from .models import MediaFile, MediaFolder
+
+logger = logging.getLogger(__name__)
+
+MEDIA_STAGING_DIR = getattr(settings, 'MEDIA_STAGING_DIR', os.path.join(settings.MEDIA_ROOT, 'staging'))
+# Bloco de cópia do R2 para o ZIP (o arquivo inteiro nunca fica na memória)
+MEDIA_ZIP_CHUNK_SIZE = 1024 * 1024
+# Até esse tamanho o ZIP fica na memória; acima, vai para o disco
+MEDIA_ZIP_SPOOL_SIZE = 32 * 1024 * 1024
+
+
+def staging_storage():
+    return FileSystemStorage(location=MEDIA_STAGING_DIR)
+
+
+def stage_upload(uploaded_file):
+    """ Grava o upload recebido na área de espera. Retorna o nome relativo (vai no payload do job) """
+    _, ext = os.path.splitext(uploaded_file.name)
+    return staging_storage().save(f"{uuid.uuid4().hex}{ext}", uploaded_file)
+
+
+def _current_tenant():
+    # No worker o schema_context só tem o schema_name; o upload_to usa o nome da agência
+    return get_tenant_model().objects.get(schema_name=connection.schema_name)
+
+
+def store_media_file(folder_id, staged_name, file_name):
+    """ Envia o arquivo da área de espera ao R2 e cria o MediaFile (com o nome original) """
+    staging = staging_storage()
+    folder = MediaFolder.objects.select_related('client').filter(pk=folder_id).first()
+    if folder is None:
+        # Pasta excluída enquanto o job esperava
+        staging.delete(staged_name)
+        return {'file_id': None, 'file_name': None}
+
+    with tenant_context(_current_tenant()), staging.open(staged_name, 'rb') as staged:
+        media_file = MediaFile.objects.create(folder=folder, file=File(staged, name=file_name))
+    staging.delete(staged_name)
+    return {'file_id': media_file.pk, 'file_name': media_file.filename}
+
+
+def build_media_zip(file_ids):
+    """ ZIP dos arquivos escolhidos, gravado em downloads/ no R2. Retorna a URL de download """
+    files = list(MediaFile.objects.filter(id__in=file_ids).select_related('folder__client').order_by('id'))
+    if not files:
+        return {'url': None, 'file_name': None, 'files': 0}
+
+    zip_filename = f"imagens_{slugify(files[0].folder.client.name)}.zip"
+    added = 0
+    with tempfile.SpooledTemporaryFile(max_size=MEDIA_ZIP_SPOOL_SIZE) as buffer:
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+            for media_file in files:
+                try:
+                    with media_file.file.open('rb') as source, zip_file.open(media_file.filename, 'w') as target:
+                        shutil.copyfileobj(source, target, MEDIA_ZIP_CHUNK_SIZE)
+                    added += 1
+                except Exception as e:
+                    logger.warning("Erro ao ler arquivo %s para o ZIP: %s", media_file.filename, e)
+        buffer.seek(0)
+        key = default_storage.save(
+            f"downloads/{connection.schema_name}/{uuid.uuid4().hex}/{zip_filename}", File(buffer, name=zip_filename),
+        )
+    return {'url': default_storage.url(key), 'file_name': zip_filename, 'files': added}
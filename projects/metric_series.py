@@ -0,0 +1,187 @@
+# projects/metric_series.py
+"""
+Histórico de engajamento (MetricSnapshot) para as curvas de crescimento.
+
+- `record_snapshots`: um ponto por destino e métrica a cada coleta
+  (projects/engagement.py). Só INSERT; o valor é o acumulado na rede.
+- `downsample_snapshots`: como o valor é acumulado, basta o último ponto de
+  cada intervalo. Depois de 1 hora sobra um ponto por hora; depois de 7 dias,
+  um por dia. Cada rodada só olha as faixas que acabaram de envelhecer e
+  roda no máximo uma vez por SNAPSHOT_DOWNSAMPLE_EVERY por tenant
+  (`downsample_snapshots_if_due`, marcada no cache compartilhado).
+- `metric_series`: séries alinhadas (mesmos rótulos para todas as métricas)
+  de um cliente. O último valor conhecido de cada destino segue valendo nos
+  intervalos sem ponto, então a soma não despenca entre coletas.
+
+As leituras filtram por `recorded_at` (índice BRIN) e a tabela fica com
+~24*7 + 1 ponto por dia por métrica e destino.
+"""
+import datetime
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F, Max, Window
+from django.db.models.functions import RowNumber, Trunc
+from django.utils import timezone
+
+from .models import MetricSnapshot
+
+METRICS = {
+    'likes': (MetricSnapshot.LIKES, 'likes_count'),
+    'comments': (MetricSnapshot.COMMENTS, 'comments_count'),
+    'shares': (MetricSnapshot.SHARES, 'shares_count'),
+    'views': (MetricSnapshot.VIEWS, 'views_count'),
+}
+METRIC_NAMES = {code: name for name, (code, field) in METRICS.items()}
+
+SNAPSHOT_RAW_FOR = timedelta(hours=1)
+SNAPSHOT_HOURLY_FOR = timedelta(days=7)
+# Folga de cada rodada de compactação (cobre rodadas que não aconteceram)
+SNAPSHOT_DOWNSAMPLE_LOOKBACK = timedelta(days=2)
+# Os DELETEs com janela varrem ~9 dias de pontos: não a cada coleta
+SNAPSHOT_DOWNSAMPLE_EVERY = timedelta(hours=1)
+
+SERIES_INTERVALS = {'hour': timedelta(hours=1), 'day': timedelta(days=1)}
+SERIES_MAX_POINTS = 400
+SERIES_DEFAULT_DAYS = 30
+# Acumulados só mudam enquanto o post está na janela de coleta (ENGAGEMENT_WINDOW,
+# 30 dias): o último ponto antes do período está no máximo isso para trás
+SERIES_BASELINE_LOOKBACK = timedelta(days=31)
+
+
+def record_snapshots(destinations, recorded_at):
+    snapshots = [
+        MetricSnapshot(destination_id=destination.pk, metric=code, recorded_at=recorded_at, value=getattr(destination, field))
+        for destination in destinations
+        for code, field in METRICS.values()
+    ]
+    MetricSnapshot.objects.bulk_create(snapshots, batch_size=1000, ignore_conflicts=True)
+
+
+def _keep_last_per_bucket(queryset, kind):
+    """ Apaga tudo menos o ponto mais recente de cada (destino, métrica, intervalo) """
+    ranked = queryset.annotate(
+        position=Window(
+            RowNumber(),
+            partition_by=[F('destination_id'), F('metric'), Trunc('recorded_at', kind)],
+            order_by=F('recorded_at').desc(),
+        ),
+    )
+    stale = ranked.filter(position__gt=1).values('id')
+    deleted, _ = MetricSnapshot.objects.filter(id__in=stale).delete()
+    return deleted
+
+
+def downsample_snapshots(now=None, full=False):
+    """ Compacta os pontos que passaram de 1 hora (por hora) e de 7 dias (por dia) """
+    now = now or timezone.now()
+    hourly_until = now - SNAPSHOT_RAW_FOR
+    daily_until = now - SNAPSHOT_HOURLY_FOR
+
+    hourly = MetricSnapshot.objects.filter(recorded_at__lt=hourly_until)
+    daily = MetricSnapshot.objects.filter(recorded_at__lt=daily_until)
+    if not full:
+        hourly = hourly.filter(recorded_at__gte=hourly_until - SNAPSHOT_HOURLY_FOR - SNAPSHOT_DOWNSAMPLE_LOOKBACK)
+        daily = daily.filter(recorded_at__gte=daily_until - SNAPSHOT_DOWNSAMPLE_LOOKBACK)
+    return _keep_last_per_bucket(hourly, 'hour') + _keep_last_per_bucket(daily, 'day')
+
+
+def downsample_key(schema_name):
+    return f"metric_series:downsampled:{schema_name}"
+
+
+def downsample_snapshots_if_due(schema_name=None):
+    """ downsample_snapshots() se a última rodada do tenant (em qualquer processo) já passou do intervalo """
+    key = downsample_key(schema_name or connection.schema_name)
+    if not cache.add(key, timezone.now(), SNAPSHOT_DOWNSAMPLE_EVERY.total_seconds()):
+        return 0
+    return downsample_snapshots()
+
+
+def parse_series_params(params):
+    """
+    (métricas, início, fim, intervalo) a partir de
+    ?metrics=likes,views&start=AAAA-MM-DD&end=AAAA-MM-DD&interval=day (fim exclusivo).
+    Padrão: todas as métricas, últimos 30 dias, por dia. ValueError se inválido.
+    """
+    metrics = [name for name in params.get('metrics', '').split(',') if name] or list(METRICS)
+    if any(name not in METRICS for name in metrics):
+        raise ValueError("Métrica inválida.")
+
+    interval = params.get('interval', 'day')
+    if interval not in SERIES_INTERVALS:
+        raise ValueError("Intervalo inválido.")
+
+    if params.get('end'):
+        end = datetime.date.fromisoformat(params['end'])
+    else:
+        end = timezone.localdate() + timedelta(days=1)
+    if params.get('start'):
+        start = datetime.date.fromisoformat(params['start'])
+    else:
+        start = end - timedelta(days=SERIES_DEFAULT_DAYS)
+
+    if end <= start or (end - start) / SERIES_INTERVALS[interval] > SERIES_MAX_POINTS:
+        raise ValueError("Período inválido.")
+    return metrics, start, end, interval
+
+
+def _buckets(start, end, interval):
+    moment = timezone.make_aware(datetime.datetime.combine(start, datetime.time.min))
+    limit = timezone.make_aware(datetime.datetime.combine(end, datetime.time.min))
+    buckets = []
+    while moment < limit:
+        buckets.append(moment)
+        moment = moment + SERIES_INTERVALS[interval]
+    return buckets
+
+
+def metric_series(client_id, metrics, start, end, interval='day'):
+    """
+    {'labels': [...], 'series': {métrica: [total do cliente no fim de cada intervalo]}}
+    Duas queries: os pontos do período e o último valor antes dele.
+    """
+    buckets = _buckets(start, end, interval)
+    codes = [METRICS[name][0] for name in metrics]
+    snapshots = MetricSnapshot.objects.filter(destination__post__client_id=client_id, metric__in=codes).order_by()
+
+    current = {}
+    baseline = (
+        snapshots
+        .filter(recorded_at__gte=buckets[0] - SERIES_BASELINE_LOOKBACK, recorded_at__lt=buckets[0])
+        .values('destination_id', 'metric')
+        .annotate(value=Max('value'))
+    )
+    for row in baseline:
+        current[(row['destination_id'], row['metric'])] = row['value']
+
+    points = (
+        snapshots
+        .filter(recorded_at__gte=buckets[0], recorded_at__lt=buckets[-1] + SERIES_INTERVALS[interval])
+        .annotate(bucket=Trunc('recorded_at', interval))
+        .values('bucket', 'destination_id', 'metric')
+        .annotate(value=Max('value'))
+    )
+    changes = {}
+    for row in points:
+        changes.setdefault(row['bucket'], []).append(row)
+
+    totals = {code: 0 for code in codes}
+    for (destination_id, code), value in current.items():
+        totals[code] += value
+
+    series = {name: [] for name in metrics}
+    for bucket in buckets:
+        for row in changes.get(bucket, ()):
+            key = (row['destination_id'], row['metric'])
+            totals[row['metric']] += row['value'] - current.get(key, 0)
+            current[key] = row['value']
+        for code in codes:
+            series[METRIC_NAMES[code]].append(totals[code])
+
+    label_format = '%Y-%m-%dT%H:%M' if interval == 'hour' else '%Y-%m-%d'
+    return {
+        'labels': [timezone.localtime(bucket).strftime(label_format) for bucket in buckets],
+        'series': series,
+    }
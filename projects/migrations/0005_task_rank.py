@@ -0,0 +1,47 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:29
+
+from django.conf import settings
+from django.db import migrations, models
+
+from projects.ranking import spread_ranks
+
+
+def order_to_rank(apps, schema_editor):
+    """ Converte a ordem inteira de cada coluna em chaves fracionárias """
+    Task = apps.get_model('projects', 'Task')
+    columns = Task.objects.order_by().values_list('kanban_type', 'status').distinct()
+
+    for kanban_type, status in columns:
+        tasks = list(Task.objects.filter(kanban_type=kanban_type, status=status).order_by('order', 'id'))
+        for task, rank in zip(tasks, spread_ranks(len(tasks))):
+            task.rank = rank
+        Task.objects.bulk_update(tasks, ['rank'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0004_mediafolder_mediafile'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='rank',
+            field=models.CharField(blank=True, db_collation='C', default='', max_length=64, verbose_name='Posição na Coluna'),
+        ),
+        migrations.RunPython(order_to_rank, migrations.RunPython.noop),
+        migrations.AlterModelOptions(
+            name='task',
+            options={'ordering': ['rank', 'id']},
+        ),
+        migrations.RemoveField(
+            model_name='task',
+            name='order',
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['kanban_type', 'status', 'rank'], name='task_column_rank_idx'),
+        ),
+    ]
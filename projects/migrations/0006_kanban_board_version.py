@@ -0,0 +1,47 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:33
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0005_task_rank'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KanbanBoardVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kanban_type', models.CharField(choices=[('general', 'Geral'), ('operational', 'Operacional')], max_length=20, unique=True)),
+                ('version', models.BigIntegerField(default=0)),
+                ('pruned_through', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='KanbanTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task_id', models.BigIntegerField()),
+                ('kanban_type', models.CharField(choices=[('general', 'Geral'), ('operational', 'Operacional')], max_length=20)),
+                ('board_version', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='board_version',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['kanban_type', 'board_version'], name='task_board_version_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='kanbantombstone',
+            index=models.Index(fields=['kanban_type', 'board_version'], name='tombstone_board_version_idx'),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:37
+
+from django.db import migrations, models
+
+from projects.models import user_initials
+
+
+def fill_card_fields(apps, schema_editor):
+    """ Copia os nomes exibidos nos cards que já existem (mesma regra do Task.refresh_card_fields) """
+    Task = apps.get_model('projects', 'Task')
+    tasks = Task.objects.select_related('project__client', 'social_post__client', 'assigned_to')
+
+    batch = []
+    for task in tasks.iterator(chunk_size=500):
+        client = None
+        if task.project:
+            task.project_name = task.project.name
+            client = task.project.client
+        elif task.social_post:
+            client = task.social_post.client
+            task.project_name = f"Cliente: {client.name}"
+        task.client_name = client.name if client else ''
+        if task.assigned_to:
+            task.assigned_to_username = task.assigned_to.username
+            task.assigned_to_initials = user_initials(task.assigned_to)
+        batch.append(task)
+
+        if len(batch) == 500:
+            Task.objects.bulk_update(batch, ['project_name', 'client_name', 'assigned_to_username', 'assigned_to_initials'])
+            batch = []
+    Task.objects.bulk_update(batch, ['project_name', 'client_name', 'assigned_to_username', 'assigned_to_initials'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0006_kanban_board_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='assigned_to_initials',
+            field=models.CharField(blank=True, default='', max_length=4),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='assigned_to_username',
+            field=models.CharField(blank=True, default='', max_length=150),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='client_name',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='project_name',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.RunPython(fill_card_fields, migrations.RunPython.noop),
+    ]
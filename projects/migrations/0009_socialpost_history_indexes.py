@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0008_task_archived_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='socialpost',
+            index=models.Index(fields=['-created_at', '-id'], name='socialpost_history_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='socialpost',
+            index=models.Index(fields=['client', '-created_at', '-id'], name='socialpost_client_history_idx'),
+        ),
+    ]
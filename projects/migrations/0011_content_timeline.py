@@ -0,0 +1,75 @@
+# Generated by Django 5.2.8 on 2026-10-18 11:30
+
+import datetime
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def fill_timeline(apps, schema_editor):
+    """ Linhas dos eventos e posts agendados que já existem (mesma regra de projects/timeline.py) """
+    CalendarEvent = apps.get_model('projects', 'CalendarEvent')
+    SocialPostDestination = apps.get_model('projects', 'SocialPostDestination')
+    ContentTimelineEntry = apps.get_model('projects', 'ContentTimelineEntry')
+
+    entries = []
+    for event in CalendarEvent.objects.iterator(chunk_size=500):
+        entries.append(ContentTimelineEntry(
+            source='calendar',
+            calendar_event_id=event.pk,
+            client_id=event.client_id,
+            scheduled_at=timezone.make_aware(datetime.datetime.combine(event.date, event.time)),
+            platform=event.platform,
+            title=event.title,
+            status=event.status,
+            format_type=event.post_type,
+        ))
+
+    destinations = SocialPostDestination.objects.filter(post__scheduled_for__isnull=False).select_related('post', 'account')
+    for destination in destinations.iterator(chunk_size=500):
+        post = destination.post
+        entries.append(ContentTimelineEntry(
+            source='post',
+            social_post_id=post.pk,
+            destination_id=destination.pk,
+            client_id=post.client_id,
+            scheduled_at=post.scheduled_for,
+            platform=destination.account.platform,
+            title=post.caption[:200],
+            status=post.approval_status,
+            format_type=destination.format_type,
+        ))
+
+    ContentTimelineEntry.objects.bulk_create(entries, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0010_calendarevent_updated_at_date_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentTimelineEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scheduled_at', models.DateTimeField()),
+                ('platform', models.CharField(blank=True, max_length=50)),
+                ('source', models.CharField(choices=[('calendar', 'Evento do Calendário'), ('post', 'Post Social')], max_length=10)),
+                ('title', models.CharField(blank=True, max_length=200)),
+                ('status', models.CharField(blank=True, max_length=30)),
+                ('format_type', models.CharField(blank=True, max_length=50)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('calendar_event', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='timeline_entries', to='projects.calendarevent')),
+                ('client', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='timeline_entries', to='projects.client')),
+                ('destination', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='timeline_entries', to='projects.socialpostdestination')),
+                ('social_post', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='timeline_entries', to='projects.socialpost')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['scheduled_at'], name='timeline_scheduled_idx'), models.Index(fields=['client', 'platform', 'scheduled_at'], name='timeline_conflict_idx')],
+            },
+        ),
+        migrations.RunPython(fill_timeline, migrations.RunPython.noop),
+    ]
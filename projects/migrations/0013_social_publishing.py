@@ -0,0 +1,71 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:55
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def skip_past_posts(apps, schema_editor):
+    """ Posts com horário já passado não saem publicados de surpresa quando o publicador subir """
+    SocialPost = apps.get_model('projects', 'SocialPost')
+    SocialPost.objects.filter(scheduled_for__lt=timezone.now()).update(publish_status='skipped')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0012_calendarfeedtoken'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='socialpost',
+            name='publish_status',
+            field=models.CharField(choices=[('pending', 'Aguardando horário'), ('publishing', 'Publicando'), ('published', 'Publicado'), ('partial', 'Publicado em parte'), ('failed', 'Falhou'), ('skipped', 'Não publicado')], default='pending', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='socialpost',
+            name='published_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='socialpostdestination',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='socialpostdestination',
+            name='external_id',
+            field=models.CharField(blank=True, max_length=255, verbose_name='ID na Rede Social'),
+        ),
+        migrations.AddField(
+            model_name='socialpostdestination',
+            name='last_error',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='socialpostdestination',
+            name='next_attempt_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='socialpostdestination',
+            name='published_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='socialpostdestination',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Aguardando'), ('queued', 'Na fila'), ('publishing', 'Publicando'), ('published', 'Publicado'), ('failed', 'Falhou')], default='pending', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='socialpost',
+            index=models.Index(condition=models.Q(('approval_status', 'approved_to_schedule'), ('publish_status', 'pending')), fields=['scheduled_for', 'id'], name='socialpost_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='socialpostdestination',
+            index=models.Index(condition=models.Q(('status', 'queued')), fields=['next_attempt_at'], name='destination_queue_idx'),
+        ),
+        migrations.RunPython(skip_past_posts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.8 on 2026-10-18 14:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0013_social_publishing'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='socialpostdestination',
+            name='comments_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='socialpostdestination',
+            name='likes_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='socialpostdestination',
+            name='metrics_updated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='socialpostdestination',
+            name='shares_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='socialpostdestination',
+            name='views_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='socialpostdestination',
+            index=models.Index(condition=models.Q(('status', 'published')), fields=['metrics_updated_at'], name='destination_metrics_idx'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.8 on 2026-10-18 15:20
+
+import django.contrib.postgres.indexes
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def seed_snapshots(apps, schema_editor):
+    """ Primeiro ponto de cada série: os números já coletados nos destinos """
+    SocialPostDestination = apps.get_model('projects', 'SocialPostDestination')
+    MetricSnapshot = apps.get_model('projects', 'MetricSnapshot')
+    fields = {1: 'likes_count', 2: 'comments_count', 3: 'shares_count', 4: 'views_count'}
+
+    snapshots = []
+    for destination in SocialPostDestination.objects.filter(metrics_updated_at__isnull=False).iterator(chunk_size=500):
+        for metric, field in fields.items():
+            snapshots.append(MetricSnapshot(
+                destination_id=destination.pk, metric=metric,
+                recorded_at=destination.metrics_updated_at, value=getattr(destination, field),
+            ))
+    MetricSnapshot.objects.bulk_create(snapshots, batch_size=1000)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0014_destination_engagement'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MetricSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metric', models.PositiveSmallIntegerField(choices=[(1, 'Curtidas'), (2, 'Comentários'), (3, 'Compartilhamentos'), (4, 'Visualizações')])),
+                ('recorded_at', models.DateTimeField()),
+                ('value', models.IntegerField()),
+                ('destination', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='metric_snapshots', to='projects.socialpostdestination')),
+            ],
+            options={
+                'indexes': [django.contrib.postgres.indexes.BrinIndex(fields=['recorded_at'], name='metricsnapshot_time_brin')],
+                'constraints': [models.UniqueConstraint(fields=('destination', 'metric', 'recorded_at'), name='metricsnapshot_key')],
+            },
+        ),
+        migrations.RunPython(seed_snapshots, migrations.RunPython.noop),
+    ]
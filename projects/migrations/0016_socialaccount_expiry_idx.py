@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-18 16:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0015_metricsnapshot'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='socialaccount',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['token_expires_at'], name='socialaccount_expiry_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.8 on 2026-10-18 17:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0016_socialaccount_expiry_idx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='socialpostdestination',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Aguardando'), ('queued', 'Na fila'), ('publishing', 'Publicando'), ('uploading', 'Enviando vídeo'), ('published', 'Publicado'), ('failed', 'Falhou')], default='pending', max_length=20),
+        ),
+        migrations.CreateModel(
+            name='VideoUploadSession',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('platform', models.CharField(max_length=50)),
+                ('status', models.CharField(choices=[('pending', 'Aguardando'), ('uploading', 'Enviando'), ('processing', 'Processando na rede'), ('done', 'Concluído'), ('failed', 'Falhou')], default='pending', max_length=20)),
+                ('upload_url', models.TextField(blank=True)),
+                ('remote_id', models.CharField(blank=True, max_length=255)),
+                ('opened_at', models.DateTimeField(blank=True, null=True)),
+                ('total_bytes', models.BigIntegerField(default=0)),
+                ('chunk_size', models.PositiveIntegerField(default=0)),
+                ('bytes_sent', models.BigIntegerField(default=0)),
+                ('failures', models.PositiveSmallIntegerField(default=0)),
+                ('locked_until', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('destination', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='upload_session', to='projects.socialpostdestination')),
+            ],
+        ),
+    ]
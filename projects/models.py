@@ -1,9 +1,50 @@
-from django.db import models
+import contextvars
+from contextlib import contextmanager
+
+from django.db import models, connection, transaction
 from django.conf import settings
+from django.contrib.postgres.indexes import BrinIndex
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django_tenants.utils import get_public_schema_name, schema_context
 import secrets
 import os
 import uuid
 from django.utils.text import slugify
+from django.utils import timezone
+from .events import publish_board_resync
+from .ranking import rank_between
+
+# Escritas em massa (projects/kanban.py) tratam versão, tombstones e cache
+# uma vez por quadro: os receivers por instância ficam mudos enquanto isso.
+_bulk_card_writes = contextvars.ContextVar('bulk_card_writes', default=False)
+
+
+@contextmanager
+def bulk_card_writes():
+    token = _bulk_card_writes.set(True)
+    try:
+        yield
+    finally:
+        _bulk_card_writes.reset(token)
+
+
+def user_initials(user):
+    """ Iniciais do avatar: 1ª letra do nome e do sobrenome, senão começo do username """
+    first = (user.first_name or "").strip()
+    last = (user.last_name or "").strip()
+
+    if first and last:
+        initials = f"{first[0]}{last[0]}"
+    elif first:
+        # Só o primeiro nome (mas composto): tenta pegar do split
+        names = first.split()
+        initials = f"{names[0][0]}{names[-1][0]}" if len(names) >= 2 else first[:2]
+    else:
+        initials = user.username[:2]
+    return initials.upper()
+
 
 # --- ESCOLHAS GLOBAIS (STATUS) ---
 
@@ -111,6 +152,12 @@ class SocialAccount(models.Model):
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Renovação antecipada dos tokens (projects/token_refresh.py)
+            models.Index(fields=['token_expires_at'], condition=Q(is_active=True), name='socialaccount_expiry_idx'),
+        ]
+
     def __str__(self):
         return f"{self.get_platform_display()} - {self.account_name}"
 
@@ -158,9 +205,34 @@ class SocialPost(models.Model):
     shares_count = models.IntegerField(default=0)
     views_count = models.IntegerField(default=0)
     
+    # Publicação automática (projects/publisher.py)
+    PUBLISH_STATUS_CHOICES = [
+        ('pending', 'Aguardando horário'),
+        ('publishing', 'Publicando'),
+        ('published', 'Publicado'),
+        ('partial', 'Publicado em parte'),
+        ('failed', 'Falhou'),
+        ('skipped', 'Não publicado'),
+    ]
+    publish_status = models.CharField(max_length=20, choices=PUBLISH_STATUS_CHOICES, default='pending')
+    published_at = models.DateTimeField(null=True, blank=True)
+
     created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Histórico paginado por cursor em (-created_at, -id), geral e por cliente
+            models.Index(fields=['-created_at', '-id'], name='socialpost_history_idx'),
+            models.Index(fields=['client', '-created_at', '-id'], name='socialpost_client_history_idx'),
+            # Varredura do publicador: só posts aprovados ainda não publicados
+            models.Index(
+                fields=['scheduled_for', 'id'],
+                condition=Q(publish_status='pending', approval_status='approved_to_schedule'),
+                name='socialpost_due_idx',
+            ),
+        ]
+
     def save(self, *args, **kwargs):
         # Gera token automaticamente se não existir
         if not self.approval_token:
@@ -193,14 +265,85 @@ class SocialPostDestination(models.Model):
         ('pinterest_pin', 'Pinterest'),
     ]
     
+    STATUS_CHOICES = [
+        ('pending', 'Aguardando'),
+        ('queued', 'Na fila'),
+        ('publishing', 'Publicando'),
+        # Vídeo sendo enviado em partes (VideoUploadSession / jobs)
+        ('uploading', 'Enviando vídeo'),
+        ('published', 'Publicado'),
+        ('failed', 'Falhou'),
+    ]
+
     post = models.ForeignKey('SocialPost', on_delete=models.CASCADE)
     account = models.ForeignKey('SocialAccount', on_delete=models.CASCADE)
     format_type = models.CharField(max_length=50, choices=DESTINATION_CHOICES)
-    
+
+    # Resultado da publicação neste destino (projects/publisher.py)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(null=True, blank=True)
+    external_id = models.CharField(max_length=255, blank=True, verbose_name="ID na Rede Social")
+    published_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    # Engajamento nesta rede (projects/engagement.py); o SocialPost guarda a soma
+    likes_count = models.IntegerField(default=0)
+    comments_count = models.IntegerField(default=0)
+    shares_count = models.IntegerField(default=0)
+    views_count = models.IntegerField(default=0)
+    metrics_updated_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['next_attempt_at'], condition=Q(status='queued'), name='destination_queue_idx'),
+            models.Index(fields=['metrics_updated_at'], condition=Q(status='published'), name='destination_metrics_idx'),
+        ]
+
     def __str__(self):
         return f"{self.account} - {self.get_format_type_display()}"
 
 
+# --- 5.1 UPLOAD DE VÍDEO EM PARTES (retomável, projects/video_upload.py) ---
+class VideoUploadSession(models.Model):
+    """
+    Envio de um vídeo do R2 para a rede, parte por parte. `bytes_sent` é
+    gravado a cada parte confirmada: se o worker cair, o próximo continua
+    dali em vez de começar do zero.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Aguardando'),
+        ('uploading', 'Enviando'),
+        ('processing', 'Processando na rede'),
+        ('done', 'Concluído'),
+        ('failed', 'Falhou'),
+    ]
+
+    destination = models.OneToOneField(SocialPostDestination, on_delete=models.CASCADE, related_name='upload_session')
+    platform = models.CharField(max_length=50)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+
+    # Sessão aberta na rede: URL de upload e id do lado de lá (publish_id, container, vídeo)
+    upload_url = models.TextField(blank=True)
+    remote_id = models.CharField(max_length=255, blank=True)
+    opened_at = models.DateTimeField(null=True, blank=True)
+
+    total_bytes = models.BigIntegerField(default=0)
+    chunk_size = models.PositiveIntegerField(default=0)
+    bytes_sent = models.BigIntegerField(default=0)
+
+    # Rodadas seguidas sem avanço (reinicia a cada parte confirmada)
+    failures = models.PositiveSmallIntegerField(default=0)
+    # Um job por vez: quem envia renova o prazo a cada parte
+    locked_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Upload {self.destination} ({self.bytes_sent}/{self.total_bytes})"
+
+
 # --- 6. TAREFA (KANBAN GERAL E OPERACIONAL) ---
 class Task(models.Model):
     kanban_type = models.CharField(max_length=20, choices=KANBAN_TYPES, default='general')
@@ -234,7 +377,20 @@ class Task(models.Model):
     # CAMPOS DE DATA E ORDENAÇÃO
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Última Atualização")
-    order = models.IntegerField(default=0) 
+    # Chave fracionária (ver projects/ranking.py). Collation 'C' = comparação byte a byte
+    rank = models.CharField(max_length=64, blank=True, default='', db_collation='C', verbose_name="Posição na Coluna")
+    # Versão do quadro em que o card mudou pela última vez (sincronização incremental)
+    board_version = models.BigIntegerField(default=0)
+
+    # Dados exibidos no card, copiados na escrita (ver refresh_card_fields):
+    # a leitura do quadro não precisa de JOIN com projeto, cliente e usuário.
+    project_name = models.CharField(max_length=255, blank=True, default='')
+    client_name = models.CharField(max_length=255, blank=True, default='')
+    assigned_to_username = models.CharField(max_length=150, blank=True, default='')
+    assigned_to_initials = models.CharField(max_length=4, blank=True, default='')
+
+    # Card arquivado sai do quadro, mas continua no banco
+    archived_at = models.DateTimeField(null=True, blank=True, verbose_name="Arquivado em")
     
     # CAMPOS DE USUÁRIO
     created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
@@ -248,61 +404,321 @@ class Task(models.Model):
     )
 
     class Meta:
-        ordering = ['order']
+        ordering = ['rank', 'id']
+        indexes = [
+            models.Index(fields=['kanban_type', 'status', 'rank'], name='task_column_rank_idx'),
+            models.Index(fields=['kanban_type', 'board_version'], name='task_board_version_idx'),
+        ]
 
     def __str__(self):
         return self.title
-        
-    def to_dict(self):
-        """ Retorna dados para o Frontend (JSON) """
-        
-        project_name = "Sem Projeto"
-        initials = '--'
-        
-        if self.assigned_to:
-            # 1. Pega os campos diretamente, garantindo que não seja None
-            first = (self.assigned_to.first_name or "").strip()
-            last = (self.assigned_to.last_name or "").strip()
-            
-            # 2. Se tiver os dois nomes, pega a 1ª letra de cada
-            if first and last:
-                initials = f"{first[0]}{last[0]}"
-            
-            # 3. Se só tiver o primeiro nome (mas composto), tenta pegar do split
-            elif first:
-                names = first.split()
-                if len(names) >= 2:
-                     initials = f"{names[0][0]}{names[-1][0]}"
-                else:
-                    initials = first[:2]
-            
-            # 4. Fallback: Se não tiver nome nenhum, usa o username
-            else:
-                initials = self.assigned_to.username[:2]
 
+    # Campos que mudam o que o card exibe
+    CARD_SOURCE_FIELDS = {'project', 'social_post', 'assigned_to'}
+    CARD_FIELDS = ['project_name', 'client_name', 'assigned_to_username', 'assigned_to_initials']
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or self.CARD_SOURCE_FIELDS & set(update_fields):
+            self.refresh_card_fields()
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | set(self.CARD_FIELDS)
+
+        # Card novo (ou sem posição) entra no fim da coluna
+        if not self.rank:
+            self.rank = self.rank_for_column_end(self.kanban_type, self.status)
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = set(kwargs['update_fields']) | {'rank'}
+
+        # Incrementa a versão do quadro e grava o card na mesma transação:
+        # quem ler a versão nova sempre enxerga o card já gravado.
+        with transaction.atomic():
+            self.board_version = KanbanBoardVersion.bump(self.kanban_type)
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = set(kwargs['update_fields']) | {'board_version'}
+            super().save(*args, **kwargs)
+
+    def refresh_card_fields(self):
+        """ Copia para o card os nomes de projeto, cliente e responsável """
+        client = None
         if self.project:
-            project_name = self.project.name
-        elif self.social_post and self.social_post.client:
+            self.project_name = self.project.name
+            client = self.project.client
+        elif self.social_post:
             # Se não tem projeto, mas tem post, usa o nome do cliente
-            project_name = f"Cliente: {self.social_post.client.name}"
+            client = self.social_post.client
+            self.project_name = f"Cliente: {client.name}"
+        else:
+            self.project_name = ''
+        self.client_name = client.name if client else ''
 
+        if self.assigned_to:
+            self.assigned_to_username = self.assigned_to.username
+            self.assigned_to_initials = user_initials(self.assigned_to)
+        else:
+            self.assigned_to_username = ''
+            self.assigned_to_initials = ''
+
+    @classmethod
+    def update_cards(cls, queryset, **fields):
+        """
+        queryset.update() que também avança a versão dos quadros afetados,
+        para o sync incremental e o snapshot em cache enxergarem a mudança.
+        Fora de bulk_card_writes() avisa os quadros abertos para ressincronizar
+        (ex.: nome de projeto/cliente/responsável copiado nos cards).
+        """
+        updated = 0
+        with transaction.atomic():
+            kanban_types = list(queryset.order_by().values_list('kanban_type', flat=True).distinct())
+            for kanban_type in kanban_types:
+                version = KanbanBoardVersion.bump(kanban_type)
+                updated += queryset.filter(kanban_type=kanban_type).update(board_version=version, **fields)
+                if not _bulk_card_writes.get():
+                    publish_board_resync(kanban_type)
+        return updated
+
+    @classmethod
+    def rank_for_column_end(cls, kanban_type, status):
+        """ Chave depois do último card da coluna (usa o índice task_column_rank_idx) """
+        last_rank = (
+            cls.objects
+            .filter(kanban_type=kanban_type, status=status)
+            .exclude(rank='')
+            .order_by('-rank')
+            .values_list('rank', flat=True)
+            .first()
+        )
+        return rank_between(last_rank, None)
+        
+    def to_dict(self):
+        """ Retorna dados para o Frontend (JSON). Só usa colunas do próprio card """
         return {
             'id': self.id,
             'title': self.title,
             'description': self.description or "Nenhuma descrição.",
             'status': self.status,
             'priority': self.priority,
-            'status_display': self.get_status_display(),    
-            'project_name': project_name,
-            'order': self.order,
+            'status_display': self.get_status_display(),
+            'project_name': self.project_name or "Sem Projeto",
+            'client_name': self.client_name,
+            'rank': self.rank,
             'created_at': self.created_at.strftime('%d/%m/%Y'),
-            'updated_at': self.updated_at.strftime('%d/%m/%Y') if self.updated_at else "", 
-            'assigned_to_username': self.assigned_to.username if self.assigned_to else None,
-            'assigned_to_initials': self.assigned_to.username[0].upper() if self.assigned_to and self.assigned_to.username else '?',
-            'social_post_id': self.social_post.id if self.social_post else None,
-            'assigned_to_initials': initials.upper(),
+            'updated_at': self.updated_at.strftime('%d/%m/%Y') if self.updated_at else "",
+            'assigned_to_username': self.assigned_to_username or None,
+            'assigned_to_initials': self.assigned_to_initials or '--',
+            'social_post_id': self.social_post_id,
         }
 
+
+# --- 6.1 VERSÃO DO QUADRO (Sincronização incremental) ---
+class KanbanBoardVersion(models.Model):
+    """
+    Contador por quadro (um registro por kanban_type em cada schema/tenant).
+    Todo card salvo ou excluído incrementa a versão do seu quadro.
+    """
+    kanban_type = models.CharField(max_length=20, choices=KANBAN_TYPES, unique=True)
+    version = models.BigIntegerField(default=0)
+    # Tombstones até essa versão já foram apagados: clientes mais antigos recarregam o quadro
+    pruned_through = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.kanban_type} v{self.version}"
+
+    @classmethod
+    def bump(cls, kanban_type):
+        """ Incrementa e retorna a nova versão em um único comando (upsert atômico) """
+        table = connection.ops.quote_name(cls._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} (kanban_type, version, pruned_through) VALUES (%s, 1, 0) "
+                f"ON CONFLICT (kanban_type) DO UPDATE SET version = {table}.version + 1 "
+                f"RETURNING version",
+                [kanban_type],
+            )
+            return cursor.fetchone()[0]
+
+    @classmethod
+    def current(cls, kanban_type):
+        """ (versão, pruned_through) atuais do quadro """
+        row = cls.objects.filter(kanban_type=kanban_type).values_list('version', 'pruned_through').first()
+        return row or (0, 0)
+
+
+class KanbanTombstone(models.Model):
+    """ Registro de card excluído, para o cliente remover do quadro no próximo sync """
+    task_id = models.BigIntegerField()
+    kanban_type = models.CharField(max_length=20, choices=KANBAN_TYPES)
+    board_version = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['kanban_type', 'board_version'], name='tombstone_board_version_idx'),
+        ]
+
+    def __str__(self):
+        return f"Task {self.task_id} excluída (v{self.board_version})"
+
+
+@receiver(post_delete, sender=Task)
+def record_task_tombstone(sender, instance, **kwargs):
+    """
+    Roda também em exclusões em massa e em cascata (ex.: projeto excluído),
+    que não passam pelo Task.delete().
+    """
+    if _bulk_card_writes.get():
+        return
+    # A instância fica com a versão da exclusão (usada nos eventos em tempo real)
+    instance.board_version = KanbanBoardVersion.bump(instance.kanban_type)
+    KanbanTombstone.objects.create(
+        task_id=instance.pk,
+        kanban_type=instance.kanban_type,
+        board_version=instance.board_version,
+    )
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def invalidate_kanban_snapshot(sender, instance, **kwargs):
+    """ O snapshot do quadro em cache (projects/kanban.py) não vale mais """
+    if _bulk_card_writes.get():
+        return
+    from .kanban import invalidate_board_snapshot
+    invalidate_board_snapshot(instance.kanban_type)
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+@receiver(post_save, sender='projects.SocialPost')
+@receiver(post_delete, sender='projects.SocialPost')
+def invalidate_dashboard_cache(sender, instance, **kwargs):
+    """ Contadores do dashboard em cache (projects/stats.py) """
+    if _bulk_card_writes.get():
+        return
+    from .stats import invalidate_dashboard_stats
+    invalidate_dashboard_stats()
+
+
+@receiver(pre_save, sender=Task)
+@receiver(pre_save, sender=Project)
+@receiver(pre_save, sender='projects.SocialPost')
+def remember_previous_client(sender, instance, raw=False, update_fields=None, **kwargs):
+    """ Cliente antes da gravação: se o card/projeto/post trocar de cliente, o antigo também perde o cache """
+    instance._previous_client_ids = []
+    if raw or instance.pk is None or (sender is Task and _bulk_card_writes.get()):
+        return
+    client_fields = {'project', 'social_post'} if sender is Task else {'client'}
+    if update_fields is not None and not client_fields & set(update_fields):
+        return
+    if sender is Task:
+        from .stats import task_client_ids
+        instance._previous_client_ids = list(task_client_ids([instance.pk]))
+    else:
+        instance._previous_client_ids = list(sender.objects.filter(pk=instance.pk).values_list('client_id', flat=True))
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def invalidate_task_client_metrics(sender, instance, **kwargs):
+    """ Métricas em cache do cliente do card (projects/stats.py) """
+    if _bulk_card_writes.get():
+        return
+    from .stats import invalidate_client_metrics
+
+    client_ids = []
+    for field, model in (('project', Project), ('social_post', SocialPost)):
+        pk = getattr(instance, f'{field}_id')
+        if not pk:
+            continue
+        if Task._meta.get_field(field).is_cached(instance):
+            client_ids.append(getattr(instance, field).client_id)
+        else:
+            client_ids.extend(model.objects.filter(pk=pk).values_list('client_id', flat=True))
+    invalidate_client_metrics([*client_ids, *getattr(instance, '_previous_client_ids', ())])
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+@receiver(post_save, sender='projects.SocialPost')
+@receiver(post_delete, sender='projects.SocialPost')
+def invalidate_owner_client_metrics(sender, instance, **kwargs):
+    from .stats import invalidate_client_metrics
+    invalidate_client_metrics([instance.client_id, *getattr(instance, '_previous_client_ids', ())])
+
+
+@receiver(post_save, sender=Client)
+@receiver(post_delete, sender=Client)
+@receiver(post_save, sender=SocialAccount)
+@receiver(post_delete, sender=SocialAccount)
+def invalidate_client_accounts_cache(sender, instance, **kwargs):
+    """ Mapa cliente -> contas do Estúdio de posts em cache (projects/clients.py) """
+    from .clients import invalidate_client_accounts
+    invalidate_client_accounts()
+
+
+# --- 6.2 NOMES COPIADOS NOS CARDS (mantidos pelos sinais abaixo) ---
+@receiver(post_save, sender=Project)
+def refresh_project_cards(sender, instance, created, **kwargs):
+    if created:
+        return
+    client_name = instance.client.name if instance.client else ''
+    stale = Task.objects.filter(project=instance).exclude(project_name=instance.name, client_name=client_name)
+    Task.update_cards(stale, project_name=instance.name, client_name=client_name)
+
+
+@receiver(post_save, sender=Client)
+def refresh_client_cards(sender, instance, created, **kwargs):
+    if created:
+        return
+    Task.update_cards(
+        Task.objects.filter(project__client=instance).exclude(client_name=instance.name),
+        client_name=instance.name,
+    )
+    # Cards sem projeto exibem o cliente do post
+    label = f"Cliente: {instance.name}"
+    Task.update_cards(
+        Task.objects.filter(project__isnull=True, social_post__client=instance).exclude(project_name=label),
+        project_name=label, client_name=instance.name,
+    )
+
+
+def _user_schema(user):
+    """ Schema da agência do usuário (os cards ficam lá, o usuário no schema público) """
+    if not user.agency_id or user.agency.schema_name == get_public_schema_name():
+        return None
+    return user.agency.schema_name
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def refresh_assignee_cards(sender, instance, created, update_fields=None, **kwargs):
+    # Login (last_login) e troca de senha não mexem no que o card copia do usuário
+    if update_fields is not None and not {'username', 'first_name', 'last_name'} & set(update_fields):
+        return
+    schema_name = None if created else _user_schema(instance)
+    if not schema_name:
+        return
+    initials = user_initials(instance)
+    with schema_context(schema_name):
+        stale = Task.objects.filter(assigned_to=instance).filter(
+            ~Q(assigned_to_username=instance.username) | ~Q(assigned_to_initials=initials)
+        )
+        Task.update_cards(stale, assigned_to_username=instance.username, assigned_to_initials=initials)
+
+
+@receiver(pre_delete, sender=settings.AUTH_USER_MODEL)
+def clear_assignee_cards(sender, instance, **kwargs):
+    """ O SET_NULL do assigned_to não passa pelo Task.save() """
+    schema_name = _user_schema(instance)
+    if not schema_name:
+        return
+    with schema_context(schema_name):
+        Task.update_cards(
+            Task.objects.filter(assigned_to=instance),
+            assigned_to_username='', assigned_to_initials='',
+        )
+
+
 # --- 7. EVENTOS DO CALENDÁRIO (SIMPLES) ---
 class CalendarEvent(models.Model):
     PLATFORM_CHOICES = [
@@ -342,10 +758,141 @@ class CalendarEvent(models.Model):
     media = models.ImageField(upload_to='posts_media/', blank=True, null=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
+    # Base do ETag/Last-Modified do feed do calendário (projects/calendar_feed.py)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Feed por intervalo: date >= início AND date < fim, ordenado por dia/hora
+            models.Index(fields=['date', 'time'], name='calendarevent_date_idx'),
+        ]
 
     def __str__(self):
         return f"{self.client.name} - {self.date}"
 
+
+# --- 7.1 LINHA DO TEMPO DE CONTEÚDO (mantida pelos sinais abaixo) ---
+class ContentTimelineEntry(models.Model):
+    """
+    Uma linha por conteúdo agendado e destino: eventos do calendário (data + hora)
+    e posts com `scheduled_for` (uma linha por SocialPostDestination).
+    Calendário, "próximos" do dashboard e checagem de conflitos leem só daqui.
+    """
+    SOURCE_CHOICES = [
+        ('calendar', 'Evento do Calendário'),
+        ('post', 'Post Social'),
+    ]
+
+    scheduled_at = models.DateTimeField()
+    client = models.ForeignKey(Client, on_delete=models.CASCADE, null=True, blank=True, related_name='timeline_entries')
+    platform = models.CharField(max_length=50, blank=True)
+    source = models.CharField(max_length=10, choices=SOURCE_CHOICES)
+
+    # Origem da linha (exclusões em cascata removem a linha junto)
+    calendar_event = models.ForeignKey(CalendarEvent, on_delete=models.CASCADE, null=True, blank=True, related_name='timeline_entries')
+    social_post = models.ForeignKey(SocialPost, on_delete=models.CASCADE, null=True, blank=True, related_name='timeline_entries')
+    destination = models.ForeignKey(SocialPostDestination, on_delete=models.CASCADE, null=True, blank=True, related_name='timeline_entries')
+
+    # Cópia do que as listagens exibem
+    title = models.CharField(max_length=200, blank=True)
+    status = models.CharField(max_length=30, blank=True)
+    format_type = models.CharField(max_length=50, blank=True)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['scheduled_at'], name='timeline_scheduled_idx'),
+            # Conflitos: mesmo cliente e plataforma em horários próximos
+            models.Index(fields=['client', 'platform', 'scheduled_at'], name='timeline_conflict_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_source_display()} - {self.scheduled_at:%d/%m/%Y %H:%M}"
+
+
+# --- 7.2 ASSINATURA DO CALENDÁRIO (ICS) ---
+class CalendarFeedToken(models.Model):
+    """
+    Link secreto do feed ICS (apps de calendário assinam a URL).
+    Com cliente: só o conteúdo dele; sem cliente: a agenda toda da agência.
+    """
+    token = models.CharField(max_length=64, unique=True, blank=True)
+    client = models.ForeignKey(Client, on_delete=models.CASCADE, null=True, blank=True, related_name='calendar_feed_tokens')
+    label = models.CharField(max_length=100, blank=True, verbose_name="Descrição")
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def save(self, *args, **kwargs):
+        if not self.token:
+            self.token = secrets.token_urlsafe(32)
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"Feed ICS - {self.client.name if self.client else 'Agência'}"
+
+
+# --- 8. HISTÓRICO DE MÉTRICAS (série temporal, só INSERT) ---
+class MetricSnapshot(models.Model):
+    """
+    Valor acumulado de uma métrica de um destino num instante. Gravado a cada
+    coleta de engajamento e compactado por projects/metric_series.py (um ponto
+    por hora nos últimos 7 dias, um por dia antes disso).
+    """
+    LIKES, COMMENTS, SHARES, VIEWS = 1, 2, 3, 4
+    METRIC_CHOICES = [
+        (LIKES, 'Curtidas'),
+        (COMMENTS, 'Comentários'),
+        (SHARES, 'Compartilhamentos'),
+        (VIEWS, 'Visualizações'),
+    ]
+
+    destination = models.ForeignKey(SocialPostDestination, on_delete=models.CASCADE, related_name='metric_snapshots')
+    metric = models.PositiveSmallIntegerField(choices=METRIC_CHOICES)
+    recorded_at = models.DateTimeField()
+    value = models.IntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['destination', 'metric', 'recorded_at'], name='metricsnapshot_key'),
+        ]
+        indexes = [
+            # Linhas chegam em ordem de tempo: BRIN cobre os intervalos com poucas páginas de índice
+            BrinIndex(fields=['recorded_at'], name='metricsnapshot_time_brin'),
+        ]
+
+    def __str__(self):
+        return f"{self.destination_id} {self.get_metric_display()} {self.recorded_at:%Y-%m-%d %H:%M} = {self.value}"
+
+
+@receiver(post_save, sender=CalendarEvent)
+def sync_calendar_event_timeline(sender, instance, **kwargs):
+    from .timeline import sync_calendar_event
+    sync_calendar_event(instance)
+
+
+@receiver(post_save, sender=SocialPost)
+def sync_social_post_timeline(sender, instance, update_fields=None, **kwargs):
+    from .timeline import sync_social_post
+    # Legenda e mídia aparecem no feed sem estar nas colunas da linha do tempo
+    touch = update_fields is None or bool({'caption', 'media_file'} & set(update_fields))
+    sync_social_post(instance, touch=touch)
+
+
+@receiver(post_save, sender=SocialPostDestination)
+def sync_destination_timeline(sender, instance, **kwargs):
+    from .timeline import sync_social_post
+    sync_social_post(instance.post)
+
+
+@receiver(post_save, sender=Client)
+def touch_client_timeline(sender, instance, created, **kwargs):
+    """ Nome e logo do cliente vão no feed do calendário: muda o ETag das linhas dele """
+    if created:
+        return
+    ContentTimelineEntry.objects.filter(client=instance).update(updated_at=timezone.now())
+
 def client_r2_path(instance, filename):
     
     # Opção B: Se você usa django-tenants e quer o nome do tenant atual:
@@ -0,0 +1,98 @@
+# projects/pagination.py
+"""
+Paginação por cursor (keyset).
+
+Em vez de OFFSET, cada página começa logo depois do último item da página
+anterior, usando as colunas da ordenação. O custo de uma página não depende
+de quantas páginas vieram antes, e inserções no meio não duplicam itens.
+"""
+import base64
+import datetime
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """
+    Datas com microssegundos: o DjangoJSONEncoder corta em milissegundos, e
+    linhas que só diferem abaixo disso seriam puladas ou repetidas entre páginas.
+    """
+
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+def encode_cursor(values):
+    """ Lista de valores da ordenação -> token opaco para a URL """
+    raw = json.dumps(list(values), cls=CursorEncoder, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """ Token -> lista de valores. Levanta ValueError se o token for inválido """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception:
+        raise ValueError("Cursor inválido.")
+    if not isinstance(values, list):
+        raise ValueError("Cursor inválido.")
+    return values
+
+
+def after_cursor(ordering, values):
+    """
+    Monta o filtro "vem depois de `values`" para a ordenação dada.
+    Ex.: ('rank', 'id') -> rank > r OR (rank = r AND id > i)
+    Campos com '-' na frente são decrescentes.
+    """
+    condition = Q()
+    for index, field in enumerate(ordering):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        step = Q(**{f'{name}__{lookup}': values[index]})
+        for previous, value in zip(ordering[:index], values[:index]):
+            step &= Q(**{previous.lstrip('-'): value})
+        condition |= step
+    return condition
+
+
+class KeysetPaginator:
+    """
+    Pagina um queryset pelo cursor. A ordenação precisa terminar em um campo
+    único (normalmente o id) para o cursor ser estável.
+    """
+
+    def __init__(self, queryset, ordering, page_size):
+        self.queryset = queryset.order_by(*ordering)
+        self.ordering = ordering
+        self.page_size = page_size
+
+    def get_page(self, cursor=None):
+        """ Retorna (itens, próximo_cursor). próximo_cursor é None na última página """
+        queryset = self.queryset
+        if cursor:
+            values = decode_cursor(cursor)
+            if len(values) != len(self.ordering):
+                raise ValueError("Cursor inválido.")
+            try:
+                queryset = queryset.filter(after_cursor(self.ordering, values))
+            except (TypeError, ValueError, ValidationError):
+                # Valores do tipo errado (texto no id, objeto no rank...)
+                raise ValueError("Cursor inválido.")
+
+        # Busca um item a mais só para saber se existe próxima página
+        items = list(queryset[:self.page_size + 1])
+        if len(items) <= self.page_size:
+            return items, None
+
+        items = items[:self.page_size]
+        return items, self.cursor_for(items[-1])
+
+    def cursor_for(self, item):
+        return encode_cursor(getattr(item, field.lstrip('-')) for field in self.ordering)
@@ -0,0 +1,322 @@
+# projects/publisher.py
+"""
+Publicação automática dos posts agendados (comando run_publisher).
+
+1. `claim_due_posts`: posts aprovados com horário vencido (índice parcial
+   socialpost_due_idx) são reservados com FOR UPDATE SKIP LOCKED e os destinos
+   deles entram na fila (status 'queued').
+2. `claim_destinations`: destinos prontos (incluindo retentativas vencidas).
+3. Cada destino é publicado em paralelo num ThreadPoolExecutor pelo adaptador
+   da plataforma (sobre MetaService / LinkedInService / TikTokService). As
+   threads só fazem HTTP e as consultas ao limitador de chamadas
+   (projects/http.py); a conexão que isso abre na thread é fechada ao fim de
+   cada tarefa. O resto do acesso ao banco fica na thread principal.
+4. Resultado por destino: publicado, nova tentativa com backoff ou falha.
+   O post fecha como 'published', 'partial' ou 'failed'.
+
+Vídeos para TikTok, YouTube e Reels não passam pelo pool: viram uma
+VideoUploadSession ('uploading') enviada em partes pelos workers da fila
+(projects/video_upload.py), que fecham o destino e o post quando terminam.
+
+Picos (centenas de posts às 09:00) são consumidos em lotes de `batch_size`
+posts, com `max_workers` publicações simultâneas.
+"""
+import logging
+import mimetypes
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from urllib.parse import urlsplit
+
+import requests
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from jobs.queue import backoff_delay
+
+from . import http
+from .models import SocialPost, SocialPostDestination
+from .services import LinkedInService, MetaService, TikTokService
+
+logger = logging.getLogger(__name__)
+
+PUBLISH_MAX_ATTEMPTS = 4
+PUBLISH_BATCH_SIZE = 50
+PUBLISH_MAX_WORKERS = 16
+# Destino em 'publishing' há mais que isso: o publicador caiu no meio. Não
+# republica sozinho (poderia duplicar o post na rede); marca como falha.
+PUBLISH_STALE_AFTER = timedelta(minutes=15)
+# Upload de vídeo sem nenhuma rodada há mais que isso: o job dele se perdeu
+PUBLISH_UPLOAD_STALE_AFTER = timedelta(hours=6)
+# Container do Instagram: a Meta processa a mídia antes do media_publish
+INSTAGRAM_CONTAINER_POLL_SECONDS = 3
+INSTAGRAM_CONTAINER_MAX_WAIT = 120
+
+
+class PublishError(Exception):
+    def __init__(self, message, retryable=False):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+def _check(response):
+    """ Resposta da API -> JSON, ou PublishError (429/5xx podem tentar de novo) """
+    if response.status_code == 429 or response.status_code >= 500:
+        raise PublishError(f"HTTP {response.status_code}: {response.text[:500]}", retryable=True)
+    if response.status_code >= 400:
+        raise PublishError(f"HTTP {response.status_code}: {response.text[:500]}")
+    try:
+        return response.json()
+    except ValueError:
+        return {}
+
+
+class MetaFacebookAdapter:
+    def publish(self, job):
+        response = MetaService().publish_page_post(
+            job['account_id'], job['access_token'], job['caption'], media_url=job['media_url'],
+        )
+        data = _check(response)
+        return data.get('post_id') or data.get('id')
+
+
+def is_video(media_url):
+    mime_type, _ = mimetypes.guess_type(urlsplit(media_url).path)
+    return bool(mime_type and mime_type.startswith('video/'))
+
+
+class MetaInstagramAdapter:
+    MEDIA_TYPES = {'instagram_reel': 'REELS', 'instagram_story': 'STORIES'}
+
+    def publish(self, job):
+        if not job['media_url']:
+            raise PublishError("Instagram exige imagem ou vídeo.")
+        service = MetaService()
+        video = is_video(job['media_url'])
+        # Vídeo fora de story vai para o feed como Reels (a Graph API não tem mais VIDEO)
+        media_type = self.MEDIA_TYPES.get(job['format_type']) or ('REELS' if video else None)
+        container = _check(service.create_instagram_container(
+            job['account_id'], job['access_token'], job['caption'], job['media_url'],
+            media_type=media_type, video=video,
+        ))
+        self.wait_container(service, job, container['id'])
+        data = _check(service.publish_instagram_container(job['account_id'], job['access_token'], container['id']))
+        return data.get('id')
+
+    def wait_container(self, service, job, container_id):
+        """ media_publish antes do FINISHED devolve 'media not ready' (400, parece definitivo) """
+        deadline = time.monotonic() + INSTAGRAM_CONTAINER_MAX_WAIT
+        while True:
+            status = _check(service.get_container_status(container_id, job['access_token'])).get('status_code')
+            if status in ('FINISHED', None):
+                return
+            if status != 'IN_PROGRESS':
+                raise PublishError(f"Instagram não processou a mídia ({status}).")
+            if time.monotonic() >= deadline:
+                # Próxima tentativa cria outro container
+                raise PublishError("Instagram ainda processando a mídia.", retryable=True)
+            time.sleep(INSTAGRAM_CONTAINER_POLL_SECONDS)
+
+
+class LinkedInAdapter:
+    def publish(self, job):
+        response = LinkedInService().publish_post(job['access_token'], job['account_id'], job['caption'])
+        data = _check(response)
+        return response.headers.get('x-restli-id') or data.get('id')
+
+
+class TikTokAdapter:
+    def publish(self, job):
+        if not job['media_url']:
+            raise PublishError("TikTok exige vídeo.")
+        data = _check(TikTokService().publish_video(job['access_token'], job['media_url'], job['caption']))
+        return data.get('data', {}).get('publish_id')
+
+
+ADAPTERS = {
+    'facebook': MetaFacebookAdapter(),
+    'instagram': MetaInstagramAdapter(),
+    'linkedin': LinkedInAdapter(),
+    'tiktok': TikTokAdapter(),
+}
+
+
+def publish_one(job):
+    """
+    Roda na thread do pool: HTTP e o limitador de chamadas.
+    Retorna (destination_id, external_id, erro ou None)
+    """
+    adapter = ADAPTERS.get(job['platform'])
+    try:
+        if adapter is None:
+            raise PublishError(f"Sem publicação automática para {job['platform']}.")
+        return job['destination_id'], adapter.publish(job) or '', None
+    except PublishError as e:
+        return job['destination_id'], '', e
+    except requests.RequestException as e:
+        # Timeout / conexão: vale tentar de novo
+        return job['destination_id'], '', PublishError(str(e), retryable=True)
+    except Exception as e:
+        logger.exception("Erro inesperado publicando destino %s", job['destination_id'])
+        return job['destination_id'], '', PublishError(str(e))
+    finally:
+        http.close_thread_connection()
+
+
+def claim_due_posts(limit=PUBLISH_BATCH_SIZE):
+    """ Reserva posts vencidos e enfileira os destinos deles. Retorna quantos posts """
+    now = timezone.now()
+    with transaction.atomic():
+        post_ids = list(
+            SocialPost.objects
+            .select_for_update(skip_locked=True)
+            .filter(publish_status='pending', approval_status='approved_to_schedule', scheduled_for__lte=now)
+            .order_by('scheduled_for', 'id')
+            .values_list('id', flat=True)[:limit]
+        )
+        if post_ids:
+            # update() direto: não dispara os sinais de save (linha do tempo, métricas)
+            SocialPost.objects.filter(id__in=post_ids).update(publish_status='publishing')
+            SocialPostDestination.objects.filter(post_id__in=post_ids, status='pending').update(
+                status='queued', next_attempt_at=now,
+            )
+            # Posts sem nenhum destino fecham já aqui
+            finish_posts(post_ids)
+    return len(post_ids)
+
+
+def claim_destinations(limit):
+    """ Destinos prontos para publicar (com os dados que as threads precisam, já carregados) """
+    now = timezone.now()
+    with transaction.atomic():
+        destinations = list(
+            SocialPostDestination.objects
+            .select_for_update(skip_locked=True, of=('self',))
+            .filter(status='queued', next_attempt_at__lte=now)
+            .select_related('post', 'account')
+            .order_by('next_attempt_at', 'id')[:limit]
+        )
+        # Em 'publishing', next_attempt_at guarda quando o destino foi reservado
+        SocialPostDestination.objects.filter(id__in=[d.pk for d in destinations]).update(
+            status='publishing', attempts=F('attempts') + 1, next_attempt_at=now,
+        )
+
+    jobs = []
+    for destination in destinations:
+        post = destination.post
+        jobs.append({
+            'destination_id': destination.pk,
+            'post_id': post.pk,
+            'attempts': destination.attempts + 1,
+            'platform': destination.account.platform,
+            'format_type': destination.format_type,
+            'account_id': destination.account.account_id,
+            'access_token': destination.account.access_token,
+            'caption': post.caption,
+            'media_url': post.media_file.url if post.media_file else None,
+        })
+    return jobs
+
+
+# Campos gravados por resultado (um bulk_update por grupo)
+RESULT_FIELDS = {
+    'published': ['status', 'external_id', 'published_at', 'last_error'],
+    'queued': ['status', 'next_attempt_at', 'last_error'],
+    'failed': ['status', 'last_error'],
+}
+
+
+def record_results(results):
+    """ Grava o resultado de cada destino e fecha os posts que não têm mais nada pendente """
+    now = timezone.now()
+    post_ids = set()
+    grouped = {status: [] for status in RESULT_FIELDS}
+    for job, (destination_id, external_id, error) in results:
+        post_ids.add(job['post_id'])
+        if error is None:
+            destination = SocialPostDestination(
+                pk=destination_id, status='published', external_id=external_id, published_at=now, last_error='',
+            )
+        elif error.retryable and job['attempts'] < PUBLISH_MAX_ATTEMPTS:
+            destination = SocialPostDestination(
+                pk=destination_id, status='queued',
+                next_attempt_at=now + timedelta(seconds=backoff_delay(job['attempts'])), last_error=str(error),
+            )
+        else:
+            destination = SocialPostDestination(pk=destination_id, status='failed', last_error=str(error))
+        grouped[destination.status].append(destination)
+
+    with transaction.atomic():
+        for status, destinations in grouped.items():
+            if destinations:
+                SocialPostDestination.objects.bulk_update(destinations, RESULT_FIELDS[status], batch_size=500)
+        finish_posts(post_ids)
+
+
+def finish_posts(post_ids):
+    """ Post sem destinos em andamento: published (todos), failed (nenhum) ou partial """
+    posts = (
+        SocialPost.objects
+        .filter(id__in=post_ids, publish_status='publishing')
+        .annotate(
+            open=Count('socialpostdestination', filter=Q(socialpostdestination__status__in=('pending', 'queued', 'publishing', 'uploading'))),
+            done=Count('socialpostdestination', filter=Q(socialpostdestination__status='published')),
+            total=Count('socialpostdestination'),
+        )
+        .filter(open=0)
+        .values_list('id', 'done', 'total')
+    )
+    now = timezone.now()
+    for post_id, done, total in posts:
+        if total and done == total:
+            SocialPost.objects.filter(pk=post_id).update(publish_status='published', published_at=now)
+        elif done:
+            SocialPost.objects.filter(pk=post_id).update(publish_status='partial', published_at=now)
+        else:
+            SocialPost.objects.filter(pk=post_id).update(publish_status='failed')
+
+
+def fail_stale_destinations():
+    now = timezone.now()
+    stale = SocialPostDestination.objects.filter(
+        Q(status='publishing', next_attempt_at__lt=now - PUBLISH_STALE_AFTER)
+        | Q(status='uploading', upload_session__updated_at__lt=now - PUBLISH_UPLOAD_STALE_AFTER)
+    )
+    post_ids = set(stale.values_list('post_id', flat=True))
+    if post_ids:
+        SocialPostDestination.objects.filter(pk__in=stale.values('pk')).update(
+            status='failed', last_error='Publicação interrompida; confira na rede antes de tentar de novo.',
+        )
+        finish_posts(post_ids)
+    return len(post_ids)
+
+
+def publish_due(executor, batch_size=PUBLISH_BATCH_SIZE, max_workers=PUBLISH_MAX_WORKERS):
+    """
+    Uma rodada no tenant atual: reserva os posts vencidos e publica os destinos
+    prontos em paralelo, lote a lote, até não sobrar nada pronto.
+    Retorna quantos destinos foram processados.
+    """
+    from .video_upload import UPLOADERS, resume_orphaned_uploads, start_uploads
+
+    # Antes de dar como travado: upload de worker que caiu retoma de onde parou
+    resume_orphaned_uploads()
+    fail_stale_destinations()
+    processed = 0
+    while True:
+        claim_due_posts(batch_size)
+        jobs = claim_destinations(max_workers * 4)
+        if not jobs:
+            return processed
+        uploads = [job for job in jobs if job['format_type'] in UPLOADERS and job['media_url']]
+        if uploads:
+            start_uploads(uploads)
+            jobs = [job for job in jobs if not (job['format_type'] in UPLOADERS and job['media_url'])]
+        results = list(zip(jobs, executor.map(publish_one, jobs)))
+        record_results(results)
+        processed += len(jobs) + len(uploads)
+
+
+def make_executor(max_workers=PUBLISH_MAX_WORKERS):
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='publisher')
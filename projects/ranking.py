@@ -0,0 +1,94 @@
+# projects/ranking.py
+"""
+Chaves de ordenação fracionárias (estilo LexoRank) para os cards do Kanban.
+
+Cada card guarda uma string em base 36 ('0'-'9', 'a'-'z') e a coluna é
+ordenada por ordem lexicográfica dessas strings. Para mover um card basta
+gerar uma chave entre as dos vizinhos: só a linha do card movido é gravada.
+As chaves nunca terminam em '0', o que garante que sempre existe espaço
+entre duas chaves diferentes.
+"""
+
+DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+BASE = len(DIGITS)
+
+# Largura mínima usada ao inserir no começo/fim da coluna. Incrementar nessa
+# largura faz as chaves crescerem devagar quando os cards entram sempre no fim.
+EDGE_WIDTH = 4
+
+
+def rank_between(before=None, after=None):
+    """
+    Retorna uma chave estritamente entre `before` e `after`.
+    None significa ponta aberta (início ou fim da coluna).
+    """
+    before = before or ''
+    if after is not None:
+        if not after or before >= after:
+            raise ValueError(f"Não existe chave entre {before!r} e {after!r}.")
+    if before.endswith('0') or (after or '').endswith('0'):
+        raise ValueError("Chaves de ordenação não podem terminar em '0'.")
+
+    # Fim ou começo da coluna: soma/subtrai 1 em vez de dividir o intervalo
+    if before and after is None:
+        return _step(before, 1) or _midpoint(before, None)
+    if not before and after is not None:
+        return _step(after, -1) or _midpoint('', after)
+    return _midpoint(before, after)
+
+
+def _step(key, delta):
+    width = max(len(key), EDGE_WIDTH)
+    value = _to_int(key.ljust(width, '0')) + delta
+    if value <= 0 or value >= BASE ** width:
+        return None
+    return _to_key(value, width)
+
+
+def _midpoint(a, b):
+    # Copia o prefixo comum e resolve o resto recursivamente
+    if b is not None:
+        n = 0
+        while n < len(b) and (a[n] if n < len(a) else '0') == b[n]:
+            n += 1
+        if n > 0:
+            return b[:n] + _midpoint(a[n:], b[n:])
+
+    digit_a = DIGITS.index(a[0]) if a else 0
+    digit_b = DIGITS.index(b[0]) if b is not None else BASE
+
+    if digit_b - digit_a > 1:
+        return DIGITS[(digit_a + digit_b) // 2]
+
+    # Dígitos consecutivos: desce uma casa
+    if b is not None and len(b) > 1:
+        return b[0]
+    return DIGITS[digit_a] + _midpoint(a[1:], None)
+
+
+def spread_ranks(count):
+    """
+    Gera `count` chaves curtas e igualmente espaçadas (usado no rebalanceamento).
+    """
+    width = 1
+    while BASE ** width <= count:
+        width += 1
+    step = BASE ** width // (count + 1)
+
+    return [_to_key(step * position, width) for position in range(1, count + 1)]
+
+
+def _to_int(key):
+    value = 0
+    for char in key:
+        value = value * BASE + DIGITS.index(char)
+    return value
+
+
+def _to_key(value, width):
+    digits = []
+    for _ in range(width):
+        value, remainder = divmod(value, BASE)
+        digits.append(DIGITS[remainder])
+    # Zeros à direita não mudam a ordem e mantêm a invariante
+    return ''.join(reversed(digits)).rstrip('0')
@@ -1,117 +1,77 @@
 # projects/services.py
-import requests
-from django.conf import settings
-from .models import SocialAccount
+import logging
 import urllib.parse
+from datetime import timedelta
 
-class MetaService:
-    BASE_URL = "https://graph.facebook.com/v19.0"
-
-    def get_auth_url(self, state_token):
-        """ Gera a URL para o botão 'Conectar Facebook' """
-        scopes = ",".join(settings.META_SCOPES)
-        return (
-            f"https://www.facebook.com/v19.0/dialog/oauth?"
-            f"client_id={settings.META_APP_ID}&"
-            f"redirect_uri={settings.META_REDIRECT_URI}&"
-            f"state={state_token}&"
-            f"scope={scopes}"
-        )
-
-    def exchange_code_for_token(self, code):
-        """ Troca o código temporário por um User Access Token """
-        url = (
-            f"{self.BASE_URL}/oauth/access_token?"
-            f"client_id={settings.META_APP_ID}&"
-            f"redirect_uri={settings.META_REDIRECT_URI}&"
-            f"client_secret={settings.META_APP_SECRET}&"
-            f"code={code}"
-        )
-        response = requests.get(url)
-        return response.json() # Retorna {access_token, ...}
-
-    def get_user_pages(self, user_access_token, client_obj):
-        """
-        Busca as Páginas do Facebook e Contas do Instagram vinculadas.
-        """
-        print(f"--- DEBUG META START ---")
-        print(f"1. Token Recebido: {user_access_token[:10]}...") # Mostra só o começo por segurança
-        
-        # 1. Busca as páginas que o usuário administra
-        url = f"{self.BASE_URL}/me/accounts?access_token={user_access_token}&fields=id,name,access_token,instagram_business_account"
-        
-        response = requests.get(url)
-        data = response.json()
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
 
-        # ESPIONAGEM AQUI
-        print(f"2. Resposta Bruta do Facebook: {data}")
+from . import http
+from .models import SocialAccount
 
-        if 'data' not in data:
-            print("ERRO CRÍTICO: Campo 'data' não encontrado na resposta.")
-            return []
-        
-        if len(data['data']) == 0:
-            print("ALERTA: O Facebook retornou uma lista de páginas VAZIA. O usuário tem páginas criadas?")
+logger = logging.getLogger(__name__)
+
+# Chamadas de publicação não podem prender o worker do publicador
+PUBLISH_TIMEOUT = 30
+# Envio de uma parte de vídeo (projects/video_upload.py): até alguns MB por chamada
+UPLOAD_CHUNK_TIMEOUT = 120
+
+
+def token_expiry(expires_in):
+    """ `expires_in` (segundos, como as redes devolvem) -> datetime, ou None se não vier """
+    try:
+        return timezone.now() + timedelta(seconds=int(expires_in))
+    except (TypeError, ValueError):
+        return None
+
+
+class MetaAPIError(Exception):
+    def __init__(self, data):
+        super().__init__(data.get('error', {}).get('message', 'Erro desconhecido') if isinstance(data, dict) else data)
+        self.data = data
+
+
+def upsert_social_accounts(client_obj, accounts):
+    """
+    Salva as contas (platform, account_id, account_name, access_token) do cliente
+    em lote: um SELECT das existentes, um bulk_update e um bulk_create,
+    independente de quantas forem.
+    """
+    from .clients import invalidate_client_accounts
+
+    with transaction.atomic():
+        existing = {}
+        for account in SocialAccount.objects.filter(client=client_obj, account_id__in=[row[1] for row in accounts]):
+            existing.setdefault(account.account_id, account)
+
+        saved, to_update, to_create, updated = [], [], [], set()
+        for platform, account_id, account_name, access_token in accounts:
+            account = existing.get(account_id)
+            if account is None:
+                account = SocialAccount(client=client_obj, account_id=account_id)
+                existing[account_id] = account
+                to_create.append(account)
+            elif account.pk not in updated:
+                updated.add(account.pk)
+                to_update.append(account)
+            account.platform = platform
+            account.account_name = account_name
+            account.access_token = access_token
+            account.is_active = True
+            saved.append(account)
+
+        SocialAccount.objects.bulk_update(to_update, ['platform', 'account_name', 'access_token', 'is_active'], batch_size=500)
+        SocialAccount.objects.bulk_create(to_create, batch_size=500)
+        # bulk_* não disparam os sinais de save
+        invalidate_client_accounts()
+    return saved
 
-        saved_accounts = []
-
-        for page in data['data']:
-            print(f"3. Processando Página: {page.get('name')} (ID: {page.get('id')})")
-            
-            try:
-                # --- SALVAR PÁGINA DO FACEBOOK ---
-                fb_account, created = SocialAccount.objects.update_or_create(
-                    account_id=page['id'],
-                    client=client_obj,
-                    defaults={
-                        'platform': 'facebook',
-                        'account_name': page['name'],
-                        'access_token': page['access_token'],
-                        'is_active': True
-                    }
-                )
-                print(f"   -> Facebook Salvo? {created} (ID BD: {fb_account.id})")
-                saved_accounts.append(fb_account)
-
-                # --- SALVAR CONTA DO INSTAGRAM (Se houver) ---
-                if 'instagram_business_account' in page:
-                    ig_data = page['instagram_business_account']
-                    print(f"   -> Instagram Encontrado: {ig_data}")
-                    
-                    ig_info = self.get_instagram_details(ig_data['id'], user_access_token)
-                    
-                    ig_account, created = SocialAccount.objects.update_or_create(
-                        account_id=ig_data['id'],
-                        client=client_obj,
-                        defaults={
-                            'platform': 'instagram',
-                            'account_name': ig_info.get('username', 'Instagram User'),
-                            'access_token': page['access_token'], 
-                            'is_active': True
-                        }
-                    )
-                    print(f"   -> Instagram Salvo? {created}")
-                    saved_accounts.append(ig_account)
-                else:
-                    print("   -> Nenhuma conta de Instagram vinculada a esta página.")
-
-            except Exception as e:
-                print(f"ERRO AO SALVAR NO BANCO: {e}")
-
-        print(f"--- DEBUG META END ---")
-        return saved_accounts
-        
-    def get_instagram_details(self, ig_id, access_token):
-        """ Busca detalhes (username) da conta do Instagram """
-        url = f"{self.BASE_URL}/{ig_id}?fields=username,profile_picture_url&access_token={access_token}"
-        response = requests.get(url)
-        return response.json()# projects/services.py
-import requests
-from django.conf import settings
-from .models import SocialAccount
 
 class MetaService:
     BASE_URL = "https://graph.facebook.com/v19.0"
+    PAGE_FIELDS = "id,name,access_token,instagram_business_account{id,username,profile_picture_url}"
+    PAGE_LIMIT = 100
 
     def get_auth_url(self, state_token):
         """ Gera a URL para o botão 'Conectar Facebook' """
@@ -133,74 +93,116 @@ class MetaService:
             f"client_secret={settings.META_APP_SECRET}&"
             f"code={code}"
         )
-        response = requests.get(url)
+        response = http.get(url, endpoint='meta.oauth_token', rate_limit=('meta', None))
         return response.json() # Retorna {access_token, ...}
 
+    def iter_user_pages(self, user_access_token):
+        """
+        Páginas que o usuário administra, seguindo a paginação por cursor de
+        /me/accounts. O Instagram vinculado vem expandido no mesmo campo (sem
+        uma chamada extra por página).
+        """
+        url = f"{self.BASE_URL}/me/accounts"
+        params = {'access_token': user_access_token, 'fields': self.PAGE_FIELDS, 'limit': self.PAGE_LIMIT}
+        while url:
+            data = http.get(url, params=params, endpoint='meta.accounts', rate_limit=('meta', user_access_token)).json()
+            if 'data' not in data:
+                raise MetaAPIError(data)
+            yield from data['data']
+            # O link 'next' já traz token, campos e cursor
+            url, params = data.get('paging', {}).get('next'), None
+
     def get_user_pages(self, user_access_token, client_obj):
         """
         Busca as Páginas do Facebook e Contas do Instagram vinculadas.
         Salva ou atualiza no banco de dados.
         """
-        # 1. Busca as páginas que o usuário administra
-        url = f"{self.BASE_URL}/me/accounts?access_token={user_access_token}&fields=id,name,access_token,instagram_business_account"
-        
-        response = requests.get(url)
-        data = response.json()
-
-        if 'data' not in data:
-            print("Erro ao buscar páginas:", data)
+        try:
+            pages = list(self.iter_user_pages(user_access_token))
+        except MetaAPIError as e:
+            logger.warning("Erro ao buscar páginas: %s", e.data)
             return []
 
-        saved_accounts = []
-
-        for page in data['data']:
-            # --- SALVAR PÁGINA DO FACEBOOK ---
+        accounts = []
+        for page in pages:
             # O token da página (page_access_token) é vital para postar sem o usuário estar logado
-            fb_account, created = SocialAccount.objects.update_or_create(
-                account_id=page['id'],
-                client=client_obj, # Vincula ao cliente da agência
-                defaults={
-                    'platform': 'facebook',
-                    'account_name': page['name'],
-                    'access_token': page['access_token'], # Token específico da página
-                    'is_active': True
-                }
-            )
-            saved_accounts.append(fb_account)
-
-            # --- SALVAR CONTA DO INSTAGRAM (Se houver) ---
+            accounts.append(('facebook', page['id'], page['name'], page['access_token']))
             if 'instagram_business_account' in page:
                 ig_data = page['instagram_business_account']
-                # Precisamos buscar o nome do Instagram (a lista de pages só dá o ID)
-                ig_info = self.get_instagram_details(ig_data['id'], user_access_token)
-                
-                ig_account, created = SocialAccount.objects.update_or_create(
-                    account_id=ig_data['id'],
-                    client=client_obj,
-                    defaults={
-                        'platform': 'instagram',
-                        'account_name': ig_info.get('username', 'Instagram User'),
-                        # Instagram usa o token do usuário ou da página vinculada
-                        'access_token': page['access_token'], 
-                        'is_active': True
-                    }
-                )
-                saved_accounts.append(ig_account)
-        
-        return saved_accounts
+                # Instagram usa o token da página vinculada
+                accounts.append(('instagram', ig_data['id'], ig_data.get('username', 'Instagram User'), page['access_token']))
+
+        return upsert_social_accounts(client_obj, accounts)
 
     def get_instagram_details(self, ig_id, access_token):
         """ Busca detalhes (username) da conta do Instagram """
         url = f"{self.BASE_URL}/{ig_id}?fields=username,profile_picture_url&access_token={access_token}"
-        response = requests.get(url)
+        response = http.get(url, endpoint='meta.instagram_details', rate_limit=('meta', access_token))
         return response.json()
 
+    def exchange_long_lived_token(self, access_token):
+        """ Token atual -> token de longa duração (~60 dias). Retorna a resposta HTTP """
+        params = {
+            'grant_type': 'fb_exchange_token',
+            'client_id': settings.META_APP_ID,
+            'client_secret': settings.META_APP_SECRET,
+            'fb_exchange_token': access_token,
+        }
+        return http.get(f"{self.BASE_URL}/oauth/access_token", params=params, endpoint='meta.long_lived_token', rate_limit=('meta', None))
+
+    def get_objects(self, ids, access_token, fields):
+        """ Vários objetos numa chamada só (?ids=, até 50). Retorna a resposta HTTP """
+        params = {'ids': ','.join(ids), 'fields': fields, 'access_token': access_token}
+        return http.get(f"{self.BASE_URL}/", params=params, endpoint='meta.objects', rate_limit=('meta', access_token))
+
+    # --- PUBLICAÇÃO (usado por projects/publisher.py) ---
+    def publish_page_post(self, page_id, access_token, message, media_url=None):
+        """ Post na Página do Facebook (com foto, se houver mídia). Retorna a resposta HTTP """
+        if media_url:
+            url = f"{self.BASE_URL}/{page_id}/photos"
+            data = {'url': media_url, 'caption': message, 'access_token': access_token}
+        else:
+            url = f"{self.BASE_URL}/{page_id}/feed"
+            data = {'message': message, 'access_token': access_token}
+        return http.post(url, data=data, timeout=PUBLISH_TIMEOUT, endpoint='meta.page_post', rate_limit=('meta', access_token))
+
+    def create_instagram_container(self, ig_id, access_token, caption, media_url, media_type=None, video=False):
+        """ 1ª etapa do Instagram: cria o container da mídia """
+        data = {'caption': caption, 'access_token': access_token}
+        if media_type:
+            # REELS leva vídeo; STORIES, vídeo ou imagem
+            data['media_type'] = media_type
+        data['video_url' if video or media_type == 'REELS' else 'image_url'] = media_url
+        return http.post(f"{self.BASE_URL}/{ig_id}/media", data=data, timeout=PUBLISH_TIMEOUT, endpoint='meta.instagram_container', rate_limit=('meta', access_token))
+
+    def publish_instagram_container(self, ig_id, access_token, creation_id):
+        """ 2ª etapa do Instagram: publica o container criado """
+        data = {'creation_id': creation_id, 'access_token': access_token}
+        return http.post(f"{self.BASE_URL}/{ig_id}/media_publish", data=data, timeout=PUBLISH_TIMEOUT, endpoint='meta.instagram_publish', rate_limit=('meta', access_token))
+
+    # --- REELS EM PARTES (usado por projects/video_upload.py) ---
+    def create_reels_upload(self, ig_id, access_token, caption):
+        """ Container REELS com upload retomável: devolve `id` e a `uri` do rupload """
+        data = {'media_type': 'REELS', 'upload_type': 'resumable', 'caption': caption, 'access_token': access_token}
+        return http.post(f"{self.BASE_URL}/{ig_id}/media", data=data, timeout=PUBLISH_TIMEOUT, endpoint='meta.reels_container', rate_limit=('meta', access_token))
+
+    def upload_reels_chunk(self, upload_uri, access_token, offset, total, data):
+        """ Uma parte do vídeo para o rupload, a partir de `offset` (sem nova tentativa aqui) """
+        headers = {'Authorization': f'OAuth {access_token}', 'offset': str(offset), 'file_size': str(total)}
+        return http.post(upload_uri, data=data, headers=headers, timeout=UPLOAD_CHUNK_TIMEOUT, retries=0, endpoint='meta.reels_upload')
+
+    def get_container_status(self, container_id, access_token):
+        """ status_code (IN_PROGRESS, FINISHED, ERROR...) e bytes recebidos (video_status) """
+        params = {'fields': 'status_code,video_status', 'access_token': access_token}
+        return http.get(f"{self.BASE_URL}/{container_id}", params=params, endpoint='meta.container_status', rate_limit=('meta', access_token))
+
 
 class LinkedInService:
     # URLs Oficiais
     AUTH_URL = "https://www.linkedin.com/oauth/v2/authorization"
     TOKEN_URL = "https://www.linkedin.com/oauth/v2/accessToken"
     USER_INFO_URL = "https://api.linkedin.com/v2/userinfo"
+    API_URL = "https://api.linkedin.com"
 
     def get_auth_url(self, state_token):
         """ Gera a URL do botão 'Conectar LinkedIn' """
@@ -225,13 +227,24 @@ class LinkedInService:
         }
         headers = {'Content-Type': 'application/x-www-form-urlencoded'}
         
-        response = requests.post(self.TOKEN_URL, data=payload, headers=headers)
+        response = http.post(self.TOKEN_URL, data=payload, headers=headers, endpoint='linkedin.oauth_token', rate_limit=('linkedin', None))
         return response.json()
 
+    def refresh_access_token(self, refresh_token):
+        """ Novo access token (60 dias) a partir do refresh token. Retorna a resposta HTTP """
+        payload = {
+            'grant_type': 'refresh_token',
+            'refresh_token': refresh_token,
+            'client_id': settings.LINKEDIN_CLIENT_ID,
+            'client_secret': settings.LINKEDIN_CLIENT_SECRET,
+        }
+        headers = {'Content-Type': 'application/x-www-form-urlencoded'}
+        return http.post(self.TOKEN_URL, data=payload, headers=headers, endpoint='linkedin.refresh_token', rate_limit=('linkedin', None))
+
     def get_user_profile(self, access_token):
         """ Busca dados do usuário (Nome, Foto, Sub/ID) """
         headers = {'Authorization': f'Bearer {access_token}'}
-        response = requests.get(self.USER_INFO_URL, headers=headers)
+        response = http.get(self.USER_INFO_URL, headers=headers, endpoint='linkedin.userinfo', rate_limit=('linkedin', access_token))
         return response.json()
 
     def save_account(self, token_data, client_obj):
@@ -259,17 +272,48 @@ class LinkedInService:
                 'platform': 'linkedin',
                 'account_name': name,
                 'access_token': access_token,
-                # O token do LinkedIn dura 60 dias, depois precisa renovar
+                # O token do LinkedIn dura 60 dias; o refresh_token_accounts renova antes
+                'refresh_token': token_data.get('refresh_token'),
+                'token_expires_at': token_expiry(token_data.get('expires_in')),
                 'is_active': True 
             }
         )
         return account
 
+    def get_social_actions(self, access_token, urns):
+        """ Curtidas/comentários de vários posts (BATCH_GET). Retorna a resposta HTTP """
+        ids = ','.join(urllib.parse.quote(urn, safe='') for urn in urns)
+        headers = {'Authorization': f'Bearer {access_token}', 'X-Restli-Protocol-Version': '2.0.0'}
+        return http.get(
+            f"{self.API_URL}/v2/socialActions?ids=List({ids})", headers=headers,
+            endpoint='linkedin.social_actions', rate_limit=('linkedin', access_token),
+        )
+
+    def publish_post(self, access_token, author_id, text):
+        """ Post de texto no perfil (author_id = 'sub' salvo em SocialAccount.account_id) """
+        payload = {
+            'author': f"urn:li:person:{author_id}",
+            'lifecycleState': 'PUBLISHED',
+            'specificContent': {
+                'com.linkedin.ugc.ShareContent': {
+                    'shareCommentary': {'text': text},
+                    'shareMediaCategory': 'NONE',
+                },
+            },
+            'visibility': {'com.linkedin.ugc.MemberNetworkVisibility': 'PUBLIC'},
+        }
+        headers = {'Authorization': f'Bearer {access_token}', 'X-Restli-Protocol-Version': '2.0.0'}
+        return http.post(
+            f"{self.API_URL}/v2/ugcPosts", json=payload, headers=headers,
+            timeout=PUBLISH_TIMEOUT, endpoint='linkedin.ugc_post', rate_limit=('linkedin', access_token),
+        )
+
 class TikTokService:
     # Endpoints da API V2 do TikTok
     AUTH_URL = "https://www.tiktok.com/v2/auth/authorize/"
     TOKEN_URL = "https://open.tiktokapis.com/v2/oauth/token/"
     USER_INFO_URL = "https://open.tiktokapis.com/v2/user/info/"
+    API_URL = "https://open.tiktokapis.com"
     
     def get_auth_url(self, state_token):
         """
@@ -313,17 +357,29 @@ class TikTokService:
             "Cache-Control": "no-cache"
         }
 
+        response = None
         try:
-            response = requests.post(self.TOKEN_URL, data=data, headers=headers)
+            response = http.post(self.TOKEN_URL, data=data, headers=headers, endpoint='tiktok.oauth_token', rate_limit=('tiktok', None))
             response.raise_for_status() # Levanta erro se não for 200 OK
             return response.json() # Retorna o JSON com access_token e open_id
             
-        except requests.exceptions.RequestException as e:
+        except http.RequestException as e:
             print(f"❌ Erro ao obter token do TikTok: {e}")
             if response is not None:
                 print(f"Detalhes do erro: {response.text}")
             return None
 
+    def refresh_access_token(self, refresh_token):
+        """ Novo access token (24h) e, às vezes, novo refresh token. Retorna a resposta HTTP """
+        data = {
+            "client_key": settings.TIKTOK_CLIENT_KEY,
+            "client_secret": settings.TIKTOK_CLIENT_SECRET,
+            "grant_type": "refresh_token",
+            "refresh_token": refresh_token,
+        }
+        headers = {"Content-Type": "application/x-www-form-urlencoded"}
+        return http.post(self.TOKEN_URL, data=data, headers=headers, endpoint='tiktok.refresh_token', rate_limit=('tiktok', None))
+
     def get_user_info(self, access_token):
         """
         (Opcional) Busca nome e foto do usuário para salvar no banco.
@@ -339,7 +395,7 @@ class TikTokService:
         }
 
         try:
-            response = requests.get(self.USER_INFO_URL, params=params, headers=headers)
+            response = http.get(self.USER_INFO_URL, params=params, headers=headers, endpoint='tiktok.userinfo', rate_limit=('tiktok', access_token))
             if response.status_code == 200:
                 data = response.json().get('data', {})
                 return {
@@ -349,4 +405,81 @@ class TikTokService:
             return None
         except Exception as e:
             print(f"Erro ao buscar info do usuário: {e}")
-            return None
\ No newline at end of file
+            return None
+
+    def publish_video(self, access_token, video_url, caption):
+        """ Content Posting API: o TikTok baixa o vídeo da URL (PULL_FROM_URL) """
+        payload = {
+            'post_info': {'title': caption[:2200], 'privacy_level': 'PUBLIC_TO_EVERYONE'},
+            'source_info': {'source': 'PULL_FROM_URL', 'video_url': video_url},
+        }
+        headers = {'Authorization': f'Bearer {access_token}', 'Content-Type': 'application/json; charset=UTF-8'}
+        return http.post(
+            f"{self.API_URL}/v2/post/publish/video/init/", json=payload, headers=headers,
+            timeout=PUBLISH_TIMEOUT, endpoint='tiktok.video_init', rate_limit=('tiktok', access_token),
+        )
+
+    def init_video_upload(self, access_token, caption, video_size, chunk_size, total_chunk_count):
+        """ Content Posting API com FILE_UPLOAD: devolve `publish_id` e a `upload_url` das partes """
+        payload = {
+            'post_info': {'title': caption[:2200], 'privacy_level': 'PUBLIC_TO_EVERYONE'},
+            'source_info': {
+                'source': 'FILE_UPLOAD',
+                'video_size': video_size,
+                'chunk_size': chunk_size,
+                'total_chunk_count': total_chunk_count,
+            },
+        }
+        headers = {'Authorization': f'Bearer {access_token}', 'Content-Type': 'application/json; charset=UTF-8'}
+        return http.post(
+            f"{self.API_URL}/v2/post/publish/video/init/", json=payload, headers=headers,
+            timeout=PUBLISH_TIMEOUT, endpoint='tiktok.video_upload_init', rate_limit=('tiktok', access_token),
+        )
+
+    def upload_video_chunk(self, upload_url, start, total, data):
+        """ PUT de uma parte (bytes start..start+len-1). 206 = parte recebida, 201 = vídeo completo """
+        headers = {
+            'Content-Type': 'video/mp4',
+            'Content-Range': f'bytes {start}-{start + len(data) - 1}/{total}',
+        }
+        return http.request(
+            'PUT', upload_url, data=data, headers=headers,
+            timeout=UPLOAD_CHUNK_TIMEOUT, retries=0, endpoint='tiktok.video_upload',
+        )
+
+
+class YouTubeService:
+    """ Upload retomável da YouTube Data API v3 (token OAuth da conta do canal) """
+    UPLOAD_URL = "https://www.googleapis.com/upload/youtube/v3/videos"
+
+    def start_upload(self, access_token, title, description, total):
+        """ Abre a sessão de upload: a URL dela vem no cabeçalho Location """
+        payload = {
+            'snippet': {'title': title[:100], 'description': description[:5000]},
+            'status': {'privacyStatus': 'public', 'selfDeclaredMadeForKids': False},
+        }
+        headers = {
+            'Authorization': f'Bearer {access_token}',
+            'X-Upload-Content-Length': str(total),
+            'X-Upload-Content-Type': 'video/*',
+        }
+        return http.post(
+            self.UPLOAD_URL, params={'uploadType': 'resumable', 'part': 'snippet,status'}, json=payload, headers=headers,
+            timeout=PUBLISH_TIMEOUT, endpoint='youtube.upload_start', rate_limit=('youtube', access_token),
+        )
+
+    def upload_chunk(self, session_url, access_token, start, total, data):
+        """ Uma parte (múltiplo de 256 KiB, exceto a última). 308 = incompleto, 200/201 = vídeo criado """
+        headers = {
+            'Authorization': f'Bearer {access_token}',
+            'Content-Range': f'bytes {start}-{start + len(data) - 1}/{total}',
+        }
+        return http.request(
+            'PUT', session_url, data=data, headers=headers,
+            timeout=UPLOAD_CHUNK_TIMEOUT, retries=0, endpoint='youtube.upload_chunk',
+        )
+
+    def query_upload(self, session_url, access_token, total):
+        """ Quanto a sessão já recebeu: 308 com o cabeçalho Range (ou 200/201 se já terminou) """
+        headers = {'Authorization': f'Bearer {access_token}', 'Content-Range': f'bytes */{total}'}
+        return http.request('PUT', session_url, data=b'', headers=headers, endpoint='youtube.upload_status')
@@ -0,0 +1,213 @@
+# projects/stats.py
+"""
+Números do dashboard e métricas por cliente, calculados em poucas queries
+agrupadas e guardados em cache (por tenant / por cliente). Os receivers em
+projects/models.py descartam o cache quando Task, Project ou SocialPost mudam.
+O cache é a tabela compartilhada de settings.CACHES: a invalidação feita pelo
+publicador ou pela coleta de engajamento vale também para os workers web.
+"""
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Case, CharField, Count, F, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Project, SocialPost, Task
+
+# Status que contam como "concluído" nos dois quadros
+COMPLETED_TASK_STATUSES = ('done', 'published')
+
+DASHBOARD_STATS_TIMEOUT = 60 * 2
+
+
+def dashboard_stats_key(schema_name):
+    return f"dashboard-stats:{schema_name}"
+
+
+def invalidate_dashboard_stats(schema_name=None):
+    key = dashboard_stats_key(schema_name or connection.schema_name)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def _grouped_counts(queryset, kind, key):
+    """ SELECT 'kind', key, COUNT(*) ... GROUP BY key — para juntar vários modelos num UNION """
+    return (
+        queryset
+        .order_by()
+        .annotate(kind=Value(kind, output_field=CharField()), key=key)
+        .values('kind', 'key')
+        .annotate(total=Count('id'))
+    )
+
+
+class DashboardStatsService:
+    """
+    Todos os contadores do dashboard em uma query (UNION de contagens agrupadas
+    de Task, Project e SocialPost), com cache curto por tenant.
+    """
+
+    def __init__(self, schema_name=None):
+        self.schema_name = schema_name or connection.schema_name
+
+    def get(self):
+        key = dashboard_stats_key(self.schema_name)
+        stats = cache.get(key)
+        if stats is None:
+            stats = self.compute()
+            cache.set(key, stats, DASHBOARD_STATS_TIMEOUT)
+        return stats
+
+    def compute(self):
+        now = timezone.now()
+        post_bucket = Case(
+            When(scheduled_for__gte=now, then=Value('scheduled')),
+            When(scheduled_for__lt=now, then=Value('published')),
+            default=Value('unscheduled'),
+            output_field=CharField(),
+        )
+        rows = _grouped_counts(Task.objects.filter(archived_at__isnull=True), 'task', F('status')).union(
+            _grouped_counts(Project.objects.all(), 'project', F('status')),
+            _grouped_counts(SocialPost.objects.all(), 'post', post_bucket),
+            all=True,
+        )
+
+        counts = {'task': {}, 'project': {}, 'post': {}}
+        for row in rows:
+            counts[row['kind']][row['key']] = row['total']
+
+        tasks = counts['task']
+        completed = sum(tasks.get(status, 0) for status in COMPLETED_TASK_STATUSES)
+        total = sum(tasks.values())
+
+        return {
+            'project_count': counts['project'].get('em_andamento', 0),
+            'pending_tasks_count': total - completed,
+            'completed_tasks_count': completed,
+            'total_tasks': total,
+            'completion_percent': round(completed / total * 100) if total else 0,
+            'chart_status_data': tasks,
+            'posts_metrics': {
+                'scheduled': counts['post'].get('scheduled', 0),
+                'published': counts['post'].get('published', 0),
+                'pending_approval': tasks.get('client_approval', 0),
+            },
+        }
+
+
+# --- MÉTRICAS POR CLIENTE ---
+CLIENT_METRICS_TIMEOUT = 60 * 15
+
+
+def client_metrics_key(schema_name, client_id):
+    return f"client-metrics:{schema_name}:{client_id}"
+
+
+def invalidate_client_metrics(client_ids, schema_name=None):
+    keys = [client_metrics_key(schema_name or connection.schema_name, pk) for pk in set(client_ids) if pk]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def task_client_ids(task_ids):
+    """ Clientes dos cards (pelo projeto ou, nos avulsos, pelo post) """
+    return set(
+        Task.objects
+        .filter(id__in=task_ids)
+        .values_list(Coalesce('project__client_id', 'social_post__client_id'), flat=True)
+    )
+
+
+class ClientMetricsService:
+    """
+    Métricas de vários clientes de uma vez: 3 queries agrupadas por cliente
+    (cards por status, posts por status com as somas de engajamento e
+    projetos), não importa quantos clientes. Cada cliente fica em cache até
+    um Task/SocialPost/Project dele mudar.
+    """
+
+    def __init__(self, schema_name=None):
+        self.schema_name = schema_name or connection.schema_name
+
+    def get(self, client_id):
+        return self.get_many([client_id])[client_id]
+
+    def get_many(self, client_ids):
+        client_ids = list(dict.fromkeys(int(pk) for pk in client_ids))
+        keys = {client_metrics_key(self.schema_name, pk): pk for pk in client_ids}
+
+        cached = cache.get_many(list(keys))
+        metrics = {keys[key]: value for key, value in cached.items()}
+
+        missing = [pk for pk in client_ids if pk not in metrics]
+        if missing:
+            computed = self.compute(missing)
+            cache.set_many(
+                {client_metrics_key(self.schema_name, pk): value for pk, value in computed.items()},
+                CLIENT_METRICS_TIMEOUT,
+            )
+            metrics.update(computed)
+        return metrics
+
+    def compute(self, client_ids):
+        metrics = {
+            pk: {
+                'task_chart_data': {},
+                'post_chart_data': {},
+                'total_projects': 0,
+                'total_tasks': 0,
+                'total_posts': 0,
+                'total_likes': 0,
+                'total_comments': 0,
+                'total_shares': 0,
+                'total_views': 0,
+            }
+            for pk in client_ids
+        }
+
+        # Card do cliente = pelo projeto ou, sem projeto, pelo post
+        tasks = (
+            Task.objects
+            .order_by()
+            .annotate(client_id=Coalesce('project__client_id', 'social_post__client_id'))
+            .filter(client_id__in=client_ids)
+            .values('client_id', 'status')
+            .annotate(total=Count('id'))
+        )
+        for row in tasks:
+            item = metrics[row['client_id']]
+            item['task_chart_data'][row['status']] = row['total']
+            item['total_tasks'] += row['total']
+
+        posts = (
+            SocialPost.objects
+            .order_by()
+            .filter(client_id__in=client_ids)
+            .values('client_id', 'approval_status')
+            .annotate(
+                total=Count('id'),
+                likes=Sum('likes_count'),
+                comments=Sum('comments_count'),
+                shares=Sum('shares_count'),
+                views=Sum('views_count'),
+            )
+        )
+        for row in posts:
+            item = metrics[row['client_id']]
+            item['post_chart_data'][row['approval_status']] = row['total']
+            item['total_posts'] += row['total']
+            item['total_likes'] += row['likes'] or 0
+            item['total_comments'] += row['comments'] or 0
+            item['total_shares'] += row['shares'] or 0
+            item['total_views'] += row['views'] or 0
+
+        projects = (
+            Project.objects
+            .order_by()
+            .filter(client_id__in=client_ids)
+            .values('client_id')
+            .annotate(total=Count('id'))
+        )
+        for row in projects:
+            metrics[row['client_id']]['total_projects'] = row['total']
+
+        return metrics
@@ -0,0 +1,23 @@
+# projects/tasks.py
+""" Jobs do app (jobs/queue.py) """
+from jobs.queue import job
+
+from . import media_files, video_upload
+
+
+@job('projects.upload_video', max_attempts=3)
+def upload_video(session_id):
+    """ Uma rodada do envio em partes; reenfileira a si mesmo até terminar """
+    return video_upload.upload_video(session_id)
+
+
+@job('projects.store_media_file', max_attempts=5)
+def store_media_file(folder_id, staged_name, file_name):
+    """ Upload da galeria: da área de espera para o R2 """
+    return media_files.store_media_file(folder_id, staged_name, file_name)
+
+
+@job('projects.build_media_zip', max_attempts=2)
+def build_media_zip(file_ids):
+    """ Download em lote: ZIP no R2, a URL vai no resultado do job """
+    return media_files.build_media_zip(file_ids)
@@ -1,3 +1,1180 @@
-from django.test import TestCase
+import asyncio
+import datetime
+import json
+import tempfile
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from urllib.parse import urlsplit
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django_tenants.test.cases import TenantTestCase
+
+from accounts.models import CustomUser
+from jobs import ratelimit
+from jobs.queue import claim_jobs, run_job
+from . import engagement, http, media_files, video_upload
+from .events import InProcessBroker, SUBSCRIBER_QUEUE_SIZE
+from .kanban import KanbanBoardService, apply_bulk_operation, move_task
+from .calendar_feed import _ics_line, _ics_text, parse_range
+from .engagement import due_destinations, fetch_account, meta_usage, sync_engagement
+from .pagination import KeysetPaginator, decode_cursor, encode_cursor
+from .metric_series import downsample_snapshots, downsample_snapshots_if_due, metric_series, parse_series_params
+from .clients import client_accounts_map_json, client_listing_queryset
+from .models import CalendarEvent, CalendarFeedToken, Client, ContentTimelineEntry, KanbanTombstone, MediaFolder, MetricSnapshot, Project, SocialAccount, SocialPost, SocialPostDestination, Task, VideoUploadSession
+from . import publisher
+from .publisher import MetaInstagramAdapter, make_executor, publish_due
+from .ranking import rank_between, spread_ranks
+from .services import LinkedInService, MetaService, TikTokService, YouTubeService, upsert_social_accounts
+from .stats import ClientMetricsService, DashboardStatsService
+from .token_refresh import make_executors as make_token_executors, refresh_tokens
+from .views import calendar_ics_feed, client_list_create, download_batch, get_calendar_events, social_dashboard, upload_photo_api
+
+
+# As contagens de queries medem o serviço, não o cache: em produção ele fica
+# numa tabela compartilhada (DatabaseCache), que somaria as próprias leituras
+LOCAL_CACHE = override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+
+
+class KanbanBoardServiceTests(TenantTestCase):
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='designer', first_name='Ana', last_name='Souza')
+        self.client_obj = Client.objects.create(name='Cliente Teste')
+        self.project = Project.objects.create(name='Projeto Teste', client=self.client_obj)
+
+    def _create_cards(self, count):
+        statuses = ['briefing', 'copy', 'design', 'published']
+        for i in range(count):
+            post = SocialPost.objects.create(client=self.client_obj)
+            Task.objects.create(
+                kanban_type='operational',
+                status=statuses[i % len(statuses)],
+                title=f'Card {i}',
+                project=self.project if i % 2 else None,
+                social_post=post,
+                assigned_to=self.user,
+            )
+
+    def _build_in_one_query(self):
+        # 1 query da versão do quadro + 1 query dos cards
+        with self.assertNumQueries(2):
+            return KanbanBoardService('operational').build()
+
+    def test_query_count_does_not_grow_with_board_size(self):
+        self._create_cards(4)
+        self._build_in_one_query()
+
+        self._create_cards(40)
+        board = self._build_in_one_query()
+
+        self.assertEqual(sum(len(cards) for cards in board.values()), 44)
+
+    def test_cards_are_grouped_by_status_in_board_order(self):
+        self._create_cards(8)
+        board = self._build_in_one_query()
+
+        self.assertEqual(list(board), [key for key, _ in KanbanBoardService('operational').stages])
+        self.assertEqual([card['title'] for card in board['briefing']], ['Card 0', 'Card 4'])
+        self.assertEqual(board['briefing'][0]['project_name'], 'Cliente: Cliente Teste')
+        self.assertEqual(board['copy'][0]['project_name'], 'Projeto Teste')
+        self.assertEqual(board['copy'][0]['assigned_to_initials'], 'AS')
+
+    def test_paginated_board_pages_through_each_column(self):
+        self._create_cards(12)
+
+        board_service = KanbanBoardService('operational', page_size=2)
+        with self.assertNumQueries(2):
+            board = board_service.build()
+
+        self.assertEqual([card['title'] for card in board['briefing']], ['Card 0', 'Card 4'])
+        self.assertEqual(board_service.totals['briefing'], 3)
+        self.assertIsNotNone(board_service.cursors['briefing'])
+        self.assertIsNone(board_service.cursors['internal_approval'])
+
+        cards, next_cursor = board_service.column_page('briefing', board_service.cursors['briefing'], page_size=2)
+        self.assertEqual([card['title'] for card in cards], ['Card 8'])
+        self.assertIsNone(next_cursor)
+
+
+class RankingTests(SimpleTestCase):
+
+    def test_rank_between_keeps_order(self):
+        keys = [rank_between()]
+        for i in range(300):
+            # Alterna inserções no começo, no meio e no fim da coluna
+            position = [0, len(keys) // 2, len(keys)][i % 3]
+            before = keys[position - 1] if position > 0 else None
+            after = keys[position] if position < len(keys) else None
+            keys.insert(position, rank_between(before, after))
+
+        self.assertEqual(keys, sorted(keys))
+        self.assertEqual(len(set(keys)), len(keys))
+
+    def test_appending_keeps_keys_short(self):
+        rank = None
+        for _ in range(1000):
+            rank = rank_between(rank, None)
+        self.assertLessEqual(len(rank), 4)
+
+    def test_rank_between_rejects_equal_neighbours(self):
+        with self.assertRaises(ValueError):
+            rank_between('i', 'i')
+
+    def test_spread_ranks(self):
+        ranks = spread_ranks(500)
+        self.assertEqual(ranks, sorted(ranks))
+        self.assertEqual(len(set(ranks)), 500)
+        self.assertTrue(all(len(rank) <= 2 for rank in ranks))
+
+
+class MoveTaskTests(TenantTestCase):
+
+    def setUp(self):
+        self.tasks = [Task.objects.create(kanban_type='general', status='todo', title=f'T{i}') for i in range(5)]
+
+    def _column(self, status='todo'):
+        return list(Task.objects.filter(kanban_type='general', status=status).values_list('title', flat=True))
+
+    def test_move_writes_only_the_moved_row(self):
+        first, second, third, fourth, last = self.tasks
+
+        with CaptureQueriesContext(connection) as queries:
+            move_task(last, 'todo', prev_id=first.id, next_id=second.id)
+
+        task_updates = [q['sql'] for q in queries if q['sql'].startswith('UPDATE "projects_task"')]
+        self.assertEqual(len(task_updates), 1)
+
+        self.assertEqual(self._column(), ['T0', 'T4', 'T1', 'T2', 'T3'])
+
+    def test_move_to_another_column(self):
+        move_task(self.tasks[2], 'done')
+        move_task(self.tasks[0], 'done', prev_id=None, next_id=self.tasks[2].id)
+
+        self.assertEqual(self._column('done'), ['T0', 'T2'])
+        self.assertEqual(self._column(), ['T1', 'T3', 'T4'])
+
+    def test_duplicate_neighbour_ranks_are_rebalanced(self):
+        Task.objects.filter(id__in=[self.tasks[0].id, self.tasks[1].id]).update(rank='i')
+
+        move_task(self.tasks[4], 'todo', prev_id=self.tasks[0].id, next_id=self.tasks[1].id)
+
+        self.assertEqual(self._column()[:3], ['T0', 'T4', 'T1'])
+
+    def test_repeated_inserts_into_one_gap_fit_the_column(self):
+        first, second = self.tasks[0], self.tasks[1]
+        next_id = second.id
+        for i in range(400):
+            task = Task.objects.create(kanban_type='general', status='doing', title=f'N{i}')
+            move_task(task, 'todo', prev_id=first.id, next_id=next_id)
+            next_id = task.id
+
+        ranks = list(Task.objects.filter(kanban_type='general', status='todo').values_list('rank', flat=True))
+        self.assertTrue(all(len(rank) <= 64 for rank in ranks))
+        column = self._column()
+        self.assertEqual(column[:2], ['T0', 'N399'])
+        self.assertEqual(column[-5:], ['N0', 'T1', 'T2', 'T3', 'T4'])
+
+
+class KanbanChangesTests(TenantTestCase):
+
+    def setUp(self):
+        self.board = KanbanBoardService('general')
+        self.tasks = [Task.objects.create(kanban_type='general', status='todo', title=f'T{i}') for i in range(3)]
+
+    def test_nothing_changed_since_current_version(self):
+        self.board.build()
+        self.assertIsNone(self.board.changes(self.board.version))
+
+    def test_changes_return_only_touched_and_deleted_cards(self):
+        self.board.build()
+        since = self.board.version
+
+        move_task(self.tasks[0], 'done')
+        self.tasks[1].delete()
+
+        changes = self.board.changes(since)
+        self.assertFalse(changes['reset'])
+        self.assertEqual([card['id'] for card in changes['changed']], [self.tasks[0].id])
+        self.assertEqual(changes['deleted'], [self.tasks[1].id])
+        self.assertIsNone(self.board.changes(changes['version']))
+
+    def test_other_board_does_not_bump_version(self):
+        self.board.build()
+        Task.objects.create(kanban_type='operational', status='briefing', title='Outro quadro')
+        self.assertIsNone(self.board.changes(self.board.version))
+
+
+class CursorTests(SimpleTestCase):
+
+    def test_datetimes_keep_microseconds(self):
+        moment = datetime.datetime(2026, 3, 1, 9, 0, 0, 123456, tzinfo=datetime.timezone.utc)
+        values = decode_cursor(encode_cursor([moment, 7]))
+        self.assertEqual((datetime.datetime.fromisoformat(values[0]), values[1]), (moment, 7))
+
+    def test_wrongly_typed_values_are_invalid_cursors(self):
+        paginator = KeysetPaginator(Task.objects.all(), ('rank', 'id'), 10)
+        for values in (['a', 'abc'], ['a', {'x': 1}], [None, [1]]):
+            with self.assertRaisesMessage(ValueError, "Cursor inválido."):
+                paginator.get_page(encode_cursor(values))
+
+
+class InProcessBrokerTests(SimpleTestCase):
+
+    def test_publish_from_another_thread_reaches_subscriber(self):
+        broker = InProcessBroker()
+
+        async def scenario():
+            queue = broker.subscribe('kanban.agencia.general')
+            other = broker.subscribe('kanban.outra.general')
+
+            thread = threading.Thread(target=broker.publish, args=('kanban.agencia.general', {'type': 'task.moved'}))
+            thread.start()
+            thread.join()
+
+            message = await asyncio.wait_for(queue.get(), 1)
+            broker.unsubscribe('kanban.agencia.general', queue)
+            return message, other.empty()
+
+        message, other_is_empty = asyncio.run(scenario())
+        self.assertEqual(message, {'type': 'task.moved'})
+        self.assertTrue(other_is_empty)
+        self.assertNotIn('kanban.agencia.general', broker._subscribers)
+
+    def test_slow_subscriber_gets_resync(self):
+        broker = InProcessBroker()
+
+        async def scenario():
+            queue = broker.subscribe('kanban.agencia.general')
+            for i in range(SUBSCRIBER_QUEUE_SIZE + 1):
+                broker.publish('kanban.agencia.general', {'type': 'task.moved', 'version': i})
+            await asyncio.sleep(0)
+            return [queue.get_nowait() for _ in range(queue.qsize())]
+
+        self.assertEqual(asyncio.run(scenario()), [{'type': 'resync'}])
+
+
+@LOCAL_CACHE
+class KanbanSnapshotTests(TenantTestCase):
+
+    def setUp(self):
+        cache.clear()
+        Task.objects.create(kanban_type='general', status='todo', title='Primeiro')
+
+    def _snapshot(self):
+        return KanbanBoardService('general', page_size=50).snapshot()
+
+    def test_second_viewer_only_reads_the_version(self):
+        self._snapshot()
+        with self.assertNumQueries(1):
+            snapshot = self._snapshot()
+        self.assertEqual([card['title'] for card in snapshot['board']['todo']], ['Primeiro'])
+
+    def test_snapshot_is_rebuilt_after_a_change(self):
+        first = self._snapshot()
+        Task.objects.create(kanban_type='general', status='todo', title='Segundo')
+
+        snapshot = self._snapshot()
+        self.assertGreater(snapshot['version'], first['version'])
+        self.assertIn('Segundo', snapshot['board_json'])
+
+
+class CardFieldsTests(TenantTestCase):
+
+    def setUp(self):
+        self.client_obj = Client.objects.create(name='Cliente Antigo')
+        self.project = Project.objects.create(name='Projeto Antigo', client=self.client_obj)
+        self.task = Task.objects.create(kanban_type='general', status='todo', title='Card', project=self.project)
+        self.loose = Task.objects.create(
+            kanban_type='operational', status='briefing', title='Post',
+            social_post=SocialPost.objects.create(client=self.client_obj),
+        )
+
+    def test_renames_reach_the_cards(self):
+        version = self.loose.board_version
+
+        self.project.name = 'Projeto Novo'
+        self.project.save()
+        self.client_obj.name = 'Cliente Novo'
+        self.client_obj.save()
+
+        self.task.refresh_from_db()
+        self.loose.refresh_from_db()
+        self.assertEqual((self.task.project_name, self.task.client_name), ('Projeto Novo', 'Cliente Novo'))
+        self.assertEqual(self.loose.to_dict()['project_name'], 'Cliente: Cliente Novo')
+        self.assertGreater(self.loose.board_version, version)
+
+    def test_login_does_not_touch_the_cards(self):
+        user = CustomUser.objects.create_user(username='login', first_name='Ana', last_name='Souza')
+        user.last_login = timezone.now()
+        # Só o UPDATE do usuário: sem busca do schema nem dos cards
+        with self.assertNumQueries(1):
+            user.save(update_fields=['last_login'])
+
+    def test_to_dict_does_not_touch_related_tables(self):
+        task = Task.objects.get(pk=self.task.pk)
+        with self.assertNumQueries(0):
+            card = task.to_dict()
+        self.assertEqual(card['project_name'], 'Projeto Antigo')
+        self.assertEqual(card['assigned_to_initials'], '--')
+
+
+class BulkOperationTests(TenantTestCase):
+
+    def setUp(self):
+        self.tasks = [Task.objects.create(kanban_type='general', status='todo', title=f'T{i}') for i in range(4)]
+        self.done = Task.objects.create(kanban_type='general', status='done', title='Feito')
+
+    def _ids(self, tasks):
+        return [task.id for task in tasks]
+
+    def test_move_is_one_update_and_keeps_relative_order(self):
+        with CaptureQueriesContext(connection) as queries:
+            results = apply_bulk_operation(self._ids(self.tasks[:3]) + [999999], 'move', 'done')
+
+        task_updates = [q['sql'] for q in queries if q['sql'].startswith('UPDATE "projects_task"')]
+        self.assertEqual(len(task_updates), 1)
+        self.assertEqual(results[999999], 'not_found')
+        self.assertEqual(
+            list(Task.objects.filter(status='done').values_list('title', flat=True)),
+            ['Feito', 'T0', 'T1', 'T2'],
+        )
+
+    def test_move_to_status_of_another_board_is_rejected(self):
+        results = apply_bulk_operation(self._ids(self.tasks[:1]), 'move', 'briefing')
+        self.assertEqual(results[self.tasks[0].id], 'invalid_status')
+
+    def test_archive_and_delete_leave_the_board(self):
+        board = KanbanBoardService('general')
+        board.build()
+        since = board.version
+
+        apply_bulk_operation(self._ids(self.tasks[:2]), 'archive')
+        apply_bulk_operation(self._ids(self.tasks[2:]), 'delete')
+
+        self.assertEqual(Task.objects.filter(archived_at__isnull=False).count(), 2)
+        self.assertEqual(KanbanBoardService('general').build()['todo'], [])
+        changes = board.changes(since)
+        self.assertEqual(sorted(changes['deleted']), sorted(self._ids(self.tasks)))
+        self.assertEqual(KanbanTombstone.objects.count(), 4)
+
+
+@LOCAL_CACHE
+class DashboardStatsTests(TenantTestCase):
+
+    def setUp(self):
+        cache.clear()
+        client = Client.objects.create(name='Cliente')
+        Project.objects.create(name='Ativo', client=client)
+        Project.objects.create(name='Pausado', client=client, status='pausado')
+        for status in ('todo', 'doing', 'done'):
+            Task.objects.create(kanban_type='general', status=status, title=status)
+        Task.objects.create(kanban_type='operational', status='client_approval', title='Aprovação')
+
+    def test_all_counters_in_one_query(self):
+        with self.assertNumQueries(1):
+            stats = DashboardStatsService().compute()
+
+        self.assertEqual(stats['project_count'], 1)
+        self.assertEqual(stats['pending_tasks_count'], 3)
+        self.assertEqual(stats['completed_tasks_count'], 1)
+        self.assertEqual(stats['completion_percent'], 25)
+        self.assertEqual(stats['posts_metrics']['pending_approval'], 1)
+
+    def test_cached_until_a_write(self):
+        DashboardStatsService().get()
+        with self.assertNumQueries(0):
+            DashboardStatsService().get()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Task.objects.create(kanban_type='general', status='done', title='Mais uma')
+        self.assertEqual(DashboardStatsService().get()['completed_tasks_count'], 2)
+
+
+class SocialDashboardHistoryTests(TenantTestCase):
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='social')
+        client = Client.objects.create(name='Cliente')
+        accounts = [
+            SocialAccount.objects.create(client=client, platform=platform, account_name=platform, account_id=platform, access_token='x')
+            for platform in ('facebook', 'instagram')
+        ]
+        for i in range(30):
+            post = SocialPost.objects.create(client=client, caption=f'Post {i}')
+            for account in accounts:
+                SocialPostDestination.objects.create(post=post, account=account, format_type='instagram_feed')
+
+    def _get(self, query=''):
+        request = RequestFactory().get('/social/' + query)
+        request.user = self.user
+        request.tenant = self.tenant
+        request.htmx = True
+        return social_dashboard(request)
+
+    def test_page_cost_is_flat(self):
+        # 1 query dos posts (com o cliente) + 1 prefetch dos canais
+        with self.assertNumQueries(2):
+            response = self._get()
+
+        self.assertContains(response, 'Post 29')
+        self.assertNotContains(response, 'Post 4<')
+        self.assertContains(response, 'Carregar mais')
+
+    def test_load_more_follows_the_cursor(self):
+        first = self._get().content.decode()
+        next_query = first.split('/social/?')[1].split('"')[0].replace('&amp;', '&')
+
+        second = self._get('?' + next_query)
+        self.assertContains(second, 'Post 4<')
+        self.assertNotContains(second, 'Carregar mais')
+
+    def test_invalid_filters_are_bad_requests(self):
+        for query in ('?client=abc', '?date_from=xyz', '?cursor=lixo'):
+            self.assertEqual(self._get(query).status_code, 400)
+
+
+@LOCAL_CACHE
+class ClientMetricsTests(TenantTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.clients = [Client.objects.create(name=f'Cliente {i}') for i in range(5)]
+        for client in self.clients:
+            project = Project.objects.create(name='Projeto', client=client)
+            Task.objects.create(kanban_type='general', status='todo', title='Com projeto', project=project)
+            post = SocialPost.objects.create(client=client, likes_count=10, views_count=100)
+            Task.objects.create(kanban_type='operational', status='design', title='Avulsa', social_post=post)
+
+    def test_query_count_does_not_depend_on_client_count(self):
+        with self.assertNumQueries(3):
+            metrics = ClientMetricsService().compute([client.pk for client in self.clients])
+
+        first = metrics[self.clients[0].pk]
+        self.assertEqual(first['task_chart_data'], {'todo': 1, 'design': 1})
+        self.assertEqual(first['total_tasks'], 2)
+        self.assertEqual(first['total_projects'], 1)
+        self.assertEqual((first['total_likes'], first['total_views']), (10, 100))
+
+    def test_cache_is_dropped_when_a_post_changes(self):
+        client = self.clients[0]
+        ClientMetricsService().get(client.pk)
+        with self.assertNumQueries(0):
+            ClientMetricsService().get(client.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            SocialPost.objects.create(client=client, likes_count=5)
+        self.assertEqual(ClientMetricsService().get(client.pk)['total_likes'], 15)
+
+    def test_reassigned_card_drops_both_clients(self):
+        old, new = self.clients[0], self.clients[1]
+        ClientMetricsService().get_many([old.pk, new.pk])
+        task = Task.objects.get(project__client=old)
+        with self.captureOnCommitCallbacks(execute=True):
+            task.project = Project.objects.get(client=new)
+            task.save()
+
+        metrics = ClientMetricsService().get_many([old.pk, new.pk])
+        self.assertEqual((metrics[old.pk]['total_tasks'], metrics[new.pk]['total_tasks']), (1, 3))
+
+
+@LOCAL_CACHE
+class ClientListingTests(TenantTestCase):
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='clientes')
+        for i in range(40):
+            client = Client.objects.create(name=f'Cliente {i:02d}', nome_representante='Maria' if i == 7 else '')
+            Project.objects.create(name='Projeto', client=client)
+            MediaFolder.objects.create(name='Pasta', client=client)
+            for platform in ('facebook', 'instagram'):
+                SocialAccount.objects.create(client=client, platform=platform, account_name=platform, account_id=f'{platform}{i}', access_token='x')
+
+    def _get(self, query=''):
+        request = RequestFactory().get('/clients/' + query)
+        request.user = self.user
+        request.tenant = self.tenant
+        request.htmx = True
+        return client_list_create(request)
+
+    def test_annotations(self):
+        client = client_listing_queryset().get(name='Cliente 00')
+        self.assertEqual(client.account_platforms, ['facebook', 'instagram'])
+        self.assertEqual((client.folder_count, client.project_count, client.storage_used), (1, 1, 0))
+
+    def test_page_is_one_query(self):
+        with self.assertNumQueries(1):
+            response = self._get()
+
+        self.assertContains(response, 'Cliente 29')
+        self.assertNotContains(response, 'Cliente 30')
+        self.assertContains(response, 'Carregar mais')
+
+    def test_search(self):
+        response = self._get('?q=maria')
+        self.assertContains(response, 'Cliente 07')
+        self.assertNotContains(response, 'Cliente 08')
+        self.assertNotContains(response, 'Carregar mais')
+
+    def test_accounts_map_is_cached_until_an_account_changes(self):
+        cache.clear()
+        with self.assertNumQueries(1):
+            clients_map = json.loads(client_accounts_map_json())
+        self.assertEqual(len(clients_map), 40)
+        with self.assertNumQueries(0):
+            client_accounts_map_json()
+
+        client = Client.objects.get(name='Cliente 00')
+        with self.captureOnCommitCallbacks(execute=True):
+            SocialAccount.objects.create(client=client, platform='linkedin', account_name='li', account_id='li0', access_token='x')
+        self.assertIn('linkedin', json.loads(client_accounts_map_json())[str(client.pk)])
+
+
+class CalendarRangeTests(SimpleTestCase):
+
+    def test_range(self):
+        self.assertEqual(
+            parse_range({'start': '2026-01-26', 'end': '2026-03-02'}),
+            (datetime.date(2026, 1, 26), datetime.date(2026, 3, 2)),
+        )
+        # Formato antigo (?year=&month=) vira o mês inteiro
+        self.assertEqual(
+            parse_range({'year': '2026', 'month': '12'}),
+            (datetime.date(2026, 12, 1), datetime.date(2027, 1, 1)),
+        )
+
+    def test_invalid_ranges(self):
+        for params in ({}, {'start': '2026-02-01'}, {'start': '2026-02-01', 'end': '2026-01-01'},
+                       {'start': '2025-01-01', 'end': '2026-01-01'}):
+            with self.assertRaises(ValueError):
+                parse_range(params)
+
+
+    def test_ics_text_and_folding(self):
+        self.assertEqual(_ics_text('a,b;c\nd'), 'a\\,b\\;c\\nd')
+        folded = _ics_line('SUMMARY:' + 'ç' * 60)
+        lines = folded.split('\r\n')[:-1]
+        self.assertTrue(all(len(line.encode()) <= 75 for line in lines))
+        self.assertEqual(''.join(line[1:] if i else line for i, line in enumerate(lines)), 'SUMMARY:' + 'ç' * 60)
+
+
+class CalendarFeedTests(TenantTestCase):
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='calendario')
+        self.client_obj = Client.objects.create(name='Cliente')
+        for day in (1, 15, 28):
+            CalendarEvent.objects.create(client=self.client_obj, date=datetime.date(2026, 2, day))
+
+    def _get(self, **headers):
+        request = RequestFactory().get('/api/calendar/events/', {'start': '2026-02-01', 'end': '2026-03-01'}, **headers)
+        request.user = self.user
+        return get_calendar_events(request)
+
+    def test_unchanged_range_is_not_modified(self):
+        first = self._get()
+        self.assertEqual(len(json.loads(first.content)), 3)
+
+        # Só a agregação do ETag: o JSON não é montado
+        with self.assertNumQueries(1):
+            second = self._get(HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 304)
+
+        CalendarEvent.objects.filter(date=datetime.date(2026, 2, 15)).delete()
+        self.assertEqual(self._get(HTTP_IF_NONE_MATCH=first['ETag']).status_code, 200)
+
+    def test_scheduled_posts_join_the_timeline(self):
+        post = SocialPost.objects.create(
+            client=self.client_obj, caption='Lançamento',
+            scheduled_for=timezone.make_aware(datetime.datetime(2026, 2, 10, 18, 0)),
+        )
+        for platform in ('facebook', 'instagram'):
+            account = SocialAccount.objects.create(client=self.client_obj, platform=platform, account_name=platform, account_id=platform, access_token='x')
+            SocialPostDestination.objects.create(post=post, account=account, format_type=f'{platform}_feed')
+
+        self.assertEqual(ContentTimelineEntry.objects.filter(social_post=post).count(), 2)
+        feed = json.loads(self._get().content)
+        self.assertEqual([item['source'] for item in feed].count('post'), 2)
+
+        # Destino salvo sem mudança visível: mesmas linhas, mesmo updated_at
+        before = list(ContentTimelineEntry.objects.filter(social_post=post).order_by('id').values_list('id', 'updated_at'))
+        post.socialpostdestination_set.first().save()
+        after = list(ContentTimelineEntry.objects.filter(social_post=post).order_by('id').values_list('id', 'updated_at'))
+        self.assertEqual(after, before)
+
+        post.scheduled_for = None
+        post.save()
+        self.assertFalse(ContentTimelineEntry.objects.filter(social_post=post).exists())
+
+    def test_ics_feed_streams_and_revalidates(self):
+        today = timezone.localdate()
+        CalendarEvent.objects.create(client=self.client_obj, date=today, title='Post, de hoje')
+        feed_token = CalendarFeedToken.objects.create(client=self.client_obj)
+
+        def get(**headers):
+            request = RequestFactory().get('/calendar/feed/x.ics', **headers)
+            request.tenant = self.tenant
+            return calendar_ics_feed(request, feed_token.token)
+
+        response = get()
+        body = b''.join(response.streaming_content).decode()
+        self.assertTrue(body.startswith('BEGIN:VCALENDAR\r\n'))
+        self.assertIn('SUMMARY:[Instagram] Post\\, de hoje - Cliente\r\n', body)
+        event = CalendarEvent.objects.get(title='Post, de hoje')
+        self.assertIn(f'UID:calendar-{event.pk}@{self.tenant.schema_name}\r\n', body)
+        self.assertEqual(body.count('BEGIN:VEVENT'), 1)
+
+        self.assertEqual(get(HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+
+class MediaFilesTests(TenantTestCase):
+
+    def setUp(self):
+        media_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(media_dir.cleanup)
+        storage_settings = override_settings(STORAGES={
+            'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage', 'OPTIONS': {'location': media_dir.name}},
+            'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+        })
+        storage_settings.enable()
+        self.addCleanup(storage_settings.disable)
+        staging_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(staging_dir.cleanup)
+        patcher = mock.patch.object(media_files, 'MEDIA_STAGING_DIR', staging_dir.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.user = CustomUser.objects.create_user(username='galeria')
+        self.client_obj = Client.objects.create(name='Cliente Fotos')
+        self.folder = MediaFolder.objects.create(client=self.client_obj, name='Campanha')
+
+    def post(self, view, path, data):
+        request = RequestFactory().post(path, data)
+        request.user = self.user
+        request.tenant = self.tenant
+        return view(request)
+
+    def run_queued_job(self, job_id):
+        claimed = claim_jobs('test-worker', limit=5)
+        self.assertEqual([item.pk for item in claimed], [job_id])
+        return run_job(claimed[0])
+
+    def test_upload_is_sent_to_storage_by_the_worker(self):
+        photo = SimpleUploadedFile('foto.jpg', b'jpeg-bytes', content_type='image/jpeg')
+        response = self.post(upload_photo_api, '/api/upload/photo/', {
+            'foto': photo, 'client_id': self.client_obj.pk, 'folder_id': self.folder.pk,
+        })
+
+        # A requisição só enfileira: nada no storage ainda
+        self.assertEqual(response.status_code, 202)
+        self.assertFalse(MediaFile.objects.exists())
+
+        item = self.run_queued_job(json.loads(response.content)['job_id'])
+        self.assertEqual(item.status, 'succeeded')
+        media_file = MediaFile.objects.get(pk=item.result['file_id'])
+        self.assertEqual((media_file.folder_id, media_file.filename), (self.folder.pk, 'foto.jpg'))
+        with media_file.file.open('rb') as stored:
+            self.assertEqual(stored.read(), b'jpeg-bytes')
+        # Área de espera limpa
+        self.assertFalse(media_files.staging_storage().exists(item.payload['staged_name']))
+
+    def test_batch_download_builds_the_zip_in_a_job(self):
+        first = MediaFile.objects.create(folder=self.folder, file=ContentFile(b'um', name='a.jpg'))
+        second = MediaFile.objects.create(folder=self.folder, file=ContentFile(b'dois', name='b.jpg'))
+
+        response = self.post(download_batch, '/media/download-batch/', {'selected_files': [first.pk, second.pk]})
+        self.assertEqual(response.status_code, 202)
+
+        item = self.run_queued_job(json.loads(response.content)['job_id'])
+        self.assertEqual((item.status, item.result['file_name'], item.result['files']), ('succeeded', 'imagens_cliente-fotos.zip', 2))
+        key = item.result['url'].split(default_storage.base_url, 1)[-1]
+        with default_storage.open(key, 'rb') as stored, zipfile.ZipFile(stored) as archive:
+            self.assertEqual(sorted(archive.namelist()), ['a.jpg', 'b.jpg'])
+            self.assertEqual(archive.read('b.jpg'), b'dois')
+
+
+class FakePlatformHandler(BaseHTTPRequestHandler):
+    """ Graph API / LinkedIn de mentira: responde conforme `server.responses[path]` """
+
+    def do_POST(self):
+        self.server.bodies.append(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+        path = urlsplit(self.path).path
+        self.server.requests.append(path)
+        self.server.content_ranges.append(self.headers.get('Content-Range'))
+        response = self.server.responses.get(path, (404, {}))
+        # Lista: uma resposta por chamada, na ordem; o 3º item (opcional) são cabeçalhos
+        status, body, *headers = response.pop(0) if isinstance(response, list) else response
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        for name, value in (headers[0] if headers else {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_GET = do_PUT = do_POST
+
+    def log_message(self, *args):
+        pass
+
+
+class FakePlatformServerMixin:
+
+    def start_fake_platform(self, responses):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), FakePlatformHandler)
+        self.server.requests = []
+        self.server.bodies = []
+        self.server.content_ranges = []
+        self.server.responses = responses
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        return f"http://127.0.0.1:{self.server.server_port}"
+
+
+@mock.patch.object(http, 'HTTP_RETRY_BASE', 0.01)
+class HttpClientTests(FakePlatformServerMixin, SimpleTestCase):
+
+    def setUp(self):
+        http.reset_stats()
+        self.base_url = self.start_fake_platform({
+            '/flaky': [(503, {}), (429, {}), (200, {'ok': True})],
+            '/create': [(503, {}), (200, {'id': 1})],
+        })
+
+    def test_get_retries_transient_errors_and_records_latency(self):
+        response = http.get(self.base_url + '/flaky', endpoint='test.flaky')
+
+        self.assertEqual(response.json(), {'ok': True})
+        self.assertEqual(self.server.requests.count('/flaky'), 3)
+        stats = http.endpoint_stats()['test.flaky']
+        self.assertEqual((stats['count'], stats['retries'], stats['errors']), (1, 2, 0))
+        self.assertIs(http.get_session(), http.get_session())
+
+    def test_platform_usage_headers(self):
+        response = mock.Mock(headers={
+            'X-App-Usage': '{"call_count": 40, "total_time": 12, "total_cputime": 8}',
+            'X-Business-Use-Case-Usage': '{"1": [{"call_count": 96, "total_time": 3, "estimated_time_to_regain_access": 2}]}',
+        })
+        self.assertEqual(http.platform_usage(response), (40, 96, 120))
+        self.assertEqual(http.platform_usage(mock.Mock(headers={'X-App-Usage': 'x'})), (0, 0, 0))
+
+        keys = http.rate_limit_keys('meta', 'token-secreto')
+        self.assertEqual([key for key, rate, burst in keys][0], 'meta')
+        self.assertNotIn('token-secreto', keys[1][0])
+
+        with mock.patch.object(http, 'ratelimit') as limiter:
+            http._observe(keys, response)
+        # Conta acima do teto: pausa pelo tempo que a Meta informou e pela pausa padrão
+        limiter.block.assert_any_call(keys[1][0], 120)
+        limiter.block.assert_any_call(keys[1][0], http.HTTP_USAGE_BLOCK_SECONDS)
+        limiter.drain.assert_not_called()
+
+    def test_rate_limit_wait_overrides_the_max_wait(self):
+        keys = http.rate_limit_keys('meta', None)
+        with mock.patch.object(http.ratelimit, 'acquire') as acquire:
+            http._acquire(keys)
+            with http.rate_limit_wait(0):
+                http._acquire(keys)
+            http._acquire(keys)
+        waits = [call.kwargs['max_wait'] for call in acquire.call_args_list]
+        self.assertEqual(waits, [http.HTTP_RATE_LIMIT_MAX_WAIT, 0, http.HTTP_RATE_LIMIT_MAX_WAIT])
+
+    def test_refused_account_refunds_the_app_token(self):
+        keys = http.rate_limit_keys('meta', 'token')
+        (app_key, _, app_burst), (account_key, _, _) = keys
+        with mock.patch.object(http.ratelimit, 'acquire', side_effect=[0, ratelimit.RateLimitExceeded(account_key, 30)]), \
+                mock.patch.object(http.ratelimit, 'refund') as refund:
+            with self.assertRaises(http.RateLimited):
+                http._acquire(keys)
+        refund.assert_called_once_with(app_key, app_burst)
+
+    def test_post_is_not_repeated_after_server_error(self):
+        response = http.post(self.base_url + '/create', data={'a': 1})
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(self.server.requests.count('/create'), 1)
+
+
+class MetaPagesTests(FakePlatformServerMixin, TenantTestCase):
+
+    def test_pages_are_paged_with_instagram_expanded_and_upserted_in_bulk(self):
+        base_url = self.start_fake_platform({})
+        self.server.responses.update({
+            '/graph/me/accounts': (200, {
+                'data': [
+                    {'id': 'page-1', 'name': 'Página 1', 'access_token': 't1',
+                     'instagram_business_account': {'id': 'ig-1', 'username': 'perfil1'}},
+                    {'id': 'page-2', 'name': 'Página 2', 'access_token': 't2'},
+                ],
+                'paging': {'next': base_url + '/graph/me/accounts-2?after=abc'},
+            }),
+            '/graph/me/accounts-2': (200, {
+                'data': [{'id': 'page-3', 'name': 'Página 3', 'access_token': 't3',
+                          'instagram_business_account': {'id': 'ig-3', 'username': 'perfil3'}}],
+            }),
+        })
+        client = Client.objects.create(name='Cliente')
+        SocialAccount.objects.create(client=client, platform='facebook', account_name='Antigo', account_id='page-1', access_token='velho', is_active=False)
+
+        with mock.patch.object(MetaService, 'BASE_URL', base_url + '/graph'), CaptureQueriesContext(connection) as queries:
+            accounts = MetaService().get_user_pages('user-token', client)
+
+        self.assertEqual([a.account_id for a in accounts], ['page-1', 'ig-1', 'page-2', 'page-3', 'ig-3'])
+        # Duas chamadas de listagem, nenhuma por página/Instagram
+        self.assertEqual(self.server.requests, ['/graph/me/accounts', '/graph/me/accounts-2'])
+        # SELECT + UPDATE + INSERT (+ savepoint), fora as fichas do limitador
+        upsert_queries = [q for q in queries.captured_queries if 'ratelimitbucket' not in q['sql']]
+        self.assertLessEqual(len(upsert_queries), 5)
+        page = SocialAccount.objects.get(client=client, account_id='page-1')
+        self.assertEqual((page.account_name, page.access_token, page.is_active), ('Página 1', 't1', True))
+        self.assertEqual(SocialAccount.objects.get(account_id='ig-3').account_name, 'perfil3')
+
+        # Reconectar não duplica
+        upsert_social_accounts(client, [('facebook', 'page-2', 'Página 2', 't2-novo')])
+        self.assertEqual(SocialAccount.objects.filter(client=client).count(), 5)
+
+
+class EngagementTests(FakePlatformServerMixin, TenantTestCase):
+
+    def test_metrics_are_fetched_per_account_in_batches_and_summed_per_post(self):
+        base_url = self.start_fake_platform({
+            '/graph/': (200, {
+                'page-1_1': {'likes': {'summary': {'total_count': 10}}, 'comments': {'summary': {'total_count': 2}},
+                             'shares': {'count': 1}, 'insights': {'data': [{'name': 'post_impressions', 'values': [{'value': 300}]}]}},
+                'page-1_2': {'likes': {'summary': {'total_count': 4}}},
+            }),
+            '/v2/socialActions': (200, {'results': {
+                'urn:li:share:1': {'likesSummary': {'totalLikes': 7}, 'commentsSummary': {'aggregatedTotalComments': 3}},
+            }}),
+        })
+        client = Client.objects.create(name='Cliente')
+        facebook = SocialAccount.objects.create(client=client, platform='facebook', account_name='fb', account_id='page-1', access_token='x')
+        linkedin = SocialAccount.objects.create(client=client, platform='linkedin', account_name='li', account_id='person-1', access_token='y')
+        published = {'status': 'published', 'published_at': timezone.now()}
+        first = SocialPost.objects.create(client=client)
+        second = SocialPost.objects.create(client=client)
+        SocialPostDestination.objects.create(post=first, account=facebook, format_type='facebook_feed', external_id='page-1_1', **published)
+        SocialPostDestination.objects.create(post=first, account=linkedin, format_type='linkedin_feed', external_id='urn:li:share:1', **published)
+        SocialPostDestination.objects.create(post=second, account=facebook, format_type='facebook_feed', external_id='page-1_2', **published)
+
+        with mock.patch.object(MetaService, 'BASE_URL', base_url + '/graph'), \
+                mock.patch.object(LinkedInService, 'API_URL', base_url), \
+                ThreadPoolExecutor(max_workers=2) as executor:
+            summary = sync_engagement(executor)
+
+        # Uma chamada por conta, não uma por post
+        self.assertEqual((summary['destinations'], summary['calls']), (3, 2))
+        self.assertEqual(sorted(self.server.requests), ['/graph/', '/v2/socialActions'])
+        first.refresh_from_db()
+        self.assertEqual((first.likes_count, first.comments_count, first.shares_count, first.views_count), (17, 5, 1, 300))
+        second.refresh_from_db()
+        self.assertEqual(second.likes_count, 4)
+        # Recém-coletados saem da fila até o próximo intervalo
+        self.assertFalse(due_destinations().exists())
+
+    def test_meta_usage_header_stops_the_account(self):
+        response = mock.Mock(headers={
+            'X-App-Usage': '{"call_count": 12, "total_time": 5, "total_cputime": 3}',
+            'X-Business-Use-Case-Usage': '{"1": [{"type": "pages", "call_count": 85, "total_time": 10, "total_cputime": 4}]}',
+        })
+        self.assertEqual(meta_usage(response), 85)
+
+        job = {'account_id': 1, 'platform': 'facebook', 'access_token': 'x', 'external_ids': [str(i) for i in range(120)]}
+        with mock.patch.dict(engagement.FETCHERS, facebook=mock.Mock(return_value=({}, 90))):
+            _, _, fetched, calls, limited = fetch_account(job)
+        self.assertEqual((len(fetched), calls, limited), (50, 1, True))
+
+
+class MetricSeriesParamsTests(SimpleTestCase):
+
+    def test_defaults_and_validation(self):
+        metrics, start, end, interval = parse_series_params({})
+        self.assertEqual((metrics, interval, (end - start).days), (['likes', 'comments', 'shares', 'views'], 'day', 30))
+
+        self.assertEqual(parse_series_params({'metrics': 'views', 'start': '2026-03-01', 'end': '2026-03-08', 'interval': 'hour'})[0], ['views'])
+        for params in ({'metrics': 'followers'}, {'interval': 'minute'}, {'start': '2026-03-08', 'end': '2026-03-01'},
+                       {'start': '2026-01-01', 'end': '2026-03-01', 'interval': 'hour'}):
+            with self.assertRaises(ValueError):
+                parse_series_params(params)
+
+    @LOCAL_CACHE
+    def test_downsample_runs_once_per_interval_per_tenant(self):
+        cache.clear()
+        with mock.patch('projects.metric_series.downsample_snapshots', return_value=3) as downsample:
+            self.assertEqual(downsample_snapshots_if_due('agencia_a'), 3)
+            self.assertEqual(downsample_snapshots_if_due('agencia_a'), 0)
+            self.assertEqual(downsample_snapshots_if_due('agencia_b'), 3)
+        self.assertEqual(downsample.call_count, 2)
+
+
+class MetricSeriesTests(TenantTestCase):
+
+    def setUp(self):
+        self.client_obj = Client.objects.create(name='Cliente')
+        account = SocialAccount.objects.create(client=self.client_obj, platform='facebook', account_name='fb', account_id='p', access_token='x')
+        post = SocialPost.objects.create(client=self.client_obj)
+        self.first = SocialPostDestination.objects.create(post=post, account=account, format_type='facebook_feed')
+        self.second = SocialPostDestination.objects.create(post=post, account=account, format_type='facebook_story')
+
+    def _point(self, destination, moment, value):
+        MetricSnapshot.objects.create(destination=destination, metric=MetricSnapshot.LIKES, recorded_at=moment, value=value)
+
+    def test_downsample_keeps_last_point_per_hour_then_per_day(self):
+        now = timezone.now().replace(minute=30, second=0, microsecond=0)
+        for minutes in (0, 10, 20):
+            # Duas horas atrás: três pontos na mesma hora
+            self._point(self.first, now - datetime.timedelta(hours=2, minutes=minutes), 10 - minutes)
+        eight_days_ago = timezone.make_aware(datetime.datetime.combine(timezone.localdate() - datetime.timedelta(days=8), datetime.time(8)))
+        for hours in (0, 3, 6):
+            self._point(self.first, eight_days_ago + datetime.timedelta(hours=hours), hours)
+        self._point(self.first, now - datetime.timedelta(minutes=5), 50)
+        self._point(self.first, now - datetime.timedelta(minutes=4), 51)
+
+        self.assertEqual(downsample_snapshots(now), 4)
+
+        values = sorted(MetricSnapshot.objects.values_list('value', flat=True))
+        # Último de cada hora / dia; a última hora fica intacta
+        self.assertEqual(values, [6, 10, 50, 51])
+
+    def test_series_are_aligned_and_carry_last_value_forward(self):
+        today = timezone.localdate()
+        start = today - datetime.timedelta(days=3)
+        at = lambda day, hour: timezone.make_aware(datetime.datetime.combine(start + datetime.timedelta(days=day), datetime.time(hour)))
+        self._point(self.first, at(-1, 12), 5)    # antes do período: ponto de partida
+        self._point(self.first, at(1, 9), 8)
+        self._point(self.first, at(1, 18), 9)
+        self._point(self.second, at(2, 10), 4)
+
+        data = metric_series(self.client_obj.pk, ['likes', 'views'], start, today + datetime.timedelta(days=1))
+
+        self.assertEqual(len(data['labels']), 4)
+        self.assertEqual(data['labels'][0], start.isoformat())
+        self.assertEqual(data['series']['likes'], [5, 9, 13, 13])
+        self.assertEqual(data['series']['views'], [0, 0, 0, 0])
+
+
+class TokenRefreshTests(FakePlatformServerMixin, TenantTestCase):
+
+    def test_due_tokens_are_refreshed_in_bulk_and_rejected_ones_deactivated(self):
+        base_url = self.start_fake_platform({
+            '/linkedin/token': (200, {'access_token': 'li-novo', 'expires_in': 5184000, 'refresh_token': 'li-r2'}),
+            '/tiktok/token': (400, {'error': 'invalid_grant'}),
+        })
+        client = Client.objects.create(name='Cliente')
+        now = timezone.now()
+
+        def account(platform, expires_in, **fields):
+            return SocialAccount.objects.create(
+                client=client, platform=platform, account_name=platform, account_id=f'{platform}-{expires_in}',
+                access_token='velho', refresh_token='r1', token_expires_at=now + expires_in if expires_in else None, **fields,
+            )
+
+        linkedin = account('linkedin', datetime.timedelta(days=2))
+        tiktok = account('tiktok', datetime.timedelta(hours=1))
+        facebook = account('facebook', datetime.timedelta(days=30))
+        no_expiry = account('linkedin', None)
+
+        executors = make_token_executors(2)
+        self.addCleanup(lambda: [executor.shutdown() for executor in executors.values()])
+        with mock.patch.object(LinkedInService, 'TOKEN_URL', base_url + '/linkedin/token'), \
+                mock.patch.object(TikTokService, 'TOKEN_URL', base_url + '/tiktok/token'):
+            summary = refresh_tokens(executors)
+
+        self.assertEqual(summary, {'refreshed': 1, 'deactivated': 1, 'failed': 0})
+        linkedin.refresh_from_db()
+        self.assertEqual((linkedin.access_token, linkedin.refresh_token), ('li-novo', 'li-r2'))
+        self.assertGreater(linkedin.token_expires_at, now + datetime.timedelta(days=59))
+        tiktok.refresh_from_db()
+        self.assertFalse(tiktok.is_active)
+        # Fora da janela ou sem validade: nem consultados
+        for other in (facebook, no_expiry):
+            other.refresh_from_db()
+            self.assertEqual((other.access_token, other.is_active), ('velho', True))
+        self.assertEqual(sorted(self.server.requests), ['/linkedin/token', '/tiktok/token'])
+
+
+class PublisherTests(FakePlatformServerMixin, TenantTestCase):
+
+    def setUp(self):
+        base_url = self.start_fake_platform({
+            '/graph/page-1/feed': (200, {'id': 'page-1_99'}),
+            '/v2/ugcPosts': (503, {'message': 'indisponível'}),
+        })
+        for patcher in (
+            mock.patch.object(MetaService, 'BASE_URL', base_url + '/graph'),
+            mock.patch.object(LinkedInService, 'API_URL', base_url),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        client = Client.objects.create(name='Cliente')
+        self.post = SocialPost.objects.create(
+            client=client, caption='Bom dia!', approval_status='approved_to_schedule',
+            scheduled_for=timezone.now() - datetime.timedelta(minutes=1),
+        )
+        for platform, account_id, format_type in (
+            ('facebook', 'page-1', 'facebook_feed'),
+            ('instagram', 'ig-1', 'instagram_feed'),
+            ('linkedin', 'person-1', 'linkedin_feed'),
+        ):
+            account = SocialAccount.objects.create(client=client, platform=platform, account_name=platform, account_id=account_id, access_token='x')
+            SocialPostDestination.objects.create(post=self.post, account=account, format_type=format_type)
+
+    def _destinations(self):
+        return {d.account.platform: d for d in self.post.socialpostdestination_set.select_related('account')}
+
+    def test_publishes_each_destination_and_retries_transient_errors(self):
+        with make_executor(4) as executor:
+            self.assertEqual(publish_due(executor), 3)
+
+        destinations = self._destinations()
+        self.assertEqual((destinations['facebook'].status, destinations['facebook'].external_id), ('published', 'page-1_99'))
+        # Instagram sem mídia: erro definitivo
+        self.assertEqual(destinations['instagram'].status, 'failed')
+        # 503 volta para a fila com backoff
+        self.assertEqual((destinations['linkedin'].status, destinations['linkedin'].attempts), ('queued', 1))
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.publish_status, 'publishing')
+
+        self.server.responses['/v2/ugcPosts'] = (201, {'id': 'urn:li:share:1'})
+        SocialPostDestination.objects.filter(pk=destinations['linkedin'].pk).update(next_attempt_at=timezone.now())
+        with make_executor(4) as executor:
+            publish_due(executor)
+
+        self.assertEqual(self._destinations()['linkedin'].status, 'published')
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.publish_status, 'partial')
+        self.assertEqual(self.server.requests.count('/v2/ugcPosts'), 2)
+
+
+@mock.patch.object(publisher, 'INSTAGRAM_CONTAINER_POLL_SECONDS', 0)
+class InstagramAdapterTests(FakePlatformServerMixin, SimpleTestCase):
+
+    def test_video_story_waits_for_the_container(self):
+        base_url = self.start_fake_platform({
+            '/graph/ig-1/media': (200, {'id': 'container-1'}),
+            '/graph/container-1': [(200, {'status_code': 'IN_PROGRESS'}), (200, {'status_code': 'FINISHED'})],
+            '/graph/ig-1/media_publish': (200, {'id': 'media-1'}),
+        })
+        job = {
+            'account_id': 'ig-1', 'access_token': 'x', 'caption': 'Story', 'format_type': 'instagram_story',
+            'media_url': 'https://cdn.example.com/agencia/story.mp4?X-Amz-Signature=abc',
+        }
+        with mock.patch.object(MetaService, 'BASE_URL', base_url + '/graph'), mock.patch.object(http, 'ratelimit'):
+            self.assertEqual(MetaInstagramAdapter().publish(job), 'media-1')
+
+        # media_publish só depois do FINISHED
+        self.assertEqual(self.server.requests, ['/graph/ig-1/media', '/graph/container-1', '/graph/container-1', '/graph/ig-1/media_publish'])
+        self.assertIn(b'media_type=STORIES', self.server.bodies[0])
+        self.assertIn(b'video_url=', self.server.bodies[0])
+
+
+@mock.patch.object(http, 'HTTP_RETRY_BASE', 0.01)
+@mock.patch.object(video_upload, 'UPLOAD_CHUNK_SIZE', 256 * 1024)
+class VideoUploadTests(FakePlatformServerMixin, TenantTestCase):
+
+    def setUp(self):
+        self.base_url = self.start_fake_platform({})
+        patcher = mock.patch.object(YouTubeService, 'UPLOAD_URL', self.base_url + '/youtube/upload')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        media_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(media_dir.cleanup)
+        storage_settings = override_settings(STORAGES={
+            'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage', 'OPTIONS': {'location': media_dir.name}},
+            'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+        })
+        storage_settings.enable()
+        self.addCleanup(storage_settings.disable)
+
+        self.video = bytes(range(256)) * 2400  # 600 KB
+        client = Client.objects.create(name='Cliente')
+        self.post = SocialPost.objects.create(
+            client=client, caption='Lançamento\nDetalhes do vídeo', approval_status='approved_to_schedule',
+            scheduled_for=timezone.now() - datetime.timedelta(minutes=1),
+        )
+        self.post.media_file.save('video.mp4', ContentFile(self.video))
+        account = SocialAccount.objects.create(client=client, platform='youtube', account_name='Canal', account_id='channel-1', access_token='x')
+        self.destination = SocialPostDestination.objects.create(post=self.post, account=account, format_type='youtube_video')
+
+    def test_uploads_in_chunks_and_resumes_from_confirmed_offset(self):
+        self.server.responses.update({
+            '/youtube/upload': (200, {}, {'Location': self.base_url + '/youtube/session'}),
+            '/youtube/session': [
+                (308, {}, {'Range': 'bytes=0-262143'}),
+                (503, {}),
+                # Depois do 503 a sessão diz que só metade da 2ª parte chegou
+                (308, {}, {'Range': 'bytes=0-393215'}),
+                (200, {'id': 'yt-1'}),
+            ],
+        })
+        with make_executor(2) as executor, mock.patch('projects.tasks.upload_video.enqueue') as enqueue:
+            self.assertEqual(publish_due(executor), 1)
+
+        self.destination.refresh_from_db()
+        self.assertEqual(self.destination.status, 'uploading')
+        session = self.destination.upload_session
+        enqueue.assert_called_once_with(session_id=session.pk)
+
+        self.assertEqual(video_upload.upload_video(session.pk)['status'], 'done')
+
+        self.assertEqual(self.server.content_ranges[1:], [
+            'bytes 0-262143/614400',
+            'bytes 262144-524287/614400',
+            'bytes */614400',
+            'bytes 393216-614399/614400',
+        ])
+        self.assertEqual(self.server.bodies[-1], self.video[393216:])
+        session.refresh_from_db()
+        self.assertEqual((session.status, session.bytes_sent), ('done', len(self.video)))
+        self.destination.refresh_from_db()
+        self.assertEqual((self.destination.status, self.destination.external_id), ('published', 'yt-1'))
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.publish_status, 'published')
+
+    def test_upload_left_by_a_dead_worker_is_resumed_not_failed(self):
+        session = VideoUploadSession.objects.create(
+            destination=self.destination, platform='youtube', status='uploading',
+            total_bytes=len(self.video), bytes_sent=262144,
+            locked_until=timezone.now() - datetime.timedelta(minutes=1),
+        )
+        SocialPost.objects.filter(pk=self.post.pk).update(publish_status='publishing')
+        SocialPostDestination.objects.filter(pk=self.destination.pk).update(status='uploading')
+        VideoUploadSession.objects.filter(pk=session.pk).update(updated_at=timezone.now() - datetime.timedelta(hours=7))
+
+        with make_executor(2) as executor, mock.patch('projects.tasks.upload_video.enqueue') as enqueue:
+            publish_due(executor)
+
+        enqueue.assert_called_once_with(session_id=session.pk)
+        session.refresh_from_db()
+        self.assertEqual((session.locked_until, session.bytes_sent, session.failures), (None, 262144, 1))
+        self.destination.refresh_from_db()
+        self.assertEqual(self.destination.status, 'uploading')
+
+
+class ReadRangeTests(SimpleTestCase):
+
+    def test_bucket_key_uses_the_storage_location(self):
+        body = mock.Mock()
+        body.read.return_value = b'parte'
+        storage = mock.Mock(location='midia')
+        storage.bucket.Object.return_value.get.return_value = {'Body': body}
+        field_file = mock.Mock(storage=storage)
+        field_file.name = 'agencia/video.mp4'
+
+        self.assertEqual(video_upload.read_range(field_file, 10, 20), b'parte')
+        storage.bucket.Object.assert_called_once_with('midia/agencia/video.mp4')
+        storage.bucket.Object.return_value.get.assert_called_once_with(Range='bytes=10-19')
+        body.close.assert_called_once_with()
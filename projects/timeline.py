@@ -0,0 +1,158 @@
+# projects/timeline.py
+"""
+Linha do tempo de conteúdo (ContentTimelineEntry): CalendarEvent e
+SocialPost.scheduled_for numa tabela só, com o horário indexado.
+
+Mantida na escrita pelos receivers em projects/models.py (exclusões saem
+em cascata pelas FKs). As linhas são atualizadas no lugar: o id fica estável
+e `updated_at` (ETag/Last-Modified do calendário) só anda quando algo visível
+muda. `rebuild_timeline` refaz tudo a partir das origens (comando
+rebuild_content_timeline).
+"""
+import datetime
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import CalendarEvent, ContentTimelineEntry, SocialPost, SocialPostDestination
+
+# Janela padrão da checagem de conflitos (mesmo cliente e plataforma)
+CONFLICT_WINDOW = datetime.timedelta(hours=1)
+
+# Colunas copiadas da origem (o que as listagens exibem)
+ENTRY_FIELDS = ('client_id', 'scheduled_at', 'platform', 'title', 'status', 'format_type')
+
+
+def event_scheduled_at(event):
+    """ date + time do evento no fuso do projeto """
+    moment = datetime.datetime.combine(event.date, event.time)
+    return timezone.make_aware(moment) if timezone.is_naive(moment) else moment
+
+
+def _parse_event_fields(event):
+    # Eventos criados pela API chegam com date/time em texto até serem relidos
+    if isinstance(event.date, str):
+        event.date = datetime.date.fromisoformat(event.date)
+    if isinstance(event.time, str):
+        event.time = datetime.time.fromisoformat(event.time)
+
+
+def calendar_event_entry(event):
+    _parse_event_fields(event)
+    return ContentTimelineEntry(
+        source='calendar',
+        calendar_event=event,
+        client_id=event.client_id,
+        scheduled_at=event_scheduled_at(event),
+        platform=event.platform,
+        title=event.title,
+        status=event.status,
+        format_type=event.post_type,
+    )
+
+
+def social_post_entries(post, destinations):
+    if not post.scheduled_for:
+        return []
+    return [
+        ContentTimelineEntry(
+            source='post',
+            social_post=post,
+            destination=destination,
+            client_id=post.client_id,
+            scheduled_at=post.scheduled_for,
+            platform=destination.account.platform,
+            title=post.caption[:200],
+            status=post.approval_status,
+            format_type=destination.format_type,
+        )
+        for destination in destinations
+    ]
+
+
+def _apply(entry, fresh, touch=False):
+    """ Copia para `entry` as colunas de `fresh`. True se algo mudou (ou `touch`) """
+    changed = touch
+    for field in ENTRY_FIELDS:
+        value = getattr(fresh, field)
+        if getattr(entry, field) != value:
+            setattr(entry, field, value)
+            changed = True
+    if changed:
+        entry.updated_at = timezone.now()
+    return changed
+
+
+def _upsert(existing, fresh, key, touch=False):
+    """
+    Atualiza no lugar as linhas `existing` que ainda têm origem em `fresh`
+    (casadas por `key`), cria as que faltam e apaga as que perderam a origem.
+    """
+    fresh = {key(entry): entry for entry in fresh}
+    changed, stale = [], []
+    for entry in existing:
+        source = fresh.pop(key(entry), None)
+        if source is None:
+            stale.append(entry.pk)
+        elif _apply(entry, source, touch):
+            changed.append(entry)
+    with transaction.atomic():
+        if stale:
+            ContentTimelineEntry.objects.filter(pk__in=stale).delete()
+        if changed:
+            ContentTimelineEntry.objects.bulk_update(changed, [*ENTRY_FIELDS, 'updated_at'])
+        if fresh:
+            ContentTimelineEntry.objects.bulk_create(fresh.values())
+
+
+def sync_calendar_event(event):
+    _upsert(
+        ContentTimelineEntry.objects.filter(calendar_event=event),
+        [calendar_event_entry(event)],
+        key=lambda entry: entry.calendar_event_id,
+        touch=True,
+    )
+
+
+def sync_social_post(post, touch=False):
+    """
+    Uma linha por destino, atualizada no lugar; sem agendamento, o post sai da
+    linha do tempo. `touch`: legenda/mídia podem ter mudado (vão no feed, mas
+    não nas colunas), então as linhas ganham updated_at novo mesmo sem diferença.
+    """
+    destinations = SocialPostDestination.objects.filter(post=post).select_related('account')
+    _upsert(
+        ContentTimelineEntry.objects.filter(social_post=post),
+        social_post_entries(post, destinations),
+        key=lambda entry: entry.destination_id,
+        touch=touch,
+    )
+
+
+def rebuild_timeline(batch_size=1000):
+    """ Apaga e recria a linha do tempo inteira do tenant atual. Retorna o número de linhas """
+    entries = [calendar_event_entry(event) for event in CalendarEvent.objects.iterator(chunk_size=batch_size)]
+
+    destinations = {}
+    for destination in SocialPostDestination.objects.select_related('account').filter(post__scheduled_for__isnull=False):
+        destinations.setdefault(destination.post_id, []).append(destination)
+    for post in SocialPost.objects.filter(scheduled_for__isnull=False).iterator(chunk_size=batch_size):
+        entries.extend(social_post_entries(post, destinations.get(post.pk, [])))
+
+    with transaction.atomic():
+        ContentTimelineEntry.objects.all().delete()
+        ContentTimelineEntry.objects.bulk_create(entries, batch_size=batch_size)
+    return len(entries)
+
+
+def timeline_conflicts(client_id, platform, scheduled_at, window=CONFLICT_WINDOW, exclude=None):
+    """ Conteúdos do mesmo cliente e plataforma a menos de `window` do horário (índice de conflitos) """
+    entries = ContentTimelineEntry.objects.filter(
+        client_id=client_id,
+        platform=platform,
+        scheduled_at__gte=scheduled_at - window,
+        scheduled_at__lte=scheduled_at + window,
+    )
+    if exclude is not None:
+        entries = entries.exclude(**exclude)
+    return entries.order_by('scheduled_at')
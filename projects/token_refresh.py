@@ -0,0 +1,184 @@
+# projects/token_refresh.py
+"""
+Renovação antecipada dos tokens das redes (comando refresh_social_tokens).
+
+Nenhuma requisição do usuário renova token: este processo acha as contas que
+expiram dentro da janela da plataforma (índice socialaccount_expiry_idx) e
+renova em paralelo, com um pool pequeno por plataforma (o limite de cada API
+é separado):
+
+- LinkedIn: refresh_token -> novo token de 60 dias.
+- TikTok: refresh_token -> novo token de 24h (e às vezes novo refresh_token).
+- Facebook/Instagram: troca pelo token de longa duração (fb_exchange_token).
+
+As threads só fazem HTTP e as consultas ao limitador de chamadas
+(projects/http.py), fechando a conexão da thread ao fim de cada tarefa.
+Os tokens novos são gravados com um bulk_update; contas cuja renovação foi
+recusada (refresh token inválido/revogado) são desativadas e precisam ser
+reconectadas. Falhas temporárias (429, 5xx, rede)
+ficam para a próxima rodada.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from functools import reduce
+from operator import or_
+
+import requests
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import http
+from .clients import invalidate_client_accounts
+from .models import SocialAccount
+from .services import LinkedInService, MetaService, TikTokService, token_expiry
+
+logger = logging.getLogger(__name__)
+
+# Antecedência da renovação (o token do TikTok dura só 24h)
+TOKEN_REFRESH_WINDOWS = {
+    'facebook': timedelta(days=7),
+    'instagram': timedelta(days=7),
+    'linkedin': timedelta(days=7),
+    'tiktok': timedelta(hours=6),
+}
+TOKEN_REFRESH_WORKERS = 4  # por plataforma
+
+
+class RefreshError(Exception):
+    def __init__(self, message, permanent=False):
+        super().__init__(message)
+        self.permanent = permanent
+
+
+def _token_data(response):
+    """ Resposta do endpoint de token -> JSON com access_token, ou RefreshError """
+    if response.status_code == 429 or response.status_code >= 500:
+        raise RefreshError(f"HTTP {response.status_code}")
+    try:
+        data = response.json()
+    except ValueError:
+        data = {}
+    if response.status_code >= 400 or not data.get('access_token'):
+        # Refresh token expirado/revogado ou app sem permissão: só reconectando
+        raise RefreshError(f"HTTP {response.status_code}: {response.text[:500]}", permanent=True)
+    return data
+
+
+def refresh_meta(job):
+    data = _token_data(MetaService().exchange_long_lived_token(job['access_token']))
+    return {
+        'access_token': data['access_token'],
+        'refresh_token': job['refresh_token'],
+        'token_expires_at': token_expiry(data.get('expires_in')),
+    }
+
+
+def _refresh_with_refresh_token(service, job):
+    if not job['refresh_token']:
+        raise RefreshError("Conta sem refresh token.", permanent=True)
+    data = _token_data(service.refresh_access_token(job['refresh_token']))
+    return {
+        'access_token': data['access_token'],
+        'refresh_token': data.get('refresh_token') or job['refresh_token'],
+        'token_expires_at': token_expiry(data.get('expires_in')),
+    }
+
+
+def refresh_linkedin(job):
+    return _refresh_with_refresh_token(LinkedInService(), job)
+
+
+def refresh_tiktok(job):
+    return _refresh_with_refresh_token(TikTokService(), job)
+
+
+REFRESHERS = {
+    'facebook': refresh_meta,
+    'instagram': refresh_meta,
+    'linkedin': refresh_linkedin,
+    'tiktok': refresh_tiktok,
+}
+
+
+def refresh_one(job):
+    """
+    Roda na thread do pool: HTTP e o limitador de chamadas.
+    Retorna (job, campos novos ou None, erro ou None)
+    """
+    try:
+        return job, REFRESHERS[job['platform']](job), None
+    except RefreshError as e:
+        return job, None, e
+    except requests.RequestException as e:
+        return job, None, RefreshError(str(e))
+    except Exception as e:
+        logger.exception("Erro inesperado renovando o token da conta %s", job['id'])
+        return job, None, RefreshError(str(e))
+    finally:
+        http.close_thread_connection()
+
+
+def due_accounts(now=None):
+    """ Contas ativas cujo token expira dentro da janela da plataforma delas """
+    now = now or timezone.now()
+    windows = [
+        Q(platform=platform, token_expires_at__lt=now + window)
+        for platform, window in TOKEN_REFRESH_WINDOWS.items()
+    ]
+    return (
+        SocialAccount.objects
+        .filter(is_active=True, token_expires_at__isnull=False)
+        .filter(reduce(or_, windows))
+        .order_by('token_expires_at')
+    )
+
+
+def make_executors(workers=TOKEN_REFRESH_WORKERS):
+    """ Um pool por plataforma: uma API lenta ou no limite não segura as outras """
+    return {
+        platform: ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f'tokens-{platform}')
+        for platform in REFRESHERS
+    }
+
+
+def refresh_tokens(executors, limit=None):
+    """ Uma rodada no tenant atual. Retorna {'refreshed', 'deactivated', 'failed'} """
+    accounts = due_accounts()
+    if limit:
+        accounts = accounts[:limit]
+    accounts = {account.pk: account for account in accounts}
+
+    futures = [
+        executors[account.platform].submit(refresh_one, {
+            'id': account.pk,
+            'platform': account.platform,
+            'access_token': account.access_token,
+            'refresh_token': account.refresh_token,
+        })
+        for account in accounts.values()
+    ]
+
+    refreshed, deactivated, failed = [], [], 0
+    for future in futures:
+        job, fields, error = future.result()
+        account = accounts[job['id']]
+        if error is None:
+            for field, value in fields.items():
+                setattr(account, field, value)
+            refreshed.append(account)
+        elif error.permanent:
+            logger.warning("Token da conta %s (%s) recusado, desativando: %s", account.pk, account.platform, error)
+            deactivated.append(account.pk)
+        else:
+            logger.info("Token da conta %s não renovado agora: %s", account.pk, error)
+            failed += 1
+
+    if refreshed or deactivated:
+        with transaction.atomic():
+            SocialAccount.objects.bulk_update(refreshed, ['access_token', 'refresh_token', 'token_expires_at'], batch_size=500)
+            SocialAccount.objects.filter(pk__in=deactivated).update(is_active=False)
+            # bulk_update/update não disparam os sinais de save
+            invalidate_client_accounts()
+    return {'refreshed': len(refreshed), 'deactivated': len(deactivated), 'failed': failed}
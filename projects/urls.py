@@ -15,10 +15,17 @@ urlpatterns = [
     path('api/update-task/', views.kanban_update_task, name='kanban_update_task'),
     path('api/get-task/<int:pk>/', views.get_task_details_api, name='get_task_details_api'),
     path('api/delete-task/<int:pk>/', views.delete_task_api, name='delete_task_api'),
+    path('api/kanban/<str:kanban_type>/column/<str:status>/', views.kanban_column_api, name='kanban_column_api'),
+    path('api/kanban/bulk/', views.kanban_bulk_api, name='kanban_bulk_api'),
+    path('api/kanban/<str:kanban_type>/changes/', views.kanban_changes_api, name='kanban_changes_api'),
+    path('api/kanban/<str:kanban_type>/events/', views.kanban_events_stream, name='kanban_events_stream'),
 
     # --- GESTÃO DE CLIENTES ---
     path('clients/', views.client_list_create, name='client_list'),
     path('clients/<int:pk>/metrics/', views.client_metrics_dashboard, name='client_metrics'),
+    path('api/clients/metrics/', views.client_metrics_api, name='client_metrics_api'),
+    path('api/clients/<int:pk>/metrics/series/', views.client_metric_series_api, name='client_metric_series_api'),
+    path('api/clients/<int:pk>/accounts/', views.client_accounts_api, name='client_accounts_api'),
     path('api/clients/<int:pk>/get/', views.get_client_data_api, name='get_client_data_api'),
     path('api/clients/<int:pk>/details/', views.client_detail_api, name='client_detail_api'),
     path('api/clients/list-simple/', views.get_clients_list_api, name='get_clients_list_api'),
@@ -31,6 +38,8 @@ urlpatterns = [
     path('api/calendar/events/', views.get_calendar_events, name='get_calendar_events'),
     path('api/calendar/add/', views.add_calendar_event, name='add_calendar_event'),
     path('api/calendar/clients/', views.get_clients_for_select, name='get_clients_for_select'),
+    path('api/calendar/feed-token/', views.create_calendar_feed_token, name='create_calendar_feed_token'),
+    path('calendar/feed/<str:token>.ics', views.calendar_ics_feed, name='calendar_ics_feed'),
 
     # --- POSTAGENS E SOCIAL MEDIA ---
     path('social/', views.social_dashboard, name='social_dashboard'),
@@ -0,0 +1,395 @@
+# projects/video_upload.py
+"""
+Envio de vídeos em partes, do R2 direto para a rede (job projects.upload_video).
+
+O publicador não manda mais a URL do vídeo para TikTok, YouTube e Reels: cria
+uma VideoUploadSession, deixa o destino em 'uploading' e enfileira o job. O
+job lê o arquivo do R2 por faixas (GET com Range) e manda cada faixa no
+protocolo de upload em partes da rede:
+
+- TikTok: FILE_UPLOAD, PUT com Content-Range na upload_url (a última parte
+  leva o resto; a URL vale 1 hora).
+- YouTube: sessão retomável (Location), PUT por parte; 308 + Range diz até
+  onde chegou.
+- Instagram Reels: container com upload_type=resumable, POST no rupload com
+  os cabeçalhos offset/file_size; depois espera o processamento e publica.
+
+Só uma parte (UPLOAD_CHUNK_SIZE) fica na memória por vez: um vídeo de 2 GB
+não passa inteiro pelo worker. `bytes_sent` é gravado a cada parte, então uma
+queda do worker ou da rede retoma de onde parou. Cada parte tenta de novo
+algumas vezes; rodadas sem avanço voltam para a fila com backoff até
+UPLOAD_MAX_FAILURES. Uma rodada dura no máximo UPLOAD_RUN_SECONDS e reenfileira
+o resto (o worker não fica preso e o job nunca parece travado). Se o worker
+cai no meio da rodada, o prazo (locked_until) vence sem ninguém soltar e o
+publicador devolve a sessão para a fila (`resume_orphaned_uploads`).
+"""
+import logging
+import posixpath
+import re
+import time
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from storages.utils import clean_name
+
+from jobs.queue import backoff_delay
+
+from . import http
+from .models import SocialPostDestination, VideoUploadSession
+from .publisher import finish_posts
+from .services import MetaService, TikTokService, YouTubeService
+
+logger = logging.getLogger(__name__)
+
+# Múltiplo de 256 KiB (YouTube) e dentro de 5-64 MB (TikTok)
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+UPLOAD_CHUNK_ATTEMPTS = 4
+UPLOAD_MAX_FAILURES = 6
+UPLOAD_RUN_SECONDS = 10 * 60
+# Prazo do job que está enviando; renovado a cada parte
+UPLOAD_LEASE = timedelta(minutes=5)
+# Intervalo entre consultas enquanto a rede processa o vídeo
+UPLOAD_POLL_SECONDS = 30
+
+
+class UploadError(Exception):
+    def __init__(self, message, retryable=False, restart=False):
+        super().__init__(message)
+        self.retryable = retryable or restart
+        # Sessão da rede expirou/sumiu: abre outra e envia do zero
+        self.restart = restart
+
+
+def _check(response, expected=(200, 201)):
+    """ Resposta da API -> JSON, ou UploadError (429/5xx podem tentar de novo) """
+    if response.status_code in expected:
+        try:
+            return response.json()
+        except ValueError:
+            return {}
+    message = f"HTTP {response.status_code}: {response.text[:500]}"
+    if response.status_code == 429 or response.status_code >= 500:
+        raise UploadError(message, retryable=True)
+    raise UploadError(message)
+
+
+def read_range(field_file, start, end):
+    """ Bytes [start, end) do arquivo: GET com Range no R2, seek no disco local """
+    storage = field_file.storage
+    if hasattr(storage, 'bucket'):
+        key = clean_name(posixpath.join(storage.location or '', field_file.name)).lstrip('/')
+        body = storage.bucket.Object(key).get(Range=f'bytes={start}-{end - 1}')['Body']
+        try:
+            return body.read()
+        finally:
+            body.close()
+    with storage.open(field_file.name, 'rb') as file:
+        file.seek(start)
+        return file.read(end - start)
+
+
+class TikTokUploader:
+    # A upload_url vale 1 hora; com folga, abre outra sessão
+    SESSION_TTL = timedelta(minutes=55)
+
+    def chunk_end(self, offset, total, chunk_size):
+        # total_chunk_count = total // chunk_size: a última parte leva o resto
+        return total if total - offset < 2 * chunk_size else offset + chunk_size
+
+    def start(self, job):
+        total = job['total_bytes']
+        chunk_size = min(UPLOAD_CHUNK_SIZE, total)
+        data = _check(TikTokService().init_video_upload(
+            job['access_token'], job['caption'], total, chunk_size, max(1, total // chunk_size),
+        ))
+        data = data.get('data', {})
+        if not data.get('upload_url'):
+            raise UploadError("TikTok não devolveu upload_url.")
+        return {'upload_url': data['upload_url'], 'remote_id': data.get('publish_id', ''), 'chunk_size': chunk_size}
+
+    def send(self, job, start, data):
+        response = TikTokService().upload_video_chunk(job['upload_url'], start, job['total_bytes'], data)
+        if response.status_code == 404:
+            raise UploadError("Sessão de upload do TikTok expirou.", restart=True)
+        _check(response, expected=(200, 201, 206))
+        return start + len(data), None
+
+    def resume_offset(self, job, offset):
+        # Sem consulta de progresso: reenvia a mesma parte
+        return offset, None
+
+    def finish(self, job):
+        return job['remote_id']
+
+
+class YouTubeUploader:
+    SESSION_TTL = None
+
+    def chunk_end(self, offset, total, chunk_size):
+        return min(offset + chunk_size, total)
+
+    def start(self, job):
+        caption = job['caption'] or ''
+        title = caption.splitlines()[0] if caption.strip() else 'Vídeo'
+        if job['format_type'] == 'youtube_short' and '#shorts' not in title.lower():
+            title = f"{title[:91]} #Shorts"
+        response = YouTubeService().start_upload(job['access_token'], title, caption, job['total_bytes'])
+        _check(response)
+        if not response.headers.get('Location'):
+            raise UploadError("YouTube não devolveu a URL da sessão.")
+        return {'upload_url': response.headers['Location'], 'remote_id': '', 'chunk_size': UPLOAD_CHUNK_SIZE}
+
+    def _progress(self, response):
+        """ (bytes confirmados, id do vídeo se terminou) de uma resposta 308/200/201 """
+        if response.status_code == 308:
+            match = re.match(r'bytes=0-(\d+)', response.headers.get('Range', ''))
+            return (int(match.group(1)) + 1 if match else 0), None
+        if response.status_code in (404, 410):
+            raise UploadError("Sessão de upload do YouTube expirou.", restart=True)
+        data = _check(response)
+        return None, data.get('id') or ''
+
+    def send(self, job, start, data):
+        response = YouTubeService().upload_chunk(job['upload_url'], job['access_token'], start, job['total_bytes'], data)
+        offset, video_id = self._progress(response)
+        return (job['total_bytes'], video_id) if video_id is not None else (offset, None)
+
+    def resume_offset(self, job, offset):
+        # A parte pode ter chegado pela metade: pergunta à sessão
+        response = YouTubeService().query_upload(job['upload_url'], job['access_token'], job['total_bytes'])
+        offset, video_id = self._progress(response)
+        return (job['total_bytes'], video_id) if video_id is not None else (offset, None)
+
+    def finish(self, job):
+        return job['remote_id']
+
+
+class InstagramReelsUploader:
+    SESSION_TTL = None
+
+    def chunk_end(self, offset, total, chunk_size):
+        return min(offset + chunk_size, total)
+
+    def start(self, job):
+        data = _check(MetaService().create_reels_upload(job['account_id'], job['access_token'], job['caption']))
+        if not data.get('id') or not data.get('uri'):
+            raise UploadError("Instagram não devolveu o container de upload.")
+        return {'upload_url': data['uri'], 'remote_id': data['id'], 'chunk_size': UPLOAD_CHUNK_SIZE}
+
+    def send(self, job, start, data):
+        _check(MetaService().upload_reels_chunk(job['upload_url'], job['access_token'], start, job['total_bytes'], data))
+        return start + len(data), None
+
+    def resume_offset(self, job, offset):
+        data = _check(MetaService().get_container_status(job['remote_id'], job['access_token']))
+        transferred = data.get('video_status', {}).get('uploading_phase', {}).get('bytes_transferred')
+        return (offset if transferred is None else int(transferred)), None
+
+    def finish(self, job):
+        """ id do post publicado, ou None enquanto a Meta processa o vídeo """
+        service = MetaService()
+        status = _check(service.get_container_status(job['remote_id'], job['access_token'])).get('status_code')
+        if status == 'IN_PROGRESS':
+            return None
+        if status != 'FINISHED':
+            raise UploadError(f"Instagram não processou o vídeo ({status}).")
+        data = _check(service.publish_instagram_container(job['account_id'], job['access_token'], job['remote_id']))
+        return data.get('id')
+
+
+UPLOADERS = {
+    'tiktok_post': TikTokUploader(),
+    'youtube_video': YouTubeUploader(),
+    'youtube_short': YouTubeUploader(),
+    'instagram_reel': InstagramReelsUploader(),
+}
+
+
+def start_uploads(jobs):
+    """
+    Chamado pelo publicador (thread principal) com os jobs de vídeo já
+    reservados: abre uma sessão por destino e enfileira o envio.
+    """
+    from .tasks import upload_video
+
+    with transaction.atomic():
+        for job in jobs:
+            session, created = VideoUploadSession.objects.update_or_create(
+                destination_id=job['destination_id'],
+                defaults={
+                    'platform': job['platform'], 'status': 'pending', 'upload_url': '', 'remote_id': '',
+                    'opened_at': None, 'total_bytes': 0, 'chunk_size': 0, 'bytes_sent': 0,
+                    'failures': 0, 'locked_until': None, 'last_error': '',
+                },
+            )
+            SocialPostDestination.objects.filter(pk=job['destination_id']).update(status='uploading')
+            upload_video.enqueue(session_id=session.pk)
+
+
+def resume_orphaned_uploads():
+    """
+    Sessões cujo job morreu no meio da rodada voltam para a fila, de onde pararam.
+    Toda saída de upload_video solta o prazo (locked_until=None): prazo vencido
+    é worker que caiu. Conta como falha; no limite, fail_stale_destinations fecha.
+    """
+    from .tasks import upload_video
+
+    now = timezone.now()
+    orphaned = list(
+        VideoUploadSession.objects
+        .filter(status__in=('pending', 'uploading', 'processing'), locked_until__lt=now)
+        .filter(failures__lt=UPLOAD_MAX_FAILURES - 1)
+        .values_list('pk', flat=True)
+    )
+    resumed = 0
+    for session_id in orphaned:
+        # Só quem soltou o prazo enfileira: dois publicadores não duplicam o job
+        released = VideoUploadSession.objects.filter(pk=session_id, locked_until__lt=now).update(
+            locked_until=None, failures=F('failures') + 1, updated_at=now,
+        )
+        if released:
+            upload_video.enqueue(session_id=session_id)
+            resumed += 1
+    return resumed
+
+
+def _claim(session_id):
+    """ Reserva a sessão para este job (outro job da mesma sessão desiste) """
+    now = timezone.now()
+    return VideoUploadSession.objects.filter(
+        Q(locked_until__isnull=True) | Q(locked_until__lt=now),
+        pk=session_id, status__in=('pending', 'uploading', 'processing'),
+    ).update(locked_until=now + UPLOAD_LEASE, updated_at=now)
+
+
+def _save(session, **fields):
+    for field, value in fields.items():
+        setattr(session, field, value)
+    VideoUploadSession.objects.filter(pk=session.pk).update(updated_at=timezone.now(), **fields)
+
+
+def _job(session):
+    """ Dados que os uploaders usam (sem acesso ao banco) """
+    destination = session.destination
+    return {
+        'format_type': destination.format_type,
+        'account_id': destination.account.account_id,
+        'access_token': destination.account.access_token,
+        'caption': destination.post.caption,
+        'upload_url': session.upload_url,
+        'remote_id': session.remote_id,
+        'total_bytes': session.total_bytes,
+    }
+
+
+def _reschedule(session, delay):
+    from .tasks import upload_video
+
+    _save(session, locked_until=None)
+    upload_video.enqueue(session_id=session.pk, run_at=timezone.now() + timedelta(seconds=delay))
+
+
+def _close(session, external_id=None, error=None):
+    """ Fecha destino e sessão: publicado com `external_id` ou falha com `error` """
+    destination = session.destination
+    with transaction.atomic():
+        if error is None:
+            SocialPostDestination.objects.filter(pk=destination.pk).update(
+                status='published', external_id=external_id or '', published_at=timezone.now(), last_error='',
+            )
+            _save(session, status='done', locked_until=None, last_error='')
+        else:
+            SocialPostDestination.objects.filter(pk=destination.pk).update(status='failed', last_error=str(error))
+            _save(session, status='failed', locked_until=None, last_error=str(error))
+        finish_posts([destination.post_id])
+
+
+def _send_chunks(session, uploader, media, deadline):
+    """ Envia a partir de `bytes_sent` até terminar ou acabar o tempo. Retorna se avançou """
+    job = _job(session)
+    total = session.total_bytes
+    offset = session.bytes_sent
+    progressed = False
+    attempts = 0
+    chunk = None
+    while offset < total and time.monotonic() < deadline:
+        end = uploader.chunk_end(offset, total, session.chunk_size)
+        if chunk is None or chunk[0] != offset:
+            chunk = (offset, read_range(media, offset, end))
+        try:
+            new_offset, remote_id = uploader.send(job, offset, chunk[1])
+        except (UploadError, http.RequestException) as e:
+            attempts += 1
+            if getattr(e, 'restart', False) or not getattr(e, 'retryable', True) or attempts >= UPLOAD_CHUNK_ATTEMPTS:
+                if isinstance(e, UploadError):
+                    raise
+                raise UploadError(str(e), retryable=True) from e
+            logger.info("Upload %s: parte em %s falhou (%s), tentando de novo", session.pk, offset, e)
+            time.sleep(http.retry_delay(attempts))
+            new_offset, remote_id = uploader.resume_offset(job, offset)
+
+        if remote_id:
+            job['remote_id'] = remote_id
+            _save(session, remote_id=remote_id)
+        if new_offset > offset:
+            attempts = 0
+            progressed = True
+            _save(session, bytes_sent=new_offset, failures=0, locked_until=timezone.now() + UPLOAD_LEASE)
+        offset = new_offset
+
+    if offset >= total:
+        _save(session, status='processing')
+    return progressed
+
+
+def upload_video(session_id):
+    """ Uma rodada de envio da sessão. Devolve o status em que ela ficou """
+    if not _claim(session_id):
+        return {'status': 'locked'}
+    session = VideoUploadSession.objects.select_related('destination__post', 'destination__account').get(pk=session_id)
+    destination = session.destination
+    uploader = UPLOADERS[destination.format_type]
+    media = destination.post.media_file
+    deadline = time.monotonic() + UPLOAD_RUN_SECONDS
+    progressed = False
+
+    try:
+        if not media:
+            raise UploadError("Post sem vídeo.")
+        expired = (
+            session.status == 'uploading' and uploader.SESSION_TTL
+            and session.opened_at and session.opened_at < timezone.now() - uploader.SESSION_TTL
+        )
+        if session.status == 'pending' or expired:
+            total = media.size
+            opened = uploader.start({**_job(session), 'total_bytes': total})
+            _save(session, status='uploading', total_bytes=total, bytes_sent=0, opened_at=timezone.now(), **opened)
+
+        if session.status == 'uploading':
+            progressed = _send_chunks(session, uploader, media, deadline)
+            if session.status == 'uploading':
+                # Acabou o tempo da rodada: o resto vai num job novo
+                _reschedule(session, 0)
+                return {'status': session.status, 'bytes_sent': session.bytes_sent}
+
+        external_id = uploader.finish(_job(session))
+        if external_id is None:
+            _reschedule(session, UPLOAD_POLL_SECONDS)
+            return {'status': session.status, 'bytes_sent': session.bytes_sent}
+        _close(session, external_id=external_id)
+    except Exception as e:
+        if not isinstance(e, UploadError):
+            logger.exception("Erro inesperado no upload %s", session.pk)
+            e = UploadError(str(e), retryable=True)
+        failures = 0 if progressed else session.failures + 1
+        if e.retryable and failures < UPLOAD_MAX_FAILURES:
+            logger.warning("Upload %s parado em %s/%s: %s", session.pk, session.bytes_sent, session.total_bytes, e)
+            if e.restart:
+                _save(session, status='pending', bytes_sent=0)
+            _save(session, failures=failures, last_error=str(e))
+            _reschedule(session, backoff_delay(max(failures, 1)))
+        else:
+            _close(session, error=e)
+    return {'status': session.status, 'bytes_sent': session.bytes_sent}
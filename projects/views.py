@@ -1,10 +1,10 @@
 import json
+import asyncio
 import secrets
 import datetime
-from django.utils.text import slugify
-import requests # Movido para o topo
+from functools import wraps
 from django.shortcuts import render, redirect, get_object_or_404
-from django.http import JsonResponse, HttpResponseBadRequest
+from django.http import JsonResponse, HttpResponseBadRequest, HttpResponseNotModified
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_POST
 from django.views.generic import View
@@ -17,14 +17,31 @@ from django.contrib import messages
 from django.utils import timezone
 from django.contrib.auth import views as auth_views
 from django.core.files.base import ContentFile
-import zipfile
-import io
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.core.exceptions import ValidationError
+from django.db.models import Prefetch
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
 # Imports Locais
-from .models import Task, CalendarEvent, Project, Client, SocialPost, SocialAccount, SocialPostDestination, MediaFolder, MediaFile
+from .models import Task, CalendarEvent, CalendarFeedToken, ContentTimelineEntry, Project, Client, SocialPost, SocialAccount, SocialPostDestination, MediaFolder, MediaFile
 from .forms import ClientForm, TenantAuthenticationForm, ProjectForm, MediaFileForm, FolderForm
 from accounts.models import CustomUser
-from .services import MetaService, LinkedInService, TikTokService
+from . import http
+from .services import MetaService, LinkedInService, TikTokService, token_expiry
+from .events import channel_name, format_sse, get_broker, publish_task_event
+from .kanban import (
+    KANBAN_MAX_PAGE_SIZE, KANBAN_PAGE_SIZE, KanbanBoardService, apply_bulk_operation, move_task,
+    neighbours_from_order_list,
+)
+from .calendar_feed import calendar_entries, feed_validators, ics_entries, parse_range, serialize_entry, stream_ics
+from .clients import CLIENT_LIST_ORDERING, CLIENT_LIST_PAGE_SIZE, client_accounts_map_json, client_listing_queryset
+from .media_files import stage_upload
+from .metric_series import metric_series, parse_series_params
+from .pagination import KeysetPaginator
+from .timeline import event_scheduled_at, timeline_conflicts
+from .stats import COMPLETED_TASK_STATUSES, ClientMetricsService, DashboardStatsService
+from .tasks import build_media_zip, store_media_file
 
 # ==============================================================================
 # CONSTANTES GLOBAIS
@@ -55,77 +72,138 @@ class TenantLoginView(auth_views.LoginView):
 
 @login_required
 def dashboard(request):
-    today = datetime.date.today()
-
-    # Estatísticas
-    project_count = Project.objects.count()
-    pending_tasks_count = Task.objects.filter(status__in=['todo', 'in_progress']).count()
-    completed_tasks_count = Task.objects.filter(status='done').count()
-    total_tasks = pending_tasks_count + completed_tasks_count
-    
-    completion_percent = 0
-    if total_tasks > 0:
-        completion_percent = round((completed_tasks_count / total_tasks * 100))
-
-    # Gráficos
-    status_counts = Task.objects.values('status').annotate(count=models.Count('id'))
-    chart_status_data = {item['status']: item['count'] for item in status_counts}
-
-    posts_metrics = {
-        'scheduled': SocialPost.objects.filter(scheduled_for__gte=timezone.now()).count(),
-        'published': SocialPost.objects.filter(scheduled_for__lt=timezone.now()).count(),
-        'pending_approval': Task.objects.filter(status='client_approval').count()
-    }
+    # Contadores numa query só, em cache por tenant (ver projects/stats.py)
+    stats = DashboardStatsService().get()
 
     # Listas Recentes
-    upcoming_events = CalendarEvent.objects.filter( date__gte=timezone.now().date()).order_by('date')[:5]
-    recent_tasks = Task.objects.filter(status__in=['todo', 'in_progress']).order_by('-created_at')[:5]
+    upcoming_events = (
+        ContentTimelineEntry.objects
+        .filter(scheduled_at__gte=timezone.now())
+        .select_related('client')
+        .order_by('scheduled_at')[:5]
+    )
+    recent_tasks = (
+        Task.objects
+        .filter(archived_at__isnull=True)
+        .exclude(status__in=COMPLETED_TASK_STATUSES)
+        .order_by('-created_at')[:5]
+    )
 
     context = {
-        'project_count': Project.objects.filter(status='active').count(),
-        'pending_tasks_count': Task.objects.filter(status='pending').count(),
-        'completed_tasks_count': completed_tasks_count,
-        'total_tasks': total_tasks,
-        'completion_percent': completion_percent,
+        'project_count': stats['project_count'],
+        'pending_tasks_count': stats['pending_tasks_count'],
+        'completed_tasks_count': stats['completed_tasks_count'],
+        'total_tasks': stats['total_tasks'],
+        'completion_percent': stats['completion_percent'],
         'upcoming_events': upcoming_events,
         'recent_tasks': recent_tasks,
-        'chart_status_data': json.dumps(chart_status_data),
-        'posts_metrics': json.dumps(posts_metrics),
+        'chart_status_data': json.dumps(stats['chart_status_data']),
+        'posts_metrics': json.dumps(stats['posts_metrics']),
     }
     return render(request, 'projects/dashboard.html', context)
 
+# Histórico de posts do social dashboard: mais recentes primeiro, por cursor
+POST_HISTORY_ORDERING = ('-created_at', '-id')
+POST_HISTORY_PAGE_SIZE = 25
+
+def filter_post_history(queryset, params):
+    """ Filtros do histórico: ?client=<id>&status=<approval_status>&date_from=&date_to= (agendamento) """
+    if params.get('client'):
+        queryset = queryset.filter(client_id=params['client'])
+    if params.get('status'):
+        queryset = queryset.filter(approval_status=params['status'])
+    if params.get('date_from'):
+        queryset = queryset.filter(scheduled_for__date__gte=params['date_from'])
+    if params.get('date_to'):
+        queryset = queryset.filter(scheduled_for__date__lte=params['date_to'])
+    return queryset
+
 @login_required
 def social_dashboard(request):
-    """Renderiza o painel principal com métricas e lista de posts."""
-    # Debug info
-    print(f"🌍 DOMÍNIO: {request.get_host()} | SCHEMA: {connection.schema_name}")
+    """
+    Painel com a lista de posts. O histórico vem paginado por cursor (custo da
+    página não cresce com o histórico) e os canais de cada post vêm num
+    prefetch só. Requisições HTMX recebem só as linhas da tabela.
+    """
+    try:
+        posts = filter_post_history(
+            SocialPost.objects
+            .select_related('client')
+            .prefetch_related(Prefetch(
+                'socialpostdestination_set',
+                queryset=SocialPostDestination.objects.select_related('account'),
+                to_attr='destination_list',
+            )),
+            request.GET,
+        )
+        posts_page, next_cursor = KeysetPaginator(posts, POST_HISTORY_ORDERING, POST_HISTORY_PAGE_SIZE).get_page(
+            request.GET.get('cursor')
+        )
+    except (ValueError, ValidationError):
+        return HttpResponseBadRequest('Filtro ou cursor inválido.')
 
-    connected_accounts = SocialAccount.objects.all()
-    clients = Client.objects.all()
-    all_posts_history = SocialPost.objects.all().select_related('client').order_by('-created_at')
+    next_query = None
+    if next_cursor:
+        params = request.GET.copy()
+        params['cursor'] = next_cursor
+        next_query = params.urlencode()
 
     context = {
-        'connected_accounts': connected_accounts,
-        'clients': clients,
-        'posts_history': all_posts_history,
+        'posts_history': posts_page,
+        'next_query': next_query,
     }
+    if request.htmx:
+        return render(request, 'projects/includes/post_history_rows.html', context)
+
+    context.update({
+        'connected_accounts': SocialAccount.objects.all(),
+        'clients': Client.objects.all(),
+        'status_choices': SocialPost._meta.get_field('approval_status').choices,
+        'filters': request.GET,
+    })
     return render(request, 'projects/social_dashboard.html', context)
 
 # ==============================================================================
 # 2. CLIENTES E PROJETOS
 # ==============================================================================
 
+def client_listing_context(params):
+    """
+    Página de clientes (?q= busca, ?cursor= paginação) com canais, pastas,
+    projetos e storage anotados, e o total da busca.
+    """
+    clients = client_listing_queryset(params.get('q'))
+    clients_page, next_cursor = KeysetPaginator(clients, CLIENT_LIST_ORDERING, CLIENT_LIST_PAGE_SIZE).get_page(
+        params.get('cursor')
+    )
+
+    next_query = None
+    if next_cursor:
+        query = params.copy()
+        query['cursor'] = next_cursor
+        next_query = query.urlencode()
+
+    return {
+        'clients': clients_page,
+        'next_query': next_query,
+        'search': params.get('q', ''),
+    }
+
 @login_required
 def client_list_create(request):
-    clients = Client.objects.all()
-    add_client_form = ClientForm()
-    project_form = ProjectForm(tenant=request.tenant) 
+    try:
+        context = client_listing_context(request.GET)
+    except (ValueError, ValidationError):
+        return HttpResponseBadRequest('Cursor inválido.')
 
-    context = {
-        'clients': clients,
-        'add_client_form': add_client_form,
-        'project_form': project_form,
-    }
+    if request.htmx:
+        return render(request, 'projects/includes/client_rows.html', context)
+
+    context.update({
+        'clients_total': client_listing_queryset(request.GET.get('q')).count(),
+        'add_client_form': ClientForm(),
+        'project_form': ProjectForm(tenant=request.tenant),
+    })
     return render(request, 'projects/client_list.html', context)
 
 @login_required
@@ -184,35 +262,64 @@ def get_clients_list_api(request):
 @login_required
 def client_metrics_dashboard(request, pk):
     client = get_object_or_404(Client, pk=pk)
-    
-    # Tarefas
-    tasks = Task.objects.filter(project__client=client)
-    tasks_avulsas = Task.objects.filter(social_post__client=client)
-    all_client_tasks = (tasks | tasks_avulsas).distinct()
-    
-    task_status_counts = all_client_tasks.values('status').annotate(count=models.Count('id'))
-    task_chart_data = {item['status']: item['count'] for item in task_status_counts}
-
-    # Posts Sociais
-    posts = client.social_posts.all()
-    posts_by_status = posts.values('approval_status').annotate(count=models.Count('id'))
-    post_chart_data = {item['approval_status']: item['count'] for item in posts_by_status}
-    
-    total_likes = posts.aggregate(models.Sum('likes_count'))['likes_count__sum'] or 0
-    total_views = posts.aggregate(models.Sum('views_count'))['views_count__sum'] or 0
+    # Queries agrupadas + cache por cliente (ver projects/stats.py)
+    metrics = ClientMetricsService().get(client.pk)
 
     context = {
         'client': client,
-        'task_chart_data': json.dumps(task_chart_data),
-        'post_chart_data': json.dumps(post_chart_data),
-        'total_projects': client.projects.count(),
-        'total_tasks': all_client_tasks.count(),
-        'total_posts': posts.count(),
-        'total_likes': total_likes,
-        'total_views': total_views,
+        'task_chart_data': json.dumps(metrics['task_chart_data']),
+        'post_chart_data': json.dumps(metrics['post_chart_data']),
+        'total_projects': metrics['total_projects'],
+        'total_tasks': metrics['total_tasks'],
+        'total_posts': metrics['total_posts'],
+        'total_likes': metrics['total_likes'],
+        'total_views': metrics['total_views'],
+        'series_url': reverse('client_metric_series_api', args=[client.pk]),
     }
     return render(request, 'projects/client_metrics.html', context)
 
+# Máximo de clientes por chamada da API de métricas
+CLIENT_METRICS_API_LIMIT = 100
+
+@login_required
+def client_metrics_api(request):
+    """
+    Métricas de vários clientes lado a lado: ?ids=1,2,3
+    O número de queries não depende de quantos clientes são pedidos.
+    """
+    try:
+        client_ids = [int(pk) for pk in request.GET.get('ids', '').split(',') if pk.strip()]
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': 'ids inválidos.'}, status=400)
+    if len(client_ids) > CLIENT_METRICS_API_LIMIT:
+        return JsonResponse({'status': 'error', 'message': f'Máximo de {CLIENT_METRICS_API_LIMIT} clientes.'}, status=400)
+
+    # Só clientes que existem neste tenant
+    client_ids = list(Client.objects.filter(id__in=client_ids).values_list('id', flat=True))
+    metrics = ClientMetricsService().get_many(client_ids)
+    return JsonResponse({'status': 'success', 'clients': {str(pk): value for pk, value in metrics.items()}})
+
+@login_required
+def client_metric_series_api(request, pk):
+    """
+    Curvas de crescimento do cliente (histórico em MetricSnapshot):
+    ?metrics=likes,views&start=AAAA-MM-DD&end=AAAA-MM-DD&interval=day|hour
+    """
+    client = get_object_or_404(Client, pk=pk)
+    try:
+        metrics, start, end, interval = parse_series_params(request.GET)
+    except ValueError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+    return JsonResponse({'status': 'success', **metric_series(client.pk, metrics, start, end, interval)})
+
+@login_required
+def client_accounts_api(request, pk):
+    """ Contas do cliente por plataforma (Estúdio de posts), lidas do mapa em cache """
+    accounts = json.loads(client_accounts_map_json()).get(str(pk))
+    if accounts is None:
+        return JsonResponse({'status': 'error', 'message': 'Cliente não encontrado.'}, status=404)
+    return JsonResponse({'status': 'success', 'accounts': accounts})
+
 @login_required
 @require_POST
 def create_client_api(request):
@@ -270,37 +377,23 @@ class AddProjectAPI(View):
 @login_required
 def kanban_view(request, kanban_type='general'):
     if kanban_type == 'operational':
-        stages = [
-            ('briefing', 'Briefing'),
-            ('copy', 'Copy'),
-            ('design', 'Design'),
-            ('internal_approval', 'Aprovação Interna'),
-            ('client_approval', 'Aprovação Cliente'),
-            ('scheduling', 'Agendamento'),
-            ('published', 'Publicado'),
-        ]
         template = 'projects/operational_kanban.html'
         kanban_title = 'Kanban Operacional'
     else:
-        stages = [
-            ('todo', 'A Fazer'), 
-            ('doing', 'Em Andamento'), 
-            ('done', 'Concluído')
-        ]
         template = 'projects/general_kanban.html'
         kanban_title = 'Kanban Geral'
 
-    tasks = Task.objects.filter(kanban_type=kanban_type).order_by('order')
-    
-    kanban_data = {}
-    for key, label in stages:
-        stage_tasks = tasks.filter(status=key)
-        kanban_data[key] = [task.to_dict() for task in stage_tasks]
+    # Snapshot do quadro em cache por tenant/versão (ver projects/kanban.py).
+    # Cada coluna vem limitada a KANBAN_PAGE_SIZE; o resto chega pela kanban_column_api.
+    board = KanbanBoardService(kanban_type, page_size=KANBAN_PAGE_SIZE)
+    snapshot = board.snapshot()
 
     context = {
-        'kanban_data': kanban_data,
-        'kanban_data_json': json.dumps(kanban_data),
-        'stages': stages,
+        'kanban_data': snapshot['board'],
+        'kanban_data_json': snapshot['board_json'],
+        'kanban_cursors_json': snapshot['cursors_json'],
+        'kanban_version': snapshot['version'],
+        'stages': board.stages,
         'projects': Project.objects.all(),
         'clients': Client.objects.all(),
         'agency_users': CustomUser.objects.filter(agency=request.tenant),
@@ -309,6 +402,78 @@ def kanban_view(request, kanban_type='general'):
     }
     return render(request, template, context)
 
+@login_required
+def kanban_column_api(request, kanban_type, status):
+    """
+    Próxima página de uma coluna do Kanban (rolagem infinita).
+    Paginação por cursor em (rank, id): ?cursor=<token>&limit=50
+    """
+    try:
+        limit = min(int(request.GET.get('limit', KANBAN_PAGE_SIZE)), KANBAN_MAX_PAGE_SIZE)
+    except ValueError:
+        limit = KANBAN_PAGE_SIZE
+
+    try:
+        cards, next_cursor = KanbanBoardService(kanban_type).column_page(
+            status, cursor=request.GET.get('cursor'), page_size=max(limit, 1)
+        )
+    except ValueError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+
+    return JsonResponse({'status': 'success', 'cards': cards, 'next_cursor': next_cursor})
+
+@login_required
+def kanban_changes_api(request, kanban_type):
+    """
+    Sincronização incremental do Kanban: ?since=<versão>
+    304 se nada mudou; senão os cards alterados e os ids excluídos desde a versão.
+    """
+    try:
+        since = int(request.GET.get('since', 0))
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': 'Versão inválida.'}, status=400)
+
+    changes = KanbanBoardService(kanban_type).changes(since)
+    if changes is None:
+        return HttpResponseNotModified()
+
+    return JsonResponse({'status': 'success', **changes})
+
+# Intervalo do comentário de keep-alive (proxies derrubam conexões ociosas)
+KANBAN_STREAM_KEEPALIVE = 25
+
+@login_required
+async def kanban_events_stream(request, kanban_type):
+    """
+    Eventos do quadro em tempo real via Server-Sent Events (ver projects/events.py).
+    Só funciona sob ASGI: no WSGI cada conexão prenderia um worker, então
+    responde 204 (o EventSource desiste e o quadro segue no polling).
+    """
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+
+    broker = get_broker()
+    channel = channel_name(request.tenant.schema_name, kanban_type)
+    queue = broker.subscribe(channel)
+
+    async def stream():
+        try:
+            yield 'retry: 5000\n\n'
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), KANBAN_STREAM_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ': keep-alive\n\n'
+                    continue
+                yield format_sse(message)
+        finally:
+            broker.unsubscribe(channel, queue)
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Nginx: não segurar o stream em buffer
+    return response
+
 @login_required
 def kanban_board(request):
     """View alternativa para Kanban Geral."""
@@ -352,7 +517,7 @@ def operational_kanban_board(request):
         tasks = Task.objects.filter(
             kanban_type='operational', 
             status=stage_value
-        ).select_related('client', 'social_post').order_by('order', 'priority')
+        ).select_related('client', 'social_post').order_by('rank', 'priority')
         
         kanban_data[stage_value] = {
             'label': stage_label,
@@ -402,14 +567,8 @@ class AddTaskAPI(View):
                 except CustomUser.DoesNotExist:
                     pass
 
-            # Lógica de Ordem
-            max_order = Task.objects.filter(
-                kanban_type=kanban_type,
-                status='todo' if kanban_type == 'general' else 'briefing'
-            ).aggregate(models.Max('order'))['order__max']
-            new_order = (max_order if max_order is not None else -1) + 1
-
             # 2. CRIA A TAREFA (Salvando a prioridade)
+            # A posição no fim da coluna é calculada no Task.save()
             task = Task.objects.create(
                 kanban_type=kanban_type,
                 status='todo' if kanban_type == 'general' else 'briefing',
@@ -417,10 +576,10 @@ class AddTaskAPI(View):
                 project=project,
                 title=title,
                 description=description,
-                order=new_order,
                 created_by=request.user,
                 assigned_to=assigned_user
             )
+            publish_task_event('task.created', task)
 
             # 3. RETORNA JSON (Com username para as iniciais aparecerem)
             return JsonResponse({
@@ -476,10 +635,7 @@ class AddOperationalTaskAPI(View):
                 approval_status='draft'
             )
 
-            # 2. Cria Tarefa
-            max_order = Task.objects.filter(kanban_type='operational', status='briefing').aggregate(models.Max('order'))['order__max']
-            new_order = (max_order if max_order is not None else -1) + 1
-
+            # 2. Cria Tarefa (entra no fim da coluna via Task.save)
             task = Task.objects.create(
                 kanban_type='operational',
                 status='briefing',
@@ -487,10 +643,10 @@ class AddOperationalTaskAPI(View):
                 social_post=social_post,
                 title=title,
                 description=description,
-                order=new_order,
                 created_by=request.user,
                 assigned_to_id=assigned_to_id or None
             )
+            publish_task_event('task.created', task)
 
             return JsonResponse({'status': 'success', 'message': 'Demanda iniciada!', 'task': task.to_dict()}, status=201)
 
@@ -509,8 +665,14 @@ class KanbanUpdateTask(View):
             task_id = data.get('task_id')  # Antes estava 'taskId'
             new_status = data.get('status') # Antes estava 'newStatus'
             
-            # Se o JS mandar 'newOrderList', mantemos a lógica, mas o foco é o status
+            # Vizinhos do card na coluna de destino (None = ponta da coluna).
+            # 'newOrderList' (lista inteira da coluna) ainda é aceito por compatibilidade.
+            prev_id = data.get('prev_id')
+            next_id = data.get('next_id')
             new_order_list = data.get('newOrderList')
+            if new_order_list and not (prev_id or next_id):
+                prev_id, next_id = neighbours_from_order_list(new_order_list, task_id)
+            reposition = 'prev_id' in data or 'next_id' in data or bool(new_order_list)
 
             if not task_id or not new_status:
                  return JsonResponse({'status': 'error', 'message': 'Dados incompletos.'}, status=400)
@@ -520,14 +682,15 @@ class KanbanUpdateTask(View):
             # Nota: Adicionei validação para não quebrar se o status vier diferente
             
             task = get_object_or_404(Task, id=task_id)
-            task.status = new_status
-            task.save()
-
-            if new_order_list:
-                for index, item_id in enumerate(new_order_list):
-                    Task.objects.filter(id=item_id).update(order=index)
+            if reposition:
+                # Grava só a linha do card movido (chave entre os vizinhos)
+                move_task(task, new_status, prev_id, next_id)
+            else:
+                task.status = new_status
+                task.save()
+            publish_task_event('task.moved', task)
 
-            return JsonResponse({'status': 'success', 'message': 'Tarefa atualizada!'})
+            return JsonResponse({'status': 'success', 'message': 'Tarefa atualizada!', 'rank': task.rank})
         except Exception as e:
             return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
 
@@ -538,10 +701,37 @@ class DeleteTaskAPI(View):
         try:
             task = get_object_or_404(Task, pk=pk)
             task.delete()
+            publish_task_event('task.deleted', task, task_id=pk)
             return JsonResponse({'status': 'success', 'message': 'Tarefa excluída!'}, status=200)
         except Exception as e:
             return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
 
+@method_decorator(csrf_exempt, name='dispatch')
+class KanbanBulkAPI(View):
+    """
+    Operação em massa: {"task_ids": [...], "operation": "move|reassign|priority|delete|archive", "value": ...}
+    Tudo numa transação; a resposta traz o resultado por id.
+    """
+    @method_decorator(login_required)
+    def post(self, request, *args, **kwargs):
+        try:
+            data = json.loads(request.body)
+            task_ids = data.get('task_ids') or []
+            operation = data.get('operation')
+            value = data.get('value')
+
+            if not isinstance(task_ids, list) or not task_ids or not operation:
+                return JsonResponse({'status': 'error', 'message': 'Dados incompletos.'}, status=400)
+
+            if operation == 'reassign':
+                # Só usuários da própria agência
+                value = get_object_or_404(request.tenant.users, id=value) if value else None
+
+            results = apply_bulk_operation(task_ids, operation, value)
+            return JsonResponse({'status': 'success', 'results': results})
+        except Exception as e:
+            return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+
 # ==============================================================================
 # 4. CALENDÁRIO
 # ==============================================================================
@@ -553,30 +743,84 @@ def calendar_view(request):
 
 @login_required
 def get_calendar_events(request):
-    """API para buscar eventos filtrados."""
-    year = request.GET.get('year')
-    month = request.GET.get('month')
+    """
+    Eventos e posts agendados de um intervalo: ?start=AAAA-MM-DD&end=AAAA-MM-DD (fim exclusivo).
+    Com ETag/Last-Modified: navegar entre meses sem mudanças dá 304.
+    """
+    try:
+        start, end = parse_range(request.GET)
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': 'Intervalo inválido.'}, status=400)
 
-    events = CalendarEvent.objects.filter(date__year=year, date__month=month)
-    
-    events_data = []
-    for event in events:
-        events_data.append({
-            'id': event.id,
-            'title': event.title or event.client.name, # Usa nome do cliente se título vazio
-            'date': event.date.strftime('%Y-%m-%d'),
-            'time': event.time.strftime('%H:%M'),
-            'brandName': event.client.name,
-            # Tenta pegar logo ou gera iniciais
-            'brandLogo': event.client.logo.url if event.client.logo else f"https://ui-avatars.com/api/?name={event.client.name}&background=random",
-            'platform': event.platform,
-            'type': event.post_type,
-            'status': event.status,
-            'image': event.media.url if event.media else None, # URL real da imagem
-            'description': event.caption or ''
-        })
+    entries = calendar_entries(start, end)
+    etag, last_modified = feed_validators(entries)
+
+    response = get_conditional_response(
+        request,
+        etag=quote_etag(etag),
+        last_modified=int(last_modified.timestamp()) if last_modified else None,
+    )
+    if response is None:
+        events_data = [serialize_entry(entry) for entry in entries]
+        response = JsonResponse(events_data, safe=False, json_dumps_params={'separators': (',', ':')})
+
+    response.headers['ETag'] = quote_etag(etag)
+    if last_modified:
+        response.headers['Last-Modified'] = http_date(last_modified.timestamp())
+    # O navegador guarda, mas revalida a cada navegação
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+def calendar_ics_feed(request, token):
+    """
+    Feed ICS público (protegido pelo token) para assinar em apps de calendário.
+    Sem mudanças desde a última consulta: 304. Senão o arquivo sai em streaming.
+    """
+    feed_token = get_object_or_404(CalendarFeedToken.objects.select_related('client'), token=token, is_active=True)
 
-    return JsonResponse(events_data, safe=False)
+    entries = ics_entries(feed_token)
+    etag, last_modified = feed_validators(entries)
+    etag = quote_etag(f"ics-{etag}")
+
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=int(last_modified.timestamp()) if last_modified else None,
+    )
+    if response is None:
+        calendar_name = feed_token.client.name if feed_token.client else request.tenant.name
+        response = StreamingHttpResponse(
+            stream_ics(entries, f"Conteúdo - {calendar_name}"),
+            content_type='text/calendar; charset=utf-8',
+        )
+        response['Content-Disposition'] = 'inline; filename="calendario.ics"'
+
+    response.headers['ETag'] = etag
+    if last_modified:
+        response.headers['Last-Modified'] = http_date(last_modified.timestamp())
+    patch_cache_control(response, private=True, max_age=60 * 15)
+    return response
+
+@login_required
+@require_POST
+def create_calendar_feed_token(request):
+    """ Gera o link de assinatura ICS: do cliente (client_id) ou da agência inteira """
+    client = None
+    if request.POST.get('client_id'):
+        client = get_object_or_404(Client, pk=request.POST['client_id'])
+
+    feed_token = CalendarFeedToken.objects.create(
+        client=client,
+        label=request.POST.get('label', ''),
+        created_by=request.user,
+    )
+    feed_url = request.build_absolute_uri(reverse('calendar_ics_feed', kwargs={'token': feed_token.token}))
+    return JsonResponse({
+        'status': 'success',
+        'feed_url': feed_url,
+        # Apps de calendário abrem a assinatura direto pelo esquema webcal://
+        'webcal_url': 'webcal://' + feed_url.split('://', 1)[1],
+    })
 
 @login_required
 def get_clients_for_select(request):
@@ -612,7 +856,13 @@ def add_calendar_event(request):
                 media=media_file
             )
             
-            return JsonResponse({'message': 'Post criado!', 'id': new_event.id})
+            # Outros conteúdos do cliente na mesma plataforma em horário próximo
+            conflicts = timeline_conflicts(
+                client.id, new_event.platform, event_scheduled_at(new_event),
+                exclude={'calendar_event': new_event},
+            ).count()
+
+            return JsonResponse({'message': 'Post criado!', 'id': new_event.id, 'conflicts': conflicts})
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=400)
     
@@ -628,21 +878,8 @@ def create_post_studio_view(request):
     Renderiza a tela cheia de criação de posts (O Estúdio).
     """
     clients = Client.objects.all()
-    clients_map = {}
-    
-    # 1. Monta o Mapa de contas
-    for client in clients:
-        accounts = client.social_accounts.all()
-        acct_dict = {}
-        for acc in accounts:
-            acct_dict[acc.platform] = {
-                'id': acc.id, 
-                'name': acc.account_name, 
-                'platform': acc.platform
-            }
-        clients_map[client.id] = acct_dict
-
-    # 2. Verifica se veio um cliente pré-selecionado da URL (?client_id=1)
+
+    # Verifica se veio um cliente pré-selecionado da URL (?client_id=1)
     pre_selected_id = request.GET.get('client_id')
     selected_client_obj = None
 
@@ -652,13 +889,12 @@ def create_post_studio_view(request):
     
     context = {
         'clients': clients,
-        'clients_map_json': json.dumps(clients_map), 
+        # Mapa de contas: uma query, em cache por tenant
+        'clients_map_json': client_accounts_map_json(), 
         'pre_selected_client_id': int(pre_selected_id) if pre_selected_id else None,
         
         # --- ENVIAMOS O OBJETO PARA O TEMPLATE ---
         'selected_client': selected_client_obj, 
-        
-        'connected_accounts': SocialAccount.objects.all()
     }
     return render(request, 'projects/create_post_studio.html', context)
 
@@ -702,18 +938,15 @@ class CreateSocialPostAPI(View):
                     SocialPostDestination.objects.create(post=post, account=acc, format_type=fmt)
 
             # 3. Cria Tarefa no Kanban
-            max_order = Task.objects.filter(kanban_type='operational', status='briefing').aggregate(models.Max('order'))['order__max']
-            new_order = (max_order if max_order is not None else -1) + 1
-
-            Task.objects.create(
+            task = Task.objects.create(
                 kanban_type='operational',
                 status='briefing',
                 title=f"Post: {client.name} - {scheduled_for.strftime('%d/%m')}",
                 description=content[:150],
                 social_post=post,
-                created_by=request.user,
-                order=new_order
+                created_by=request.user
             )
+            publish_task_event('task.created', task)
 
             return JsonResponse({'status': 'success', 'message': 'Post criado e tarefa gerada!', 'id': post.id}, status=201)
 
@@ -742,6 +975,7 @@ def send_approval_link(request, post_id):
         if task and task.status == 'internal_approval':
             task.status = 'client_approval'
             task.save()
+            publish_task_event('task.moved', task)
     except Exception:
         pass 
 
@@ -806,7 +1040,9 @@ class ProcessApprovalAction(View):
                 
                 if task: task.status = 'design'
 
-            if task: task.save()
+            if task:
+                task.save()
+                publish_task_event('task.moved', task)
             post.save()
             
             return JsonResponse({'status': 'success', 'message': 'Feedback registrado!'})
@@ -818,6 +1054,21 @@ class ProcessApprovalAction(View):
 # 7. AUTENTICAÇÃO SOCIAL (OAUTH)
 # ==============================================================================
 
+def oauth_callback(view):
+    """
+    Callbacks OAuth rodam no worker web: sem esperar vaga no limite das redes.
+    Sem vaga, volta ao painel com aviso em vez de erro 500.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            with http.rate_limit_wait(0):
+                return view(request, *args, **kwargs)
+        except http.RateLimited:
+            messages.error(request, "Limite da API da rede atingido. Tente conectar de novo em instantes.")
+            return redirect('social_dashboard')
+    return wrapper
+
 @login_required
 def meta_auth_start(request, client_id):
     request.session['meta_connect_client_id'] = client_id
@@ -829,6 +1080,7 @@ def meta_auth_start(request, client_id):
     return redirect(url)
 
 @login_required
+@oauth_callback
 def meta_auth_callback(request):
     code = request.GET.get('code')
     state = request.GET.get('state')
@@ -854,11 +1106,14 @@ def meta_auth_callback(request):
         f"code={code}"
     )
     
-    resp = requests.get(token_url)
+    resp = http.get(token_url, endpoint='meta.oauth_token', rate_limit=('meta', None))
     token_data = resp.json()
 
     if 'access_token' in token_data:
-        accounts = service.get_user_pages(token_data['access_token'], client)
+        # Token de usuário de longa duração: os tokens de página derivados dele não expiram
+        long_lived = service.exchange_long_lived_token(token_data['access_token']).json()
+        user_token = long_lived.get('access_token', token_data['access_token'])
+        accounts = service.get_user_pages(user_token, client)
         if not accounts:
             messages.warning(request, "Nenhuma página encontrada.")
         else:
@@ -879,6 +1134,7 @@ def linkedin_auth_start(request, client_id):
     return redirect(service.get_auth_url(state))
 
 @login_required
+@oauth_callback
 def linkedin_auth_callback(request):
     code = request.GET.get('code')
     state = request.GET.get('state')
@@ -919,6 +1175,7 @@ def tiktok_auth_start(request, client_id):
     return redirect(service.get_auth_url(state))
 
 @login_required
+@oauth_callback
 def tiktok_auth_callback(request):
     code = request.GET.get('code')
     state = request.GET.get('state')
@@ -945,6 +1202,7 @@ def tiktok_auth_callback(request):
                     'client': client,
                     'access_token': token_data['access_token'],
                     'refresh_token': token_data.get('refresh_token'),
+                    'token_expires_at': token_expiry(token_data.get('expires_in')),
                     'account_name': account_name,
                     'is_active': True,
                 }
@@ -955,6 +1213,7 @@ def tiktok_auth_callback(request):
 add_task_api = AddTaskAPI.as_view()
 add_operational_task_api = AddOperationalTaskAPI.as_view()
 delete_task_api = DeleteTaskAPI.as_view()
+kanban_bulk_api = KanbanBulkAPI.as_view()
 # kanban_update_task já deve ser uma classe, se for, faça:
 kanban_update_task = KanbanUpdateTask.as_view()
 
@@ -1044,14 +1303,18 @@ def media_manager(request, client_id, folder_id=None):
 @login_required
 def media_dashboard(request):
     """
-    Lista todos os clientes para o usuário escolher qual galeria acessar.
+    Lista os clientes para o usuário escolher qual galeria acessar.
+    Mesma listagem anotada/paginada da lista de clientes; HTMX recebe só os cards.
     """
-    # Busca todos os clientes (você pode filtrar apenas ativos se quiser)
-    clients = Client.objects.all().order_by('name')
-    
-    context = {
-        'clients': clients
-    }
+    try:
+        context = client_listing_context(request.GET)
+    except (ValueError, ValidationError):
+        return HttpResponseBadRequest('Cursor inválido.')
+
+    if request.htmx:
+        return render(request, 'projects/includes/media_client_cards.html', context)
+
+    context['clients_total'] = client_listing_queryset(request.GET.get('q')).count()
     return render(request, 'projects/media_dashboard.html', context)
 
 @login_required
@@ -1094,12 +1357,21 @@ def delete_file(request, file_id):
     # Redireciona de volta para a pasta onde o arquivo estava
     return redirect('media_folder', client_id=client_id, folder_id=folder.id)
 
+def job_response(item):
+    """ Resposta de um job enfileirado: o front acompanha por api/jobs/<id>/ """
+    return JsonResponse({
+        'status': 'queued',
+        'job_id': item.pk,
+        'job_url': reverse('job_status_api', args=[item.pk]),
+    }, status=202)
+
 @login_required
 @require_POST
 def upload_photo_api(request):
     """
     View específica para receber upload via AJAX/Fetch um por um.
-    Retorna JSON para o SweetAlert atualizar a barra.
+    Só guarda o arquivo na área de espera: o envio ao R2 roda num job
+    (projects/media_files.py). Retorna o id do job para o front acompanhar.
     """
     
     # 1. Captura os dados
@@ -1114,71 +1386,25 @@ def upload_photo_api(request):
     if not folder_id:
         return JsonResponse({'status': 'error', 'message': 'ID da pasta não fornecido.'}, status=400)
 
-    try:
-        # 3. Busca a Pasta (com segurança, verificando se pertence ao cliente)
-        # Isso impede que alguém mude o ID no HTML e salve na pasta de outro cliente
-        client = get_object_or_404(Client, pk=client_id)
-        current_folder = get_object_or_404(MediaFolder, pk=folder_id, client=client)
-
-        # 4. Cria e Salva o Arquivo
-        # O método .save() do seu model já lida com o filename e file_size automaticamente
-        media_file = MediaFile.objects.create(
-            folder=current_folder,
-            file=file
-        )
+    # 3. Busca a Pasta (com segurança, verificando se pertence ao cliente)
+    # Isso impede que alguém mude o ID no HTML e salve na pasta de outro cliente
+    client = get_object_or_404(Client, pk=client_id)
+    current_folder = get_object_or_404(MediaFolder, pk=folder_id, client=client)
 
-        return JsonResponse({
-            'status': 'success', 
-            'message': 'Upload realizado',
-            'file_id': media_file.id,
-            'file_name': media_file.filename
-        })
+    # 4. Área de espera + job (o worker envia ao R2 e cria o MediaFile)
+    staged_name = stage_upload(file)
+    item = store_media_file.enqueue(folder_id=current_folder.pk, staged_name=staged_name, file_name=file.name)
+    return job_response(item)
 
-    except Exception as e:
-        # Log do erro no terminal do servidor para você debugar se precisar
-        print(f"ERRO API UPLOAD: {str(e)}")
-        return JsonResponse({'status': 'error', 'message': str(e)}, status=500)
-    
+@login_required
 def download_batch(request):
-    if request.method == 'POST':
-        file_ids = request.POST.getlist('selected_files')
-        download_token = request.POST.get('download_token')
-        if not file_ids:
-            return redirect(request.META.get('HTTP_REFERER', '/'))
-
-        # Busca os arquivos
-        files = MediaFile.objects.filter(id__in=file_ids)
+    """ Enfileira o ZIP dos arquivos escolhidos; a URL de download sai no resultado do job """
+    if request.method != 'POST':
+        return redirect('/')
 
-        if not files.exists():
-            return redirect(request.META.get('HTTP_REFERER', '/'))
+    file_ids = [int(pk) for pk in request.POST.getlist('selected_files') if pk.isdigit()]
+    if not file_ids:
+        return JsonResponse({'status': 'error', 'message': 'Selecione pelo menos um arquivo.'}, status=400)
 
-        # --- CORREÇÃO DO NOME DO ARQUIVO ---
-        # Pegamos o cliente do primeiro arquivo da lista para nomear o ZIP
-        first_file = files.first()
-        client_name = slugify(first_file.folder.client.name) # Ex: "nike-global"
-        zip_filename = f"imagens_{client_name}.zip"
-        # -----------------------------------
-
-        zip_buffer = io.BytesIO()
-        try:
-            with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-                for media_file in files:
-                    try:
-                        file_content = media_file.file.read()
-                        zip_file.writestr(media_file.filename, file_content)
-                    except Exception as e:
-                        print(f"Erro ao ler arquivo {media_file.filename}: {e}")
-                        continue
-        except Exception as e:
-             print(f"Erro geral no ZIP: {e}")
-
-        zip_buffer.seek(0)
-        response = HttpResponse(zip_buffer, content_type='application/zip')
-        
-        # AQUI ESTÁ A LINHA CORRIGIDA (com o f-string e a variável certa)
-        response['Content-Disposition'] = f'attachment; filename="{zip_filename}"'
-        if download_token:
-            response.set_cookie('download_token', download_token, max_age=10)
-        return response
-    
-    return redirect('/')
\ No newline at end of file
+    item = build_media_zip.enqueue(file_ids=file_ids)
+    return job_response(item)
\ No newline at end of file
@@ -50,7 +50,12 @@ document.addEventListener('DOMContentLoaded', function() {
 
         // 6. Busca e Preenche Eventos (Assíncrono)
         try {
-            const response = await fetch(`${urls.getEvents}?year=${year}&month=${month + 1}`);
+            // Intervalo [1º dia do mês, 1º dia do mês seguinte). Sem mudanças o servidor
+            // responde 304 (ETag) e o navegador usa a cópia em cache
+            const start = `${year}-${String(month + 1).padStart(2, '0')}-01`;
+            const next = new Date(year, month + 1, 1);
+            const end = `${next.getFullYear()}-${String(next.getMonth() + 1).padStart(2, '0')}-01`;
+            const response = await fetch(`${urls.getEvents}?start=${start}&end=${end}`);
             if (!response.ok) throw new Error('Erro na API');
             
             const events = await response.json();
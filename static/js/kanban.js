@@ -16,7 +16,17 @@ document.addEventListener('DOMContentLoaded', function() {
     // 3. Inicializa Drag and Drop
     setupDragAndDrop();
 
-    // 4. Ativa ícones Feather
+    // 4. Rolagem infinita nas colunas longas
+    setupColumnPagination();
+
+    // 5. Sincronização incremental com o servidor (mudanças de outros usuários)
+    setupBoardSync();
+    setupBoardEvents();
+
+    // 6. Seleção múltipla e ações em massa
+    setupBulkActions();
+
+    // 7. Ativa ícones Feather
     if (typeof feather !== 'undefined') {
         feather.replace();
     }
@@ -66,6 +76,188 @@ function renderBoard(data) {
     if (typeof feather !== 'undefined') feather.replace();
 }
 
+/**
+ * Rolagem infinita: cada coluna vem com no máximo uma página de cards.
+ * Quando o fim da coluna aparece na tela, busca a próxima página pelo cursor.
+ */
+let columnObserver = null;
+const loadingColumns = new Set();
+
+function setupColumnPagination() {
+    if (!window.KANBAN_COLUMN_URL || typeof IntersectionObserver === 'undefined') return;
+    window.KANBAN_CURSORS = window.KANBAN_CURSORS || {};
+
+    columnObserver = new IntersectionObserver(entries => {
+        entries.forEach(entry => {
+            if (entry.isIntersecting) loadMoreCards(entry.target);
+        });
+    }, { rootMargin: '200px' });
+
+    document.querySelectorAll('.kanban-column').forEach(column => {
+        const sentinel = document.createElement('div');
+        sentinel.className = 'column-sentinel';
+        sentinel.dataset.status = column.dataset.status;
+        column.appendChild(sentinel);
+        columnObserver.observe(sentinel);
+    });
+}
+
+function loadMoreCards(sentinel) {
+    const status = sentinel.dataset.status;
+    const cursor = window.KANBAN_CURSORS[status];
+    if (!cursor || loadingColumns.has(status)) return;
+    loadingColumns.add(status);
+
+    const url = window.KANBAN_COLUMN_URL.replace('__status__', status) + '?cursor=' + encodeURIComponent(cursor);
+
+    fetch(url)
+        .then(res => res.json())
+        .then(data => {
+            if (data.status !== 'success') throw new Error(data.message);
+
+            const container = document.querySelector(`#column-${status} .column-cards`);
+            data.cards.forEach(task => {
+                container.insertAdjacentHTML('beforeend', createCardHTML({ ...task, priority: task.priority || 'low' }));
+            });
+            window.KANBAN_CURSORS[status] = data.next_cursor;
+
+            updateTaskCounts();
+            if (typeof feather !== 'undefined') feather.replace();
+        })
+        .catch(error => console.error('Erro ao carregar mais cards:', error))
+        .finally(() => {
+            loadingColumns.delete(status);
+            // Se o fim da coluna continua visível, observar de novo dispara a próxima página
+            columnObserver.unobserve(sentinel);
+            columnObserver.observe(sentinel);
+        });
+}
+
+/**
+ * Sincronização incremental: a cada KANBAN_SYNC_INTERVAL pergunta ao servidor
+ * o que mudou desde a última versão vista. 304 = nada mudou.
+ */
+const KANBAN_SYNC_INTERVAL = 15000;
+
+function setupBoardSync() {
+    if (!window.KANBAN_CHANGES_URL) return;
+    window.KANBAN_VERSION = window.KANBAN_VERSION || 0;
+
+    setInterval(() => {
+        // Com o stream de eventos conectado o polling não é necessário
+        if (document.hidden || boardEventsLive || document.querySelector('.dragging')) return;
+        syncBoard();
+    }, KANBAN_SYNC_INTERVAL);
+}
+
+/**
+ * Eventos em tempo real (SSE). Se o servidor não suportar (WSGI responde 204),
+ * o EventSource desiste e o quadro continua no polling acima.
+ */
+let boardEventsLive = false;
+
+function setupBoardEvents() {
+    if (!window.KANBAN_EVENTS_URL || typeof EventSource === 'undefined') return;
+
+    const source = new EventSource(window.KANBAN_EVENTS_URL);
+    let reconnecting = false;
+
+    source.onopen = () => {
+        boardEventsLive = true;
+        // Reconectou: busca o que mudou enquanto estava fora
+        if (reconnecting) syncBoard();
+        reconnecting = false;
+    };
+    source.onerror = () => {
+        boardEventsLive = false;
+        reconnecting = true;
+    };
+
+    ['task.created', 'task.moved'].forEach(type => {
+        source.addEventListener(type, e => {
+            const data = JSON.parse(e.data);
+            applyBoardEvent(data, () => placeCard(data.task));
+        });
+    });
+    source.addEventListener('task.deleted', e => {
+        const data = JSON.parse(e.data);
+        applyBoardEvent(data, () => {
+            const card = document.querySelector(`.kanban-card[data-id="${data.task.id}"]`);
+            if (card) card.remove();
+        });
+    });
+    source.addEventListener('resync', () => syncBoard());
+}
+
+function applyBoardEvent(data, apply) {
+    if (data.version <= window.KANBAN_VERSION) return; // Já aplicado pelo sync
+    apply();
+    // Pulou alguma versão (ex.: rebalanceamento): completa pelo delta
+    if (data.version > window.KANBAN_VERSION + 1) {
+        syncBoard();
+    } else {
+        window.KANBAN_VERSION = data.version;
+    }
+    updateTaskCounts();
+    if (typeof feather !== 'undefined') feather.replace();
+}
+
+function syncBoard() {
+    fetch(window.KANBAN_CHANGES_URL + '?since=' + window.KANBAN_VERSION)
+        .then(res => {
+            if (res.status === 304) return null;
+            return res.json();
+        })
+        .then(data => {
+            if (!data || data.status !== 'success') return;
+
+            // Muitas mudanças ou histórico já apagado: recarrega o quadro
+            if (data.reset) {
+                window.location.reload();
+                return;
+            }
+
+            data.deleted.forEach(taskId => {
+                const card = document.querySelector(`.kanban-card[data-id="${taskId}"]`);
+                if (card) card.remove();
+            });
+            data.changed.forEach(placeCard);
+            window.KANBAN_VERSION = data.version;
+
+            updateTaskCounts();
+            if (typeof feather !== 'undefined') feather.replace();
+        })
+        .catch(error => console.error('Erro ao sincronizar o quadro:', error));
+}
+
+function compareCards(rankA, idA, rankB, idB) {
+    // Mesma ordenação do servidor: rank (byte a byte), depois id
+    if (rankA !== rankB) return rankA < rankB ? -1 : 1;
+    return idA - idB;
+}
+
+function placeCard(task) {
+    const existing = document.querySelector(`.kanban-card[data-id="${task.id}"]`);
+    if (existing) existing.remove();
+
+    const column = document.getElementById(`column-${task.status}`);
+    if (!column) return;
+    const container = column.querySelector('.column-cards');
+
+    const after = [...container.querySelectorAll('.kanban-card')].find(card =>
+        compareCards(task.rank, task.id, card.dataset.rank, Number(card.dataset.id)) < 0
+    );
+    // Depois do último card carregado de uma coluna paginada: chega com a próxima página
+    if (!after && (window.KANBAN_CURSORS || {})[task.status]) return;
+
+    const html = createCardHTML({ ...task, priority: task.priority || 'low' });
+    if (after) {
+        after.insertAdjacentHTML('beforebegin', html);
+    } else {
+        container.insertAdjacentHTML('beforeend', html);
+    }
+}
+
 /**
  * GERA O HTML DO CARD
  */
@@ -97,7 +289,7 @@ function createCardHTML(task) {
         : '--';
 
     return `
-    <div class="kanban-card" draggable="true" data-id="${task.id}" data-priority="${task.priority}">
+    <div class="kanban-card" draggable="true" data-id="${task.id}" data-rank="${task.rank || ''}" data-priority="${task.priority}">
         <div class="card-header">
             <span class="priority-pill ${priorityClass}">
                 <i data-feather="flag" style="width: 12px; height: 12px;"></i> ${priorityLabel}
@@ -142,6 +334,11 @@ function setupGlobalEventListeners() {
             }
 
             const card = e.target.closest('.kanban-card');
+            if (card && (e.ctrlKey || e.metaKey)) {
+                // Ctrl/Cmd + clique: seleciona para ação em massa
+                toggleCardSelection(card);
+                return;
+            }
             if (card) {
                 const taskId = card.dataset.id;
                 openTaskDetails(taskId);
@@ -237,8 +434,12 @@ function setupDragAndDrop() {
 
             const newStatus = column.dataset.status;
             const taskId = draggable.dataset.id;
+
+            // Vizinhos na coluna de destino: o backend gera a nova posição entre eles
+            const prev = draggable.previousElementSibling;
+            const next = draggable.nextElementSibling;
             
-            updateTaskStatus(taskId, newStatus);
+            updateTaskStatus(taskId, newStatus, prev ? prev.dataset.id : null, next ? next.dataset.id : null);
             updateTaskCounts();
         });
     });
@@ -258,10 +459,88 @@ function getDragAfterElement(container, y) {
     }, { offset: Number.NEGATIVE_INFINITY }).element;
 }
 
+/**
+ * Ações em massa: mover, atribuir, prioridade, arquivar e excluir vários cards
+ * numa chamada só. Depois o quadro se atualiza pelo delta (syncBoard).
+ */
+const selectedCards = new Set();
+
+function setupBulkActions() {
+    const toolbar = document.getElementById('bulk-toolbar');
+    if (!toolbar || !window.KANBAN_BULK_URL) return;
+
+    const bindSelect = (id, operation, parse = value => value) => {
+        const select = document.getElementById(id);
+        select.addEventListener('change', () => {
+            if (!select.value) return;
+            runBulkOperation(operation, parse(select.value));
+            select.value = '';
+        });
+    };
+    bindSelect('bulk-move', 'move');
+    bindSelect('bulk-priority', 'priority');
+    bindSelect('bulk-reassign', 'reassign', value => value === 'none' ? null : value);
+
+    document.getElementById('bulk-archive').addEventListener('click', () => runBulkOperation('archive'));
+    document.getElementById('bulk-delete').addEventListener('click', () => {
+        if (confirm(`Excluir ${selectedCards.size} tarefas permanentemente?`)) runBulkOperation('delete');
+    });
+    document.getElementById('bulk-clear').addEventListener('click', clearSelection);
+}
+
+function toggleCardSelection(card) {
+    const taskId = card.dataset.id;
+    if (selectedCards.has(taskId)) {
+        selectedCards.delete(taskId);
+        card.classList.remove('selected');
+    } else {
+        selectedCards.add(taskId);
+        card.classList.add('selected');
+    }
+    updateBulkToolbar();
+}
+
+function clearSelection() {
+    selectedCards.clear();
+    document.querySelectorAll('.kanban-card.selected').forEach(card => card.classList.remove('selected'));
+    updateBulkToolbar();
+}
+
+function updateBulkToolbar() {
+    const toolbar = document.getElementById('bulk-toolbar');
+    if (!toolbar) return;
+    toolbar.style.display = selectedCards.size ? 'flex' : 'none';
+    document.getElementById('bulk-count').textContent = selectedCards.size;
+}
+
+function runBulkOperation(operation, value = null) {
+    if (!selectedCards.size) return;
+
+    fetch(window.KANBAN_BULK_URL, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            'X-CSRFToken': window.CSRF_TOKEN
+        },
+        body: JSON.stringify({ task_ids: [...selectedCards], operation: operation, value: value })
+    })
+    .then(res => res.json())
+    .then(data => {
+        if (data.status !== 'success') throw new Error(data.message);
+
+        const failed = Object.values(data.results).filter(result => result !== 'ok').length;
+        if (failed) alert(`${failed} tarefa(s) não foram alteradas.`);
+
+        clearSelection();
+        syncBoard();
+    })
+    .catch(error => alert('Erro na ação em massa: ' + error.message));
+}
+
 /**
  * Atualiza status (Backend)
  */
-function updateTaskStatus(taskId, newStatus) {
+function updateTaskStatus(taskId, newStatus, prevId, nextId) {
     // Usa window.URL e window.CSRF
     const url = window.KANBAN_UPDATE_URL;
     const csrf = window.CSRF_TOKEN;
@@ -276,14 +555,19 @@ function updateTaskStatus(taskId, newStatus) {
         },
         body: JSON.stringify({
             task_id: taskId,
-            status: newStatus
+            status: newStatus,
+            prev_id: prevId,
+            next_id: nextId
         })
     })
     .then(response => response.json())
     .then(data => {
         if (data.status !== 'success') {
             alert('Erro ao mover tarefa. Recarregue a página.');
+            return;
         }
+        const card = document.querySelector(`.kanban-card[data-id="${taskId}"]`);
+        if (card && data.rank) card.dataset.rank = data.rank;
     })
     .catch(error => console.error('Erro de rede:', error));
 }
@@ -423,9 +707,11 @@ function confirmDeleteTask(taskId) {
 }
 
 function updateTaskCounts() {
+    const cursors = window.KANBAN_CURSORS || {};
     document.querySelectorAll('.kanban-column').forEach(col => {
         const count = col.querySelectorAll('.kanban-card').length;
         const badge = col.querySelector('.task-count');
-        if(badge) badge.textContent = count;
+        // '+' indica que ainda há cards para carregar nessa coluna
+        if(badge) badge.textContent = cursors[col.dataset.status] ? `${count}+` : count;
     });
 }
\ No newline at end of file
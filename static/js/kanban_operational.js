@@ -41,6 +41,7 @@ document.addEventListener('DOMContentLoaded', () => {
         card.setAttribute('draggable', 'true'); // VITAL PARA ARRASTAR
         card.dataset.taskId = task.id;
         card.dataset.status = task.status;
+        card.dataset.rank = task.rank || '';
 
         // Conteúdo do Card
         let footerHtml = `<span class="project-tag">${task.project_name || 'Sem Projeto'}</span>`;
@@ -104,11 +105,9 @@ document.addEventListener('DOMContentLoaded', () => {
                 const newStatus = column.dataset.status;
                 const taskId = draggedCard.dataset.taskId;
                 
-                // Só salva se mudou de coluna
-                if (draggedCard.dataset.status !== newStatus) {
-                    draggedCard.dataset.status = newStatus;
-                    saveTaskChanges(taskId, newStatus, column.querySelector('.column-cards'));
-                }
+                // Salva mudança de coluna e também reordenação dentro da coluna
+                draggedCard.dataset.status = newStatus;
+                saveTaskChanges(taskId, newStatus, draggedCard);
             }
         });
     });
@@ -129,10 +128,10 @@ document.addEventListener('DOMContentLoaded', () => {
         }, { offset: Number.NEGATIVE_INFINITY }).element;
     }
 
-    async function saveTaskChanges(taskId, newStatus, columnElement) {
-        // Pega a nova ordem dos IDs na coluna
-        const newOrderList = Array.from(columnElement.querySelectorAll('.kanban-card'))
-                                .map(card => card.dataset.taskId);
+    async function saveTaskChanges(taskId, newStatus, cardElement) {
+        // Só os vizinhos do card: o backend grava apenas a linha movida
+        const prev = cardElement.previousElementSibling;
+        const next = cardElement.nextElementSibling;
         
         try {
             const response = await fetch(KANBAN_UPDATE_URL, {
@@ -142,13 +141,19 @@ document.addEventListener('DOMContentLoaded', () => {
                     'X-CSRFToken': CSRF_TOKEN
                 },
                 body: JSON.stringify({
-                    taskId: taskId,
-                    newStatus: newStatus,
-                    newOrderList: newOrderList
+                    task_id: taskId,
+                    status: newStatus,
+                    prev_id: prev ? prev.dataset.taskId : null,
+                    next_id: next ? next.dataset.taskId : null
                 })
             });
             
-            if (!response.ok) console.error("Erro ao salvar mudança no servidor.");
+            if (!response.ok) {
+                console.error("Erro ao salvar mudança no servidor.");
+            } else {
+                const data = await response.json();
+                if (data.rank) cardElement.dataset.rank = data.rank;
+            }
             
             updateTaskCounts();
 
@@ -165,6 +170,163 @@ document.addEventListener('DOMContentLoaded', () => {
         });
     }
 
+    // --- 4.1 ROLAGEM INFINITA (colunas longas como 'Publicado') ---
+    const cursors = (typeof KANBAN_CURSORS !== 'undefined') ? KANBAN_CURSORS : {};
+    const loadingColumns = new Set();
+
+    function setupColumnPagination() {
+        if (typeof KANBAN_COLUMN_URL === 'undefined' || typeof IntersectionObserver === 'undefined') return;
+
+        const observer = new IntersectionObserver(entries => {
+            entries.forEach(entry => {
+                if (entry.isIntersecting) loadMoreCards(entry.target, observer);
+            });
+        }, { rootMargin: '200px' });
+
+        columns.forEach(column => {
+            const sentinel = document.createElement('div');
+            sentinel.className = 'column-sentinel';
+            sentinel.dataset.status = column.dataset.status;
+            column.appendChild(sentinel);
+            observer.observe(sentinel);
+        });
+    }
+
+    async function loadMoreCards(sentinel, observer) {
+        const status = sentinel.dataset.status;
+        if (!cursors[status] || loadingColumns.has(status)) return;
+        loadingColumns.add(status);
+
+        try {
+            const url = KANBAN_COLUMN_URL.replace('__status__', status) + '?cursor=' + encodeURIComponent(cursors[status]);
+            const response = await fetch(url);
+            const data = await response.json();
+            if (data.status !== 'success') throw new Error(data.message);
+
+            const columnCards = document.querySelector(`#column-${status} .column-cards`);
+            data.cards.forEach(task => columnCards.appendChild(createTaskCard(task)));
+            cursors[status] = data.next_cursor;
+
+            updateTaskCounts();
+            if (typeof feather !== 'undefined') feather.replace();
+        } catch (error) {
+            console.error('Erro ao carregar mais cards:', error);
+        } finally {
+            loadingColumns.delete(status);
+            // Se o fim da coluna continua visível, observar de novo dispara a próxima página
+            observer.unobserve(sentinel);
+            observer.observe(sentinel);
+        }
+    }
+
+    // --- 4.2 SINCRONIZAÇÃO INCREMENTAL (mudanças de outros usuários) ---
+    const SYNC_INTERVAL = 15000;
+    let boardVersion = (typeof KANBAN_VERSION !== 'undefined') ? KANBAN_VERSION : 0;
+
+    function setupBoardSync() {
+        if (typeof KANBAN_CHANGES_URL === 'undefined') return;
+
+        setInterval(() => {
+            // Com o stream de eventos conectado o polling não é necessário
+            if (document.hidden || eventsLive || draggedCard) return;
+            syncBoard();
+        }, SYNC_INTERVAL);
+    }
+
+    // --- 4.3 EVENTOS EM TEMPO REAL (SSE; sem suporte no servidor, fica só o polling) ---
+    let eventsLive = false;
+
+    function setupBoardEvents() {
+        if (typeof KANBAN_EVENTS_URL === 'undefined' || typeof EventSource === 'undefined') return;
+
+        const source = new EventSource(KANBAN_EVENTS_URL);
+        let reconnecting = false;
+
+        source.onopen = () => {
+            eventsLive = true;
+            // Reconectou: busca o que mudou enquanto estava fora
+            if (reconnecting) syncBoard();
+            reconnecting = false;
+        };
+        source.onerror = () => {
+            eventsLive = false;
+            reconnecting = true;
+        };
+
+        ['task.created', 'task.moved'].forEach(type => {
+            source.addEventListener(type, e => {
+                const data = JSON.parse(e.data);
+                applyBoardEvent(data, () => placeCard(data.task));
+            });
+        });
+        source.addEventListener('task.deleted', e => {
+            const data = JSON.parse(e.data);
+            applyBoardEvent(data, () => {
+                const card = document.querySelector(`.kanban-card[data-task-id="${data.task.id}"]`);
+                if (card) card.remove();
+            });
+        });
+        source.addEventListener('resync', () => syncBoard());
+    }
+
+    function applyBoardEvent(data, apply) {
+        if (data.version <= boardVersion) return; // Já aplicado pelo sync
+        apply();
+        // Pulou alguma versão (ex.: rebalanceamento): completa pelo delta
+        if (data.version > boardVersion + 1) {
+            syncBoard();
+        } else {
+            boardVersion = data.version;
+        }
+        updateTaskCounts();
+        if (typeof feather !== 'undefined') feather.replace();
+    }
+
+    async function syncBoard() {
+        try {
+            const response = await fetch(`${KANBAN_CHANGES_URL}?since=${boardVersion}`);
+            if (response.status === 304) return; // Nada mudou
+
+            const data = await response.json();
+            if (data.status !== 'success') return;
+
+            // Muitas mudanças ou histórico já apagado: recarrega o quadro
+            if (data.reset) {
+                window.location.reload();
+                return;
+            }
+
+            data.deleted.forEach(taskId => {
+                const card = document.querySelector(`.kanban-card[data-task-id="${taskId}"]`);
+                if (card) card.remove();
+            });
+            data.changed.forEach(placeCard);
+            boardVersion = data.version;
+
+            updateTaskCounts();
+            if (typeof feather !== 'undefined') feather.replace();
+        } catch (error) {
+            console.error('Erro ao sincronizar o quadro:', error);
+        }
+    }
+
+    function placeCard(task) {
+        const existing = document.querySelector(`.kanban-card[data-task-id="${task.id}"]`);
+        if (existing) existing.remove();
+
+        const columnCards = document.querySelector(`#column-${task.status} .column-cards`);
+        if (!columnCards) return;
+
+        // Mesma ordenação do servidor: rank (byte a byte), depois id
+        const after = [...columnCards.querySelectorAll('.kanban-card')].find(card =>
+            task.rank !== card.dataset.rank ? task.rank < card.dataset.rank : task.id < Number(card.dataset.taskId)
+        );
+        // Depois do último card carregado de uma coluna paginada: chega com a próxima página
+        if (!after && cursors[task.status]) return;
+
+        columnCards.insertBefore(createTaskCard(task), after || null);
+    }
+
     // --- 5. DETALHES DA TAREFA ---
     async function openTaskDetails(taskId) {
         try {
@@ -210,5 +372,8 @@ document.addEventListener('DOMContentLoaded', () => {
     
     // Inicia tudo
     initializeKanban();
+    setupColumnPagination();
+    setupBoardSync();
+    setupBoardEvents();
     if (typeof feather !== 'undefined') feather.replace();
 });
\ No newline at end of file
@@ -26,17 +26,16 @@ document.addEventListener("DOMContentLoaded", function () {
         }
     }
 
-    // 3. VALIDAÇÃO DO DOWNLOAD EM LOTE
-    // Verifica se o formulário existe na página antes de adicionar o evento
+    // 3. DOWNLOAD EM LOTE
+    // O servidor enfileira o ZIP (job) e devolve o id; acompanhamos por api/jobs/<id>/
     const batchForm = document.getElementById('batchForm');
-    const tokenInput = document.getElementById('downloadToken'); // Referência ao input
 
     if (batchForm) {
-        batchForm.addEventListener('submit', function(event) {
+        batchForm.addEventListener('submit', async function(event) {
+            event.preventDefault();
             const checked = document.querySelectorAll('.file-select-checkbox:checked');
             
             if (checked.length === 0) {
-                event.preventDefault();
                 if (typeof Swal !== 'undefined') {
                     Swal.fire('Atenção', 'Selecione pelo menos um arquivo.', 'warning');
                 } else {
@@ -45,21 +44,10 @@ document.addEventListener("DOMContentLoaded", function () {
                 return;
             }
 
-            // --- INÍCIO DA LÓGICA DE PROGRESSO ---
-            
-            // 1. Gera um Token Único (Data atual em milissegundos)
-            const token = new Date().getTime();
-            if(tokenInput) tokenInput.value = token;
-
-            // 2. Mostra o SweetAlert com Barra de Progresso
-            let progress = 0;
             Swal.fire({
                 title: 'Gerando Arquivo ZIP...',
                 html: `
                     <div style="text-align: left; margin-bottom: 5px; color: #555;">Compactando ${checked.length} arquivos</div>
-                    <div style="width: 100%; background-color: #e9ecef; border-radius: 4px; height: 15px; overflow: hidden;">
-                        <div id="zip-progress-bar" style="width: 0%; height: 100%; background-color: var(--primary-color, #2563eb); transition: width 0.2s;"></div>
-                    </div>
                     <div style="font-size: 0.8rem; margin-top: 5px; color: #888;">Aguarde, o download iniciará automaticamente.</div>
                 `,
                 allowOutsideClick: false,
@@ -70,41 +58,31 @@ document.addEventListener("DOMContentLoaded", function () {
                 }
             });
 
-            // 3. Timer para Simular Progresso e Checar Cookie
-            const progressBar = document.getElementById('zip-progress-bar');
-            
-            const downloadTimer = setInterval(() => {
-                // A. Simula progresso (vai rápido até 30%, depois devagar até 90%)
-                if (progress < 30) progress += 2;
-                else if (progress < 90) progress += 0.5;
-                
-                if (progressBar) progressBar.style.width = progress + '%';
-
-                // B. Verifica se o Cookie chegou
-                // O servidor cria um cookie "download_token=123456"
-                if (document.cookie.includes('download_token=' + token)) {
-                    
-                    // SUCESSO! O servidor respondeu.
-                    clearInterval(downloadTimer);
-                    
-                    if (progressBar) progressBar.style.width = '100%';
-
-                    // Limpa o cookie para não atrapalhar o próximo
-                    document.cookie = 'download_token=; Max-Age=-99999999;';
-
-                    // Fecha o alerta após um breve delay visual
-                    setTimeout(() => {
-                        Swal.close();
-                        
-                        // Opcional: Toast de sucesso
-                        const Toast = Swal.mixin({
-                            toast: true, position: 'top-end', showConfirmButton: false, timer: 3000
-                        });
-                        Toast.fire({ icon: 'success', title: 'Download iniciado!' });
-                    }, 500);
+            try {
+                const response = await fetch(batchForm.action, {
+                    method: 'POST',
+                    body: new FormData(batchForm)
+                });
+                const data = await response.json().catch(() => ({}));
+                if (!response.ok || data.status !== 'queued') {
+                    throw new Error(data.message || response.status);
                 }
-            }, 100); // Roda a cada 100ms
 
+                const job = await waitForJob(data.job_url);
+                if (job.status !== 'succeeded' || !job.result || !job.result.url) {
+                    throw new Error(job.error || 'Nenhum arquivo pôde ser compactado.');
+                }
+
+                window.location.href = job.result.url;
+                Swal.close();
+                const Toast = Swal.mixin({
+                    toast: true, position: 'top-end', showConfirmButton: false, timer: 3000
+                });
+                Toast.fire({ icon: 'success', title: 'Download iniciado!' });
+            } catch (err) {
+                console.error(err);
+                Swal.fire('Erro', `Não foi possível gerar o ZIP (${err.message}).`, 'error');
+            }
         });
     }
 });
@@ -149,6 +127,20 @@ function confirmDelete(event, title, text, element) {
 // Função de pausa (Delay)
 const sleep = (ms) => new Promise(resolve => setTimeout(resolve, ms));
 
+// Espera um job da fila (api/jobs/<id>/) terminar; devolve o job ('succeeded' ou 'failed')
+async function waitForJob(jobUrl, interval = 1000) {
+    while (true) {
+        const response = await fetch(jobUrl, { headers: { 'Accept': 'application/json' } });
+        if (response.ok) {
+            const data = await response.json();
+            if (data.job.status === 'succeeded' || data.job.status === 'failed') {
+                return data.job;
+            }
+        }
+        await sleep(interval);
+    }
+}
+
 // Função de Upload em Lote
 async function uploadInBatch(inputElement) {
     console.log("--> Iniciando uploadInBatch...");
@@ -221,6 +213,8 @@ async function uploadInBatch(inputElement) {
 
     let successCount = 0;
     let errorCount = 0;
+    // O envio ao R2 roda na fila: guardamos os jobs e esperamos no fim
+    const pendingJobs = [];
 
     for (const [index, file] of files.entries()) {
         const formData = new FormData();
@@ -241,9 +235,9 @@ async function uploadInBatch(inputElement) {
 
             const data = await response.json().catch(() => ({}));
 
-            if (response.ok && data.status === 'success') {
-                successCount++;
-                addLog(`✓ Sucesso: ${file.name}`, 'success');
+            if (response.ok && data.status === 'queued') {
+                pendingJobs.push({ name: file.name, url: data.job_url });
+                addLog(`… Na fila: ${file.name}`, 'info');
             } else {
                 errorCount++;
                 addLog(`✗ Falha: ${file.name} (${data.message || response.status})`, 'error');
@@ -254,14 +248,37 @@ async function uploadInBatch(inputElement) {
             addLog(`! Erro Rede: ${file.name}`, 'error');
         }
 
+        // Metade da barra é o envio ao servidor; a outra metade, a fila
         const currentStep = index + 1;
-        const percent = Math.round((currentStep / total) * 100);
+        const percent = Math.round((currentStep / total) * 50);
         
         if (progressBar) progressBar.style.width = `${percent}%`;
         if (progressText) progressText.innerText = `${currentStep}/${total} arquivos`;
         if (percentText) percentText.innerText = `${percent}%`;
     }
 
+    for (const [index, pending] of pendingJobs.entries()) {
+        try {
+            const job = await waitForJob(pending.url);
+            if (job.status === 'succeeded') {
+                successCount++;
+                addLog(`✓ Sucesso: ${pending.name}`, 'success');
+            } else {
+                errorCount++;
+                addLog(`✗ Falha: ${pending.name} (${job.error || 'erro no envio'})`, 'error');
+            }
+        } catch (err) {
+            errorCount++;
+            console.error(err);
+            addLog(`! Erro Rede: ${pending.name}`, 'error');
+        }
+
+        const done = errorCount + successCount;
+        const percent = 50 + Math.round((done / total) * 50);
+        if (progressBar) progressBar.style.width = `${percent}%`;
+        if (percentText) percentText.innerText = `${percent}%`;
+    }
+
     await sleep(500);
     
     let iconType = 'success';